@@ -0,0 +1,96 @@
+"""
+Compares AST backends by build time, memory, held by built trees, and time of common queries.
+
+Usage (from the repository root):
+    python -m benchmarks.ast_backends -d path/to/java/sources
+"""
+
+import gc
+import tracemalloc
+from argparse import ArgumentParser
+from pathlib import Path
+from time import perf_counter
+from typing import Any, List, NamedTuple
+
+from javalang.tree import CompilationUnit
+
+from veniq.ast_framework import AST, ASTNodeType
+from veniq.utils.ast_builder import build_ast
+
+BACKENDS = ['networkx', 'compact']
+
+
+class BackendMeasurement(NamedTuple):
+    backend: str
+    build_time: float
+    memory: int
+    query_time: float
+
+
+def parse_files(directory: Path) -> List[CompilationUnit]:
+    javalang_asts: List[CompilationUnit] = []
+    for filepath in sorted(directory.glob('**/*.java')):
+        try:
+            javalang_asts.append(build_ast(str(filepath)))
+        except Exception:
+            # files, which javalang fails to parse, are not interesting for this benchmark
+            pass
+    return javalang_asts
+
+
+def measure_backend(backend: str, javalang_asts: List[CompilationUnit]) -> BackendMeasurement:
+    gc.collect()
+    tracemalloc.start()
+    memory_before, _ = tracemalloc.get_traced_memory()
+    build_start = perf_counter()
+    asts = [AST.build_from_javalang(javalang_ast, backend) for javalang_ast in javalang_asts]
+    build_time = perf_counter() - build_start
+    gc.collect()
+    memory_after, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    query_start = perf_counter()
+    for ast in asts:
+        _run_queries(ast)
+    query_time = perf_counter() - query_start
+
+    return BackendMeasurement(backend, build_time, memory_after - memory_before, query_time)
+
+
+def _run_queries(ast: AST) -> Any:
+    for method_declaration in ast.get_proxy_nodes(ASTNodeType.METHOD_DECLARATION):
+        method_ast = ast.get_subtree(method_declaration)
+        for node in method_ast.get_proxy_nodes(ASTNodeType.MEMBER_REFERENCE, ASTNodeType.METHOD_INVOCATION):
+            node.member
+        for _ in method_ast:
+            pass
+
+
+def print_measurements(measurements: List[BackendMeasurement], files_qty: int) -> None:
+    print(f'Files: {files_qty}')
+    print(f'{"backend":<10} {"build, s":>10} {"memory, MiB":>12} {"queries, s":>11}')
+    for measurement in measurements:
+        print(
+            f'{measurement.backend:<10} {measurement.build_time:>10.3f} '
+            f'{measurement.memory / 2 ** 20:>12.2f} {measurement.query_time:>11.3f}'
+        )
+
+
+if __name__ == '__main__':
+    parser = ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "-d", "--dir",
+        default=str(Path(__file__).parent.parent / 'test'),
+        help="Directory with JAVA source code, which is parsed with each backend",
+    )
+    parser.add_argument(
+        "-b", "--backend",
+        choices=BACKENDS,
+        action='append',
+        help="Backend to measure, may be repeated. All backends are measured by default.",
+    )
+    args = parser.parse_args()
+
+    javalang_asts = parse_files(Path(args.dir))
+    measurements = [measure_backend(backend, javalang_asts) for backend in args.backend or BACKENDS]
+    print_measurements(measurements, len(javalang_asts))
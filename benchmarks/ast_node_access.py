@@ -0,0 +1,111 @@
+"""
+Micro-benchmarks of the most frequent ASTNode operations: attribute access, children and parent.
+Each operation is applied to every node of every parsed file and the average time per operation is reported.
+
+Usage (from the repository root):
+    python -m benchmarks.ast_node_access -d path/to/java/sources
+"""
+
+from argparse import ArgumentParser
+from pathlib import Path
+from time import perf_counter
+from typing import Callable, Dict, List
+
+from veniq.ast_framework import AST, ASTNode, ASTNodeType
+
+from benchmarks.ast_backends import BACKENDS, parse_files
+
+
+def _access_node_type(node: ASTNode) -> None:
+    node.node_type
+
+
+def _access_javalang_fields(node: ASTNode) -> None:
+    # both plain fields and lists of references are read
+    if node.node_type == ASTNodeType.METHOD_DECLARATION:
+        node.name
+        node.body
+    elif node.node_type == ASTNodeType.MEMBER_REFERENCE:
+        node.member
+        node.qualifier
+
+
+def _access_computed_field(node: ASTNode) -> None:
+    if node.node_type == ASTNodeType.LOCAL_VARIABLE_DECLARATION:
+        node.names
+
+
+def _iterate_children(node: ASTNode) -> None:
+    for _ in node.children:
+        pass
+
+
+def _get_parent(node: ASTNode) -> None:
+    node.parent
+
+
+def _get_line(node: ASTNode) -> None:
+    node.line
+
+
+OPERATIONS: Dict[str, Callable[[ASTNode], None]] = {
+    'node_type': _access_node_type,
+    'javalang fields': _access_javalang_fields,
+    'computed field': _access_computed_field,
+    'children': _iterate_children,
+    'parent': _get_parent,
+    'line': _get_line,
+}
+
+
+def _count_nodes(asts: List[AST]) -> int:
+    return sum(1 for ast in asts for _ in ast)
+
+
+def measure_operations(asts: List[AST], repeat: int) -> Dict[str, float]:
+    '''
+    Returns average time in nanoseconds of each operation applied to a node.
+    Nodes are created anew for each repetition, so cached values do not affect results,
+    and creation of nodes is not measured.
+    '''
+    times: Dict[str, float] = {}
+    for operation_name, operation in OPERATIONS.items():
+        total_time = 0.0
+        nodes_qty = 0
+        for _ in range(repeat):
+            nodes = [node for ast in asts for node in ast]
+            start = perf_counter()
+            for node in nodes:
+                operation(node)
+            total_time += perf_counter() - start
+            nodes_qty += len(nodes)
+        times[operation_name] = total_time / nodes_qty * 1e9
+    return times
+
+
+if __name__ == '__main__':
+    parser = ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "-d", "--dir",
+        default=str(Path(__file__).parent.parent / 'test'),
+        help="Directory with JAVA source code to take nodes from",
+    )
+    parser.add_argument(
+        "-b", "--backend",
+        choices=BACKENDS,
+        default='networkx',
+        help="Backend of built trees",
+    )
+    parser.add_argument(
+        "-r", "--repeat",
+        type=int,
+        default=3,
+        help="Number of passes over all nodes for each operation",
+    )
+    args = parser.parse_args()
+
+    asts = [AST.build_from_javalang(javalang_ast, args.backend) for javalang_ast in parse_files(Path(args.dir))]
+    print(f'Files: {len(asts)}, nodes: {_count_nodes(asts)}')
+    print(f'{"operation":<16} {"ns per node":>12}')
+    for operation_name, time in measure_operations(asts, args.repeat).items():
+        print(f'{operation_name:<16} {time:>12.1f}')
@@ -0,0 +1,91 @@
+"""
+Soak test of memory of a long-running worker process.
+A single worker of a pool extracts statements semantic of all methods of all files several times,
+which creates fake nodes for every method, and reports its resident memory after each pass.
+All lazily created caches are filled during the first pass,
+so growth of memory after it means that something is leaked.
+
+Usage (from the repository root):
+    python -m benchmarks.worker_memory -d path/to/java/sources
+"""
+
+import gc
+import os
+import resource
+import sys
+from argparse import ArgumentParser
+from pathlib import Path
+from typing import List
+
+from pebble import ProcessPool
+
+from veniq.ast_framework import AST, ASTNodeType
+from veniq.baselines.semi.extract_semantic import extract_method_statements_semantic
+from veniq.utils.ast_builder import build_ast
+
+
+def get_resident_memory() -> int:
+    '''
+    Returns resident memory of the current process in bytes.
+    Where /proc is not available, maximal resident memory is returned instead.
+    '''
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def process_files(filepaths: List[Path], passes: int) -> List[int]:
+    '''
+    Returns resident memory in bytes after each pass over all files.
+    '''
+    memory: List[int] = []
+    for _ in range(passes):
+        for filepath in filepaths:
+            try:
+                ast = AST.build_from_javalang(build_ast(str(filepath)))
+            except Exception:
+                # files, which javalang fails to parse, are not interesting for this benchmark
+                continue
+            for method_declaration in ast.get_proxy_nodes(ASTNodeType.METHOD_DECLARATION):
+                extract_method_statements_semantic(ast.get_subtree(method_declaration))
+        gc.collect()
+        memory.append(get_resident_memory())
+    return memory
+
+
+if __name__ == '__main__':
+    parser = ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "-d", "--dir",
+        default=str(Path(__file__).parent.parent / 'test'),
+        help="Directory with JAVA source code to process",
+    )
+    parser.add_argument(
+        "-p", "--passes",
+        type=int,
+        default=10,
+        help="Number of passes over all files",
+    )
+    parser.add_argument(
+        "--max_growth",
+        type=float,
+        default=5,
+        help="Allowed growth of resident memory after the first pass in megabytes",
+    )
+    args = parser.parse_args()
+
+    filepaths = sorted(Path(args.dir).glob('**/*.java'))
+    with ProcessPool(max_workers=1) as pool:
+        memory = pool.schedule(process_files, args=[filepaths, args.passes]).result()
+
+    print(f'Files: {len(filepaths)}, passes: {args.passes}')
+    print(f'{"pass":<6} {"RSS, MB":>10}')
+    for pass_number, pass_memory in enumerate(memory, 1):
+        print(f'{pass_number:<6} {pass_memory / 2 ** 20:>10.1f}')
+
+    growth = (memory[-1] - memory[0]) / 2 ** 20
+    print(f'Growth after the first pass: {growth:.1f} MB')
+    if growth > args.max_growth:
+        sys.exit(f'Resident memory has grown by more than {args.max_growth} MB.')
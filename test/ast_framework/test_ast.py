@@ -3,8 +3,8 @@ from pathlib import Path
 from itertools import zip_longest
 
 from veniq.utils.ast_builder import build_ast
-from veniq.ast_framework import AST, ASTNodeType
-from veniq.ast_framework.ast import MemberReferenceParams, MethodInvocationParams
+from veniq.ast_framework import AST, ASTNodeType, TraverseEvent
+from veniq.ast_framework.ast import MemberReferenceParams, MethodInvocationParams, _dfs_labeled_nodes
 
 
 class ASTTestSuite(TestCase):
@@ -48,9 +48,97 @@ class ASTTestSuite(TestCase):
                                                  ASTTestSuite._expected_method_invocation_params):
             self.assertEqual(ast.get_method_invocation_params(node), expected_params)
 
-    def _build_ast(self, filename: str):
+    def test_compact_backend_parsing(self):
+        ast = self._build_ast("SimpleClass.java", backend="compact")
+        actual_node_types = [node.node_type for node in ast]
+        self.assertEqual(actual_node_types,
+                         ASTTestSuite._java_simple_class_preordered)
+
+    def test_compact_backend_equals_networkx(self):
+        for filename in ["SimpleClass.java", "StaticConstructor.java", "LottieImageAsset.java"]:
+            with self.subTest(filename=filename):
+                networkx_ast = self._build_ast(filename)
+                compact_ast = self._build_ast(filename, backend="compact")
+                self.assertEqual(str(compact_ast), str(networkx_ast))
+                self.assertEqual([node.line for node in compact_ast], [node.line for node in networkx_ast])
+
+    def test_compact_backend_subtrees_selection(self):
+        ast = self._build_ast("SimpleClass.java", backend="compact")
+        subtrees = ast.get_subtrees(ASTNodeType.BASIC_TYPE)
+        for actual_subtree, expected_subtree in \
+                zip_longest(subtrees, ASTTestSuite._java_simple_class_basic_type_subtrees):
+            with self.subTest():
+                self.assertEqual([node.node_index for node in actual_subtree],
+                                 expected_subtree)
+
+    def test_proxy_nodes_selection(self):
+        ast = self._build_ast("LottieImageAsset.java")
+        types = (ASTNodeType.MEMBER_REFERENCE, ASTNodeType.METHOD_INVOCATION, ASTNodeType.STRING)
+        for method_declaration in ast.get_proxy_nodes(ASTNodeType.METHOD_DECLARATION):
+            method_ast = ast.get_subtree(method_declaration)
+            expected_nodes_indexes = sorted(node.node_index for node in method_ast if node.node_type in types)
+            with self.subTest(method=method_declaration.name):
+                self.assertEqual([node.node_index for node in method_ast.get_proxy_nodes(*types)],
+                                 expected_nodes_indexes)
+
+    def test_proxy_nodes_selection_in_nested_subtrees(self):
+        ast = self._build_ast("SimpleClass.java")
+        class_declaration = next(ast.get_subtrees(ASTNodeType.CLASS_DECLARATION))
+        basic_types = [
+            [node.node_index for node in subtree.get_proxy_nodes(ASTNodeType.BASIC_TYPE, ASTNodeType.STRING)]
+            for subtree in class_declaration.get_subtrees(ASTNodeType.BASIC_TYPE)
+        ]
+        self.assertEqual(basic_types, ASTTestSuite._java_simple_class_basic_type_subtrees)
+
+    def test_subtree_is_preorder_interval(self):
+        for backend in ["networkx", "compact"]:
+            ast = self._build_ast("LottieImageAsset.java", backend)
+            for method_declaration in ast.get_proxy_nodes(ASTNodeType.METHOD_DECLARATION):
+                method_ast = ast.get_subtree(method_declaration)
+                nodes_indexes = [node.node_index for node in method_ast]
+                with self.subTest(backend=backend, method=method_declaration.name):
+                    self.assertEqual(nodes_indexes, list(range(nodes_indexes[0], nodes_indexes[-1] + 1)))
+                    self.assertEqual(method_ast.get_root(), method_ast.get_root())
+                    self.assertIsNone(method_ast.get_root().parent)
+                    self.assertEqual(str(method_ast), str(ast.get_subtree(method_ast.get_root())))
+
+    def test_subtree_of_other_node(self):
+        ast = self._build_ast("SimpleClass.java")
+        first_type, second_type = ast.get_subtrees(ASTNodeType.BASIC_TYPE)
+        with self.assertRaises(KeyError):
+            first_type.get_subtree(second_type.get_root())
+
+    def test_walk(self):
+        for backend in ["networkx", "compact"]:
+            ast = self._build_ast("LottieImageAsset.java", backend)
+            events = [
+                (TraverseEvent.ENTERING if edge_type == "forward" else TraverseEvent.LEAVING, node_index)
+                for node_index, edge_type in _dfs_labeled_nodes(ast.tree, ast.root)
+            ]
+            with self.subTest(backend=backend):
+                self.assertEqual(list(ast.walk()), events)
+
+                types = {ASTNodeType.METHOD_DECLARATION, ASTNodeType.MEMBER_REFERENCE}
+                self.assertEqual(
+                    list(ast.walk(*types)),
+                    [(event, node_index) for event, node_index in events
+                     if ast.tree.nodes[node_index]["node_type"] in types],
+                )
+
+                method_declaration = next(ast.get_proxy_nodes(ASTNodeType.METHOD_DECLARATION))
+                method_ast = ast.get_subtree(method_declaration)
+                self.assertEqual(
+                    list(method_ast.walk(ASTNodeType.MEMBER_REFERENCE)),
+                    list(ast.walk(ASTNodeType.MEMBER_REFERENCE, source_node=method_declaration)),
+                )
+
+    def test_unknown_backend(self):
+        with self.assertRaises(ValueError):
+            self._build_ast("SimpleClass.java", backend="unknown")
+
+    def _build_ast(self, filename: str, backend: str = "networkx"):
         javalang_ast = build_ast(str(Path(__file__).parent.absolute() / filename))
-        return AST.build_from_javalang(javalang_ast)
+        return AST.build_from_javalang(javalang_ast, backend)
 
     _java_simple_class_preordered = [
         ASTNodeType.COMPILATION_UNIT,
@@ -1,7 +1,10 @@
+import gc
 from unittest import TestCase
+from weakref import ref
 from pathlib import Path
 
 from veniq.ast_framework import AST, ASTNodeType
+from veniq.ast_framework.computed_fields_registry import computed_fields_registry
 from veniq.utils.ast_builder import build_ast
 
 
@@ -71,6 +74,20 @@ class ASTNodeTestSuite(TestCase):
         except Exception as e:
             self.fail(f"Failed to hash fake node with following exception {e}.")
 
+    def test_fake_nodes_do_not_keep_tree_alive(self):
+        ast = AST.build_from_javalang(
+            build_ast(
+                Path(__file__).absolute().parent / "MethodUseOtherMethodExample.java"
+            )
+        )
+        fake_node = ast.create_fake_node()
+        self.assertEqual(ast.create_fake_node().node_index, -2)
+        tree_reference = ref(ast.tree)
+
+        del ast, fake_node
+        gc.collect()
+        self.assertIsNone(tree_reference())
+
     def test_fake_nodes_equality(self):
         ast1 = AST.build_from_javalang(
             build_ast(
@@ -90,3 +107,53 @@ class ASTNodeTestSuite(TestCase):
 
         self.assertFalse(ast1_fake_node1 == ast1_fake_node2)
         self.assertFalse(ast1_fake_node1 == ast2_fake_node1)
+
+    def test_computed_field_registered_after_access(self):
+        ast = AST.build_from_javalang(
+            build_ast(
+                Path(__file__).absolute().parent / "MethodUseOtherMethodExample.java"
+            )
+        )
+        java_class = ast.get_root().types[0]
+        self.assertFalse(hasattr(java_class, "__dict__"))
+        self.assertEqual(java_class.name, "MethodUseOtherMethod")
+        with self.assertRaises(AttributeError):
+            java_class.name_length
+
+        computed_fields_registry.register(
+            lambda node: len(node.name), "name_length", ASTNodeType.CLASS_DECLARATION
+        )
+        try:
+            self.assertEqual(java_class.name_length, len("MethodUseOtherMethod"))
+        finally:
+            computed_fields_registry._registry[ASTNodeType.CLASS_DECLARATION].pop("name_length")
+            computed_fields_registry.version += 1
+        with self.assertRaises(AttributeError):
+            java_class.name_length
+
+    def test_nodes_of_different_trees(self):
+        ast1 = AST.build_from_javalang(
+            build_ast(
+                Path(__file__).absolute().parent / "MethodUseOtherMethodExample.java"
+            )
+        )
+        ast2 = AST.build_from_javalang(
+            build_ast(
+                Path(__file__).absolute().parent / "MethodUseOtherMethodExample.java"
+            )
+        )
+
+        root1, root2 = ast1.get_root(), ast2.get_root()
+        self.assertEqual(root1, ast1.get_root())
+        self.assertEqual(hash(root1), hash(ast1.get_root()))
+        self.assertNotEqual(root1, root2)
+        self.assertNotEqual(hash(root1), hash(root2))
+        self.assertEqual(len({*ast1, *ast2}), 2 * len(list(ast1)))
+
+    def test_resolved_lines(self):
+        javalang_ast = build_ast(Path(__file__).absolute().parent / "LottieImageAsset.java")
+        for backend in ["networkx", "compact"]:
+            with self.subTest(backend=backend):
+                ast = AST.build_from_javalang(javalang_ast, backend)
+                for node in ast:
+                    self.assertEqual(node.line, node._compute_line())
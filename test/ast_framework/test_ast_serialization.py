@@ -0,0 +1,72 @@
+import gc
+import weakref
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+
+from veniq.ast_framework import AST, ASTNodeType
+from veniq.ast_framework.ast_serialization import save_ast, load_ast
+from veniq.utils.ast_builder import build_ast
+
+
+class ASTSerializationTestCase(TestCase):
+    def test_save_and_load(self):
+        for backend in ["networkx", "compact"]:
+            ast = self._build_ast("LottieImageAsset.java", backend)
+            with self.subTest(backend=backend):
+                loaded_ast = self._save_and_load(ast)
+                self.assertEqual(str(loaded_ast), str(ast))
+                self.assertEqual(
+                    [node.node_index for node in loaded_ast.get_proxy_nodes(ASTNodeType.METHOD_INVOCATION)],
+                    [node.node_index for node in ast.get_proxy_nodes(ASTNodeType.METHOD_INVOCATION)],
+                )
+
+    def test_proxy_nodes_attributes(self):
+        ast = self._build_ast("LottieImageAsset.java")
+        loaded_ast = self._save_and_load(ast)
+        for node, loaded_node in zip(ast.get_proxy_nodes(ASTNodeType.METHOD_DECLARATION),
+                                     loaded_ast.get_proxy_nodes(ASTNodeType.METHOD_DECLARATION)):
+            with self.subTest(method=node.name):
+                self.assertEqual(loaded_node.name, node.name)
+                self.assertEqual(loaded_node.modifiers, node.modifiers)
+                self.assertEqual(loaded_node.line, node.line)
+                self.assertEqual([parameter.name for parameter in loaded_node.parameters],
+                                 [parameter.name for parameter in node.parameters])
+                self.assertEqual(str(loaded_ast.get_subtree(loaded_node)), str(ast.get_subtree(node)))
+
+    def test_save_subtree(self):
+        ast = self._build_ast("SimpleClass.java")
+        method_declaration = next(ast.get_proxy_nodes(ASTNodeType.METHOD_DECLARATION))
+        loaded_ast = self._save_and_load(ast.get_subtree(method_declaration))
+        self.assertEqual(loaded_ast.get_root().node_index, 1)
+        self.assertEqual(loaded_ast.get_root().name, method_declaration.name)
+        self.assertEqual([node.node_type for node in loaded_ast],
+                         [node.node_type for node in ast.get_subtree(method_declaration)])
+
+    def test_mapped_file_lives_as_long_as_tree(self):
+        loaded_ast = self._save_and_load(self._build_ast("SimpleClass.java"))
+        mapped_file = weakref.ref(loaded_ast.tree.graph["mapped_file"])
+        method_ast = loaded_ast.get_subtree(next(loaded_ast.get_proxy_nodes(ASTNodeType.METHOD_DECLARATION)))
+        del loaded_ast
+        gc.collect()
+        self.assertIsNotNone(mapped_file())
+        self.assertEqual(method_ast.get_root().node_type, ASTNodeType.METHOD_DECLARATION)
+        del method_ast
+        gc.collect()
+        self.assertIsNone(mapped_file())
+
+    def test_load_not_serialized_file(self):
+        with self.assertRaises(ValueError):
+            load_ast(Path(__file__).parent / "SimpleClass.java")
+
+    @staticmethod
+    def _save_and_load(ast: AST) -> AST:
+        with TemporaryDirectory() as directory:
+            filename = Path(directory, "ast.bin")
+            save_ast(ast, filename)
+            return load_ast(filename)
+
+    @staticmethod
+    def _build_ast(filename: str, backend: str = "networkx") -> AST:
+        javalang_ast = build_ast(str(Path(__file__).parent.absolute() / filename))
+        return AST.build_from_javalang(javalang_ast, backend)
@@ -3,9 +3,12 @@ from typing import List, Tuple, Union
 from pathlib import Path
 from unittest import TestCase
 
+from networkx import dfs_labeled_edges
+
 from veniq.ast_framework.block_statement_graph import build_block_statement_graph, Block, Statement
-from veniq.ast_framework.block_statement_graph.constants import BlockReason
-from veniq.ast_framework import AST, ASTNode, ASTNodeType
+from veniq.ast_framework.block_statement_graph.constants import BlockReason, NodeType
+from veniq.ast_framework.block_statement_graph._nodes_factory import NodesFactory
+from veniq.ast_framework import AST, ASTNode, ASTNodeType, TraverseEvent
 from veniq.utils.ast_builder import build_ast
 
 
@@ -317,6 +320,45 @@ class BlockStatementTestCase(TestCase):
 
         return filename, class_name, class_declaration, ast
 
+    def test_walk(self):
+        block_statement_graph = self._get_block_statement_graph_from_method("complexExample1")
+        graph = block_statement_graph._graph
+        events = [
+            (
+                TraverseEvent.ENTERING if edge_type == "forward" else TraverseEvent.LEAVING,
+                NodesFactory._detect_and_create_node(graph, node_id),
+            )
+            for _, node_id, edge_type in dfs_labeled_edges(graph, 0)
+        ]
+        self.assertEqual(list(block_statement_graph.walk()), events)
+        self.assertEqual(
+            list(block_statement_graph.walk(NodeType.Statement)),
+            [(event, node) for event, node in events if isinstance(node, Statement)],
+        )
+        self.assertEqual(list(block_statement_graph.walk(NodeType.Statement, NodeType.Block)), events)
+
+    def test_walk_of_nested_node_with_filter(self):
+        block_statement_graph = self._get_block_statement_graph_from_method("complexExample1")
+        graph = block_statement_graph._graph
+        nested_statement_id = next(
+            node_id
+            for node_id in graph.nodes
+            if node_id != 0
+            and NodesFactory._detect_node_type(graph, node_id) == NodeType.Statement
+            and graph.out_degree(node_id) > 0
+        )
+        nested_statement = NodesFactory.create_statement_node(graph, nested_statement_id)
+        blocks_events = [
+            (
+                TraverseEvent.ENTERING if edge_type == "forward" else TraverseEvent.LEAVING,
+                NodesFactory._detect_and_create_node(graph, node_id),
+            )
+            for _, node_id, edge_type in dfs_labeled_edges(graph, nested_statement_id)
+            if NodesFactory._detect_node_type(graph, node_id) == NodeType.Block
+        ]
+        self.assertNotEqual(blocks_events, [])
+        self.assertEqual(list(nested_statement.walk(NodeType.Block)), blocks_events)
+
     def _get_block_statement_graph_from_method(self, method_name: str) -> Statement:
         filename, class_name, class_declaration, ast = self._get_class_declaration()
 
@@ -7,6 +7,7 @@ from veniq.baselines.semi._common_types import Statement, StatementSemantic
 from veniq.baselines.semi.rank_extraction_opportunities import (
     ExtractionOpportunityGroupSettings,
     ExtractionOpportunityGroup,
+    rank_extraction_opportunities,
 )
 from veniq.ast_framework import ASTNode
 
@@ -43,6 +44,25 @@ class ExtractionOpportunitiesRanking(TestCase):
         extraction_opportunity_group.add_extraction_opportunity(extraction_opportunity2)
         self.assertEqual(extraction_opportunity_group.benefit, 1)
 
+    def test_top_k_ranking(self):
+        statements_semantic = self._create_statements_semantic("x", "y", "x", "z", "y", "z", "x")
+        statements = list(statements_semantic.keys())
+        extraction_opportunities = [
+            tuple(statements[first:last])
+            for first in range(len(statements))
+            for last in range(first + 1, len(statements) + 1)
+        ]
+
+        all_groups = rank_extraction_opportunities(statements_semantic, extraction_opportunities)
+        for top_k in range(len(all_groups) + 2):
+            top_groups = rank_extraction_opportunities(statements_semantic, extraction_opportunities, top_k)
+            self.assertEqual(
+                [(group.benefit, list(group.opportunities)) for group in top_groups],
+                [(group.benefit, list(group.opportunities)) for group in all_groups[:top_k]],
+            )
+        with self.assertRaises(ValueError):
+            rank_extraction_opportunities(statements_semantic, extraction_opportunities, -1)
+
     @staticmethod
     def _create_statements_semantic(
         *used_object_name: Union[str, Set[str]]
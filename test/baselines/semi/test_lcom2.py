@@ -4,7 +4,7 @@ from unittest import TestCase
 from networkx import DiGraph
 
 from veniq.baselines.semi._common_types import Statement, StatementSemantic
-from veniq.baselines.semi._lcom2 import LCOM2
+from veniq.baselines.semi._lcom2 import LCOM2, StatementsSimilarity
 
 from veniq.ast_framework import ASTNode
 
@@ -22,6 +22,50 @@ class LCOM2TestCase(TestCase):
         statements_semantic = self._create_statements_semantic("x", {"x", "y"}, {"x", "z"}, {"x", "a"})
         self.assertEqual(LCOM2(statements_semantic), 0)
 
+    def test_subset_of_statements(self):
+        statements_semantic = self._create_statements_semantic("x", "y", {"x", "y"}, "z", "x.a")
+        similarity = StatementsSimilarity(statements_semantic)
+        statements = list(statements_semantic)
+        for subset in [statements, statements[:2], statements[1:4], [statements[0], statements[4]], []]:
+            with self.subTest(subset=[statement.node_index for statement in subset]):
+                self.assertEqual(
+                    similarity.LCOM2(subset),
+                    LCOM2({statement: statements_semantic[statement] for statement in subset}),
+                )
+
+    def test_opportunity_and_rest(self):
+        graph = DiGraph()
+        used_objects = ["x", "y", "x", "z", "y", "x", "a"]
+        # negative indexes correspond to fake statements
+        statements_semantic = {
+            ASTNode(graph, node_index): StatementSemantic(used_objects={object_name})
+            for node_index, object_name in zip([0, 1, -1, 2, 3, -2, 4], used_objects)
+        }
+        similarity = StatementsSimilarity(statements_semantic)
+        statements = list(statements_semantic)
+        not_fake_statements = [statement for statement in statements if not statement.is_fake]
+        opportunities = [
+            tuple(not_fake_statements[first:last])
+            for first in range(len(not_fake_statements))
+            for last in range(first + 1, len(not_fake_statements) + 1)
+        ] + [(statements[0], statements[3]), (statements[2],), (statements[1], statements[2], statements[3])]
+
+        for opportunity in opportunities:
+            with self.subTest(opportunity=[statement.node_index for statement in opportunity]):
+                rest = [statement for statement in statements if statement not in opportunity]
+                self.assertEqual(
+                    similarity.opportunity_and_rest_LCOM2(opportunity),
+                    (similarity.LCOM2(opportunity), similarity.LCOM2(rest)),
+                )
+
+    def test_objects_and_methods_are_not_similar(self):
+        graph = DiGraph()
+        statements_semantic = {
+            ASTNode(graph, 0): StatementSemantic(used_objects={"x"}),
+            ASTNode(graph, 1): StatementSemantic(used_methods={"x"}),
+        }
+        self.assertEqual(LCOM2(statements_semantic), 1)
+
     @staticmethod
     def _create_statements_semantic(
         *used_object_name: Union[str, Set[str]]
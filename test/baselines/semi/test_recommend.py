@@ -8,7 +8,7 @@ from veniq.utils.ast_builder import build_ast
 from veniq.ast_framework import AST
 from veniq.baselines.semi.recommend import _add_class_decl_wrap,\
     _convert_ExtractionOpportunity_to_EMO, _get_method_subtree,\
-    recommend_for_method
+    recommend_for_method, recommend_for_methods
 from test.baselines.semi.utils import create_extraction_opportunity
 
 
@@ -131,3 +131,12 @@ class TestRecommend(TestCase):
 
         with self.assertRaises(JavaSyntaxError):
             recommend_for_method(self._method[:-1])
+
+    def test_recommend_for_methods(self):
+        methods = [self._method, self._method[1:], self._method_2, self._method[:-1], self._method]
+        expected_results = [recommend_for_method(self._method), None, recommend_for_method(self._method_2),
+                            None, recommend_for_method(self._method)]
+        for processes in [1, 2]:
+            with self.subTest(processes=processes):
+                results = list(recommend_for_methods(iter(methods), processes=processes, batch_size=2))
+                self.assertEqual(results, expected_results)
@@ -0,0 +1,77 @@
+from io import StringIO
+import json
+from unittest import TestCase
+
+from veniq.baselines.semi.recommend import recommend_for_method
+from veniq.baselines.semi.recommendation_server import RecommendationServer
+
+
+class TestRecommendationServer(TestCase):
+    _method = ["public int method() {",
+               "int x = 0;",
+               "x = x + 1;",
+               "int y = x + 2;",
+               "return y;",
+               "}"]
+
+    def test_serve(self):
+        requests = [
+            {'id': 1, 'method': self._method},
+            {'id': 'text', 'method': '\n'.join(self._method), 'timeout': 60},
+            {'id': 3, 'method': ['public int method() {', 'int x = ', '}']},
+            {'id': 4},
+        ]
+        input_stream = StringIO('\n'.join(json.dumps(request) for request in requests) + '\n\nnot json\n')
+        output_stream = StringIO()
+
+        server = RecommendationServer(workers=1, max_pending_requests=2)
+        server.serve(input_stream, output_stream)
+
+        responses = [json.loads(line) for line in output_stream.getvalue().splitlines()]
+        self.assertEqual(len(responses), 5)
+        responses_by_id = {response['id']: response for response in responses}
+
+        expected_emos = [list(emo) for emo in recommend_for_method(self._method)]
+        self.assertEqual(responses_by_id[1], {'id': 1, 'emos': expected_emos})
+        self.assertEqual(responses_by_id['text'], {'id': 'text', 'emos': expected_emos})
+        self.assertIn('error', responses_by_id[3])
+        self.assertIn('error', responses_by_id[4])
+        self.assertIn('error', responses_by_id[None])
+
+    def test_deadline_exceeded(self):
+        requests = [
+            {'id': 1, 'method': self._method, 'timeout': 1e-9},
+            {'id': 2, 'method': self._method, 'timeout': 60},
+        ]
+        input_stream = StringIO('\n'.join(json.dumps(request) for request in requests) + '\n')
+        output_stream = StringIO()
+
+        server = RecommendationServer(workers=1, max_pending_requests=1)
+        server.serve(input_stream, output_stream)
+
+        responses = [json.loads(line) for line in output_stream.getvalue().splitlines()]
+        self.assertEqual(responses[0], {'id': 1, 'error': 'Deadline exceeded'})
+        self.assertEqual(responses[1]['id'], 2)
+        self.assertIn('emos', responses[1])
+
+    def test_invalid_timeout(self):
+        requests = [
+            {'id': 1, 'method': self._method, 'timeout': '5'},
+            {'id': 2, 'method': self._method, 'timeout': -1},
+            {'id': 3, 'method': self._method, 'timeout': True},
+            {'id': 4, 'method': self._method, 'timeout': None},
+        ]
+        input_stream = StringIO('\n'.join(json.dumps(request) for request in requests) + '\n')
+        output_stream = StringIO()
+
+        server = RecommendationServer(workers=1, max_pending_requests=1)
+        server.serve(input_stream, output_stream)
+
+        responses = {
+            response['id']: response
+            for response in map(json.loads, output_stream.getvalue().splitlines())
+        }
+        self.assertEqual(len(responses), 4)
+        for request_id in [1, 2, 3]:
+            self.assertTrue(responses[request_id]['error'].startswith('Invalid request'))
+        self.assertEqual(responses[4], {'id': 4, 'emos': [list(emo) for emo in recommend_for_method(self._method)]})
@@ -0,0 +1,39 @@
+import pickle
+from unittest import TestCase
+
+from veniq.baselines.semi._common_types import StatementSemantic
+
+
+class StatementSemanticTestCase(TestCase):
+    def test_derived_names(self):
+        semantic = StatementSemantic(used_objects={"a.b.c", "x"})
+        self.assertEqual(semantic.used_objects_unwrapped, {"a", "a.b", "a.b.c", "x"})
+        self.assertEqual(semantic.used_based_objects, {"a", "x"})
+
+    def test_similarity_with_shared_names_ids(self):
+        names_ids = {}
+        semantics = [
+            StatementSemantic({"a.b"}, set(), names_ids),
+            StatementSemantic({"a"}, set(), names_ids),
+            StatementSemantic({"b"}, {"a"}, names_ids),
+            StatementSemantic(set(), {"a"}, names_ids),
+        ]
+        for semantic1 in semantics:
+            for semantic2 in semantics:
+                with self.subTest(semantic1=semantic1, semantic2=semantic2):
+                    self.assertEqual(
+                        semantic1.is_similar(semantic2),
+                        StatementSemantic(semantic1.used_objects, semantic1.used_methods).is_similar(semantic2),
+                    )
+        self.assertTrue(semantics[0].is_similar(semantics[1]))
+        self.assertFalse(semantics[1].is_similar(semantics[2]))
+        self.assertTrue(semantics[2].is_similar(semantics[3]))
+
+    def test_immutability(self):
+        semantic = StatementSemantic(used_objects={"x"})
+        with self.assertRaises(AttributeError):
+            semantic.used_objects = frozenset()
+
+    def test_pickling(self):
+        semantic = StatementSemantic({"x.y"}, {"f"}, {})
+        self.assertEqual(pickle.loads(pickle.dumps(semantic)), semantic)
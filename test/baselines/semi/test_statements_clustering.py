@@ -42,6 +42,20 @@ class ExtractionOpportunitiesCreationTestCase(TestCase):
         expected_statement_indexes = [[0], [1], [2]]
         self.assertEqual(expected_statement_indexes, actual_statements_indexes)
 
+    def test_fake_statements_are_skipped(self):
+        stub_graph = DiGraph()
+        # negative indexes correspond to fake statements, which end blocks
+        statements_semantic = {
+            ASTNode(stub_graph, 0): StatementSemantic(used_objects={"x"}),
+            ASTNode(stub_graph, -1): StatementSemantic(),
+            ASTNode(stub_graph, 1): StatementSemantic(used_objects={"x"}),
+            ASTNode(stub_graph, -2): StatementSemantic(),
+        }
+
+        actual_statements_indexes = self._get_opportunity_nodes_indexes(statements_semantic)
+        expected_statement_indexes = [[0], [1], [0, 1]]
+        self.assertEqual(expected_statement_indexes, actual_statements_indexes)
+
     @staticmethod
     def _get_opportunity_nodes_indexes(
         statements_semantic: Dict[ASTNode, StatementSemantic]
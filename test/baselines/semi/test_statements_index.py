@@ -0,0 +1,94 @@
+from itertools import chain
+from pathlib import Path
+from typing import List
+from unittest import TestCase
+
+from veniq.ast_framework import AST, ASTNodeType, TraverseEvent
+from veniq.ast_framework.block_statement_graph import build_block_statement_graph
+from veniq.ast_framework.block_statement_graph.constants import NodeType
+from veniq.baselines.semi._semantic_filter import semantic_filter
+from veniq.baselines.semi._statements_index import StatementsIndex
+from veniq.baselines.semi._syntactic_filter import syntactic_filter
+from veniq.baselines.semi.create_extraction_opportunities import create_extraction_opportunities
+from veniq.baselines.semi.extract_semantic import extract_method_statements_semantic
+from veniq.utils.ast_builder import build_ast
+from .utils import get_method_ast, create_extraction_opportunity
+
+
+class StatementsIndexTestCase(TestCase):
+    def test_syntactic_filtering(self):
+        for statements_lines, is_opportunity_correct in [
+            ([9, 15], False),
+            ([8, 9, 11, 12], False),
+            ([3, 19, 20, 21, 22], False),
+            ([11, 15], False),
+            ([6, 7, 8, 9, 11, 12, 15], True),
+            ([5, 6, 7, 8, 9, 11, 12, 15, 19, 20, 21, 22], True),
+        ]:
+            with self.subTest(lines=statements_lines):
+                method_ast = get_method_ast("SyntacticFilterTest.java", "Test", "testMethod")
+                extraction_opportunity, block_statement_graph = create_extraction_opportunity(
+                    method_ast, statements_lines
+                )
+                statements_index = StatementsIndex(
+                    block_statement_graph, extract_method_statements_semantic(method_ast)
+                )
+                self.assertEqual(
+                    statements_index.is_syntactically_extractable(extraction_opportunity), is_opportunity_correct
+                )
+
+    def test_semantic_filtering(self):
+        for method_name, statements_lines, is_opportunity_correct in [
+            ("noLocalVariablesMethod", [3, 4, 5], True),
+            ("localUnusedVariables", [11, 12], True),
+            ("localUsedVariable", [17, 18], True),
+            ("twoUsedVariables", [23], False),
+            ("extractBreak", [29], False),
+            ("extractBreak", [28, 29], True),
+            ("deepNestedBreak", [36, 37], True),
+            ("tryStatement", [44], True),
+        ]:
+            with self.subTest(method=method_name, lines=statements_lines):
+                self._semantic_filtering_test_helper(method_name, statements_lines, is_opportunity_correct)
+
+    def test_same_verdicts_as_filters(self):
+        # syntactic_filter and semantic_filter are kept as a reference implementation
+        for filepath in sorted(Path(__file__).absolute().parent.glob("*.java")):
+            ast = AST.build_from_javalang(build_ast(str(filepath)))
+            for method_declaration in ast.get_proxy_nodes(ASTNodeType.METHOD_DECLARATION):
+                method_ast = ast.get_subtree(method_declaration)
+                statements_semantic = extract_method_statements_semantic(method_ast)
+                block_statement_graph = build_block_statement_graph(method_ast)
+                statements_index = StatementsIndex(block_statement_graph, statements_semantic)
+
+                # all ranges of statements in preorder and opportunities created from semantic
+                statements = [
+                    statement.node for event, statement in block_statement_graph.walk(NodeType.Statement)
+                    if event == TraverseEvent.ENTERING
+                ]
+                ranges = (
+                    tuple(statements[first:last])
+                    for first in range(len(statements)) for last in range(first + 1, len(statements) + 1)
+                )
+                for opportunity in chain(ranges, create_extraction_opportunities(statements_semantic)):
+                    with self.subTest(file=filepath.name, method=method_declaration.name, opportunity=opportunity):
+                        is_syntactically_extractable = syntactic_filter(opportunity, block_statement_graph)
+                        self.assertEqual(
+                            statements_index.is_syntactically_extractable(opportunity), is_syntactically_extractable
+                        )
+                        if is_syntactically_extractable:
+                            self.assertEqual(
+                                statements_index.is_semantically_extractable(opportunity),
+                                semantic_filter(opportunity, statements_semantic, block_statement_graph),
+                            )
+
+    def _semantic_filtering_test_helper(
+        self, method_name: str, statements_lines: List[int], is_opportunity_correct: bool
+    ):
+        method_ast = get_method_ast("SemanticFilterTest.java", "Test", method_name)
+        extraction_opportunity, block_statement_graph = create_extraction_opportunity(method_ast, statements_lines)
+        statements_index = StatementsIndex(block_statement_graph, extract_method_statements_semantic(method_ast))
+        self.assertTrue(statements_index.is_syntactically_extractable(extraction_opportunity))
+        self.assertEqual(
+            statements_index.is_semantically_extractable(extraction_opportunity), is_opportunity_correct
+        )
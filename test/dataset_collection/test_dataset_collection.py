@@ -1,11 +1,22 @@
+import os
 import unittest
 from pathlib import Path
+from tempfile import TemporaryDirectory
 from unittest import TestCase
 
+import pandas as pd
+
 from veniq.dataset_collection.augmentation import (
     determine_algorithm_insertion_type,
     method_body_lines,
-    is_match_to_the_conditions)
+    is_match_to_the_conditions,
+    find_java_files_without_tests,
+    parse_shard,
+    is_in_shard,
+    get_relative_input_path,
+    get_shard_folder,
+    merge_shards)
+from veniq.dataset_collection.results_writer import ResultsWriter
 from veniq.ast_framework import AST, ASTNodeType
 from veniq.dataset_collection.types_identifier import (
     InlineTypesAlgorithms,
@@ -340,6 +351,19 @@ class TestDatasetCollection(TestCase):
         self.assertEqual([30, 34], pred_inline_rel_bounds,
                          msg='Wrong inline bounds: {}'.format(pred_inline_rel_bounds))
 
+    def test_inline_lines_in_memory(self):
+        filepath = self.current_directory / 'InlineExamples' / 'Parameters.java'
+        test_filepath = self.current_directory / 'InlineTestExamples' / 'Parameters_without_return.java'
+        algorithm_type = InlineTypesAlgorithms.WITH_RETURN_WITHOUT_ARGUMENTS
+        algorithm_for_inlining = AlgorithmFactory().create_obj(algorithm_type)
+        body_start_line, body_end_line = self._get_lines(filepath, 'btSelectMethod')
+        with open(filepath, encoding='utf-8') as f:
+            lines = f.readlines()
+        inlined = algorithm_for_inlining().inline_lines(lines, 111, body_start_line, body_end_line)
+        self.assertIsNotNone(inlined)
+        with open(test_filepath, encoding='utf-8') as test_ex:
+            self.assertMultiLineEqual(''.join(inlined[0]), test_ex.read(), 'File are not matched')
+
     def test_inline_with_return_without_assigning(self):
         filepath = self.current_directory / 'InlineExamples' / 'Parameters.java'
         test_filepath = self.current_directory / 'InlineTestExamples' / 'Parameters_without_return.java'
@@ -394,3 +418,46 @@ class TestDatasetCollection(TestCase):
         with open(self.temp_filename, encoding='utf-8') as actual_file, \
                 open(test_filepath, encoding='utf-8') as test_ex:
             self.assertMultiLineEqual(actual_file.read(), test_ex.read(), 'File are not matched')
+
+    def test_shards_partition_files(self):
+        self.assertEqual(parse_shard('1/3'), (1, 3))
+        for wrong_shard in ['3/3', '-1/3', '1', 'a/b']:
+            with self.assertRaises(ValueError):
+                parse_shard(wrong_shard)
+
+        files = find_java_files_without_tests(self.current_directory)
+        self.assertTrue(files)
+        self.assertFalse(any('Test' in file.name for file in files))
+        for file in files:
+            relative_path = file.relative_to(self.current_directory)
+            shards = [shard_index for shard_index in range(3) if is_in_shard(relative_path, shard_index, 3)]
+            self.assertEqual(len(shards), 1)
+
+    def test_relative_input_path_does_not_depend_on_mount_point(self):
+        relative_directory = Path(os.path.relpath(self.current_directory))
+        for file in find_java_files_without_tests(self.current_directory):
+            relative_file = relative_directory / file.relative_to(self.current_directory)
+            self.assertEqual(
+                get_relative_input_path(file, self.current_directory),
+                get_relative_input_path(relative_file, relative_directory),
+            )
+        self.assertEqual(
+            get_relative_input_path(self.current_directory / 'a' / 'B.java', self.current_directory), 'a/B.java'
+        )
+
+    def test_merge_shards(self):
+        with TemporaryDirectory() as directory:
+            dataset_folder = Path(directory)
+            with ResultsWriter(get_shard_folder(dataset_folder, 0, 2)) as writer:
+                writer.write('B.java', [{'input_filename': 'B.java', 'method': 'b'}])
+            with ResultsWriter(get_shard_folder(dataset_folder, 1, 2)) as writer:
+                writer.write('A.java', [{'input_filename': 'A.java', 'method': 'a'}])
+                writer.write('C.java', [{'input_filename': 'C.java', 'method': 'c'}])
+
+            merge_shards(dataset_folder, dataset_folder / 'out.csv', ['input_filename', 'method'])
+            merged = pd.read_csv(dataset_folder / 'out.csv', index_col=0)
+            self.assertEqual(list(merged['method']), ['a', 'b', 'c'])
+
+            get_shard_folder(dataset_folder, 2, 4).mkdir()
+            with self.assertRaises(ValueError):
+                merge_shards(dataset_folder, dataset_folder / 'out.csv', ['input_filename', 'method'])
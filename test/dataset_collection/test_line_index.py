@@ -0,0 +1,35 @@
+from unittest import TestCase
+
+from veniq.dataset_collection.line_index import LineIndex
+
+
+class TestLineIndex(TestCase):
+    lines = [
+        'class A {\n',
+        '    void f()\n',
+        '    {\n',
+        '        g(); // }\n',
+        '        if (x) { g(); }\n',
+        '    }\n',
+        '    /*\n',
+        '    */\n',
+        '    void h() {\n',
+        '    }\n',
+        '}\n',
+    ]
+
+    def test_first_line_with_open_bracket(self):
+        index = LineIndex(self.lines)
+        self.assertEqual(index.first_line_with_open_bracket(3), 3)
+        self.assertEqual(index.first_line_with_open_bracket(10), 9)
+        self.assertEqual(index.first_line_with_open_bracket(12), 13)
+
+    def test_last_line(self):
+        index = LineIndex(self.lines)
+        self.assertEqual(index.last_line(3), 6)
+        self.assertEqual(index.last_line(9), 10)
+        self.assertEqual(index.last_line(1), -1)
+
+    def test_last_line_before_comment_end(self):
+        index = LineIndex(['{\n', '}\n', '*/\n', 'x\n'])
+        self.assertEqual(index.last_line(1), 4)
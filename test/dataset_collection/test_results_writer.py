@@ -0,0 +1,89 @@
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+
+import pandas as pd
+
+from veniq.dataset_collection.results_writer import ResultsWriter
+
+
+class TestResultsWriter(TestCase):
+    columns = ['input_filename', 'method_name', 'line']
+
+    def test_merge(self):
+        with TemporaryDirectory() as directory:
+            with ResultsWriter(Path(directory)) as writer:
+                writer.write('A.java', [self._row('A.java', 'a', 1), self._row('A.java', 'b', 2)])
+                writer.write('B.java', [])
+                writer.write('C.java', [self._row('C.java', 'c', 3)])
+                writer.merge_to_csv(Path(directory, 'out.csv'), self.columns)
+
+            merged = pd.read_csv(Path(directory, 'out.csv'), index_col=0)
+            self.assertEqual(list(merged.columns), self.columns)
+            self.assertEqual(list(merged['method_name']), ['a', 'b', 'c'])
+
+    def test_resume(self):
+        with TemporaryDirectory() as directory:
+            with ResultsWriter(Path(directory)) as writer:
+                writer.write('A.java', [self._row('A.java', 'a', 1)])
+                writer.write('B.java', [self._row('B.java', 'b', 2)])
+            # simulate interruption after results of a file are saved, but before it is recorded to manifest
+            with open(Path(directory, 'manifest.txt'), 'w') as manifest:
+                manifest.write('A.java\n')
+
+            with ResultsWriter(Path(directory), resume=True) as writer:
+                self.assertEqual(writer.completed_inputs, {'A.java'})
+                self.assertEqual(list(writer.read_rows(only_completed=True)), [self._row('A.java', 'a', 1)])
+                writer.write('B.java', [self._row('B.java', 'b', 3)])
+                rows = list(writer.read_rows())
+
+            self.assertEqual(rows, [self._row('A.java', 'a', 1), self._row('B.java', 'b', 3)])
+
+    def test_incomplete_line_is_skipped(self):
+        with TemporaryDirectory() as directory:
+            with ResultsWriter(Path(directory)) as writer:
+                writer.write('A.java', [self._row('A.java', 'a', 1)])
+            with open(next(Path(directory, 'shards').iterdir()), 'a') as shard:
+                shard.write('{"input_filename": "B.ja')
+
+            with ResultsWriter(Path(directory), resume=True) as writer:
+                self.assertEqual(list(writer.read_rows()), [self._row('A.java', 'a', 1)])
+
+    def test_resume_after_incomplete_manifest_line(self):
+        with TemporaryDirectory() as directory:
+            with ResultsWriter(Path(directory)) as writer:
+                writer.write('A.java', [self._row('A.java', 'a', 1)])
+            with open(Path(directory, 'manifest.txt'), 'a') as manifest:
+                manifest.write('B.ja')
+
+            with ResultsWriter(Path(directory), resume=True) as writer:
+                self.assertEqual(writer.completed_inputs, {'A.java'})
+                writer.write('B.java', [self._row('B.java', 'b', 2)])
+
+            with ResultsWriter(Path(directory), resume=True) as writer:
+                self.assertEqual(writer.completed_inputs, {'A.java', 'B.java'})
+                self.assertEqual(
+                    list(writer.read_rows()), [self._row('A.java', 'a', 1), self._row('B.java', 'b', 2)]
+                )
+
+    def test_start_from_scratch(self):
+        with TemporaryDirectory() as directory:
+            with ResultsWriter(Path(directory)) as writer:
+                writer.write('A.java', [self._row('A.java', 'a', 1)])
+
+            with ResultsWriter(Path(directory)) as writer:
+                self.assertEqual(writer.completed_inputs, set())
+                self.assertEqual(list(writer.read_rows()), [])
+
+    def test_periodic_sync(self):
+        with TemporaryDirectory() as directory:
+            with ResultsWriter(Path(directory), fsync_period=2) as writer:
+                writer.write('A.java', [self._row('A.java', 'a', 1)])
+                self.assertEqual(writer._not_synced_inputs_qty, 1)
+                writer.write('B.java', [self._row('B.java', 'b', 2)])
+                self.assertEqual(writer._not_synced_inputs_qty, 0)
+                self.assertEqual(len(list(writer.read_rows())), 2)
+
+    @staticmethod
+    def _row(input_filename: str, method_name: str, line: int):
+        return {'input_filename': input_filename, 'method_name': method_name, 'line': line}
@@ -0,0 +1,82 @@
+import os
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+
+from javalang.parse import parse
+
+from veniq.ast_framework import AST, ASTNodeType
+from veniq.utils.ast_builder import build_ast
+from veniq.utils.ast_cache import ASTCache
+
+
+class ASTCacheTestCase(TestCase):
+    dir_path = Path(os.path.realpath(__file__)).parent
+
+    def test_cached_ast_equals_parsed(self):
+        filename = self.dir_path / 'SimpleClass.java'
+        expected_ast = AST.build_from_javalang(build_ast(str(filename)))
+        for backend in ['networkx', 'compact']:
+            with TemporaryDirectory() as directory, self.subTest(backend=backend):
+                cache = ASTCache(directory, backend=backend)
+                parsed_ast = cache.build_ast(filename)
+                cached_ast = cache.build_ast(filename)
+                self.assertEqual(str(parsed_ast), str(expected_ast))
+                self.assertEqual(str(cached_ast), str(expected_ast))
+                self.assertEqual(len(list(Path(directory).iterdir())), 1)
+                method_declaration = next(cached_ast.get_proxy_nodes(ASTNodeType.METHOD_DECLARATION))
+                self.assertEqual(str(cached_ast.get_subtree(method_declaration)),
+                                 str(parsed_ast.get_subtree(method_declaration)))
+
+    def test_eviction_of_least_recently_used(self):
+        with TemporaryDirectory() as directory:
+            cache = ASTCache(directory)
+            first_text, second_text, third_text = (f'class A{i} {{}}' for i in range(3))
+            cache.build_ast_from_text(first_text)
+            entry_size = sum(entry.stat().st_size for entry in Path(directory).iterdir())
+
+            cache = ASTCache(directory, max_size=int(2.5 * entry_size))
+            cache.build_ast_from_text(second_text)
+            self._make_older(Path(directory), seconds=10)
+            cache.build_ast_from_text(first_text)
+            cache.build_ast_from_text(third_text)
+
+            cached_entries = {entry.name for entry in Path(directory).iterdir()}
+            self.assertEqual(len(cached_entries), 2)
+            self.assertNotIn(cache._get_entry_path(cache._calculate_key(second_text)).name, cached_entries)
+
+    def test_incompatible_entry_is_replaced(self):
+        with TemporaryDirectory() as directory:
+            cache = ASTCache(directory)
+            text = 'class A {}'
+            entry_path = cache._get_entry_path(cache._calculate_key(text))
+            # entry referencing a class, which does not exist anymore
+            entry_path.write_bytes(b'cveniq.nonexistent_module\nAST\n.')
+
+            ast = cache.build_ast_from_text(text)
+            self.assertEqual(str(ast), str(AST.build_from_javalang(parse(text))))
+            self.assertEqual(str(cache.build_ast_from_text(text)), str(ast))
+
+    def test_size_of_replaced_entries(self):
+        with TemporaryDirectory() as directory:
+            cache = ASTCache(directory)
+            text = 'class A {}'
+            key = cache._calculate_key(text)
+            entry_path = cache._get_entry_path(key)
+            entry_path.write_bytes(b'cveniq.nonexistent_module\nAST\n.')
+            self.assertEqual(cache._get_size(), entry_path.stat().st_size)
+
+            ast = cache.build_ast_from_text(text)
+            self.assertEqual(cache._get_size(), entry_path.stat().st_size)
+            cache._store(key, ast)
+            self.assertEqual(cache._get_size(), entry_path.stat().st_size)
+
+    def test_invalid_size(self):
+        with TemporaryDirectory() as directory, self.assertRaises(ValueError):
+            ASTCache(directory, max_size=0)
+
+    @staticmethod
+    def _make_older(directory: Path, seconds: int) -> None:
+        for entry in directory.iterdir():
+            entry_stat = entry.stat()
+            os.utime(entry, (entry_stat.st_atime - seconds, entry_stat.st_mtime - seconds))
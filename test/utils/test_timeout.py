@@ -0,0 +1,60 @@
+import os
+import time
+from threading import Thread
+from unittest import TestCase
+from pathlib import Path
+
+from veniq.ast_framework import AST, ASTNodeType
+from veniq.dataset_collection.validation import find_extraction_opportunities
+from veniq.utils.ast_builder import build_ast
+from veniq.utils.timeout import Deadline, TerminateExecution, invoke_with_timeout
+
+
+class TestTimeout(TestCase):
+    dir_path = Path(os.path.realpath(__file__)).parent
+
+    def test_deadline(self):
+        unlimited_deadline = Deadline(None)
+        self.assertFalse(unlimited_deadline.is_expired)
+        self.assertIsNone(unlimited_deadline.remaining)
+        unlimited_deadline.check()
+
+        long_deadline = Deadline(60)
+        self.assertFalse(long_deadline.is_expired)
+        self.assertGreater(long_deadline.remaining, 0)
+        long_deadline.check()
+
+        expired_deadline = Deadline(0)
+        self.assertTrue(expired_deadline.is_expired)
+        self.assertEqual(expired_deadline.remaining, 0)
+        with self.assertRaises(TerminateExecution):
+            expired_deadline.check()
+
+    def test_expired_deadline_stops_semi(self):
+        ast = AST.build_from_javalang(build_ast(str(Path(self.dir_path, 'SimpleClass.java'))))
+        method_declaration = next(ast.get_proxy_nodes(ASTNodeType.METHOD_DECLARATION))
+        method_ast = ast.get_subtree(method_declaration)
+
+        find_extraction_opportunities(method_ast, Deadline(60))
+        with self.assertRaises(TerminateExecution):
+            find_extraction_opportunities(method_ast, Deadline(0))
+
+    def test_invoke_with_timeout(self):
+        self.assertEqual(invoke_with_timeout(5, sum, [1, 2]), 3)
+        with self.assertRaises(TerminateExecution):
+            invoke_with_timeout(0.1, time.sleep, 5)
+        with self.assertRaises(ValueError):
+            invoke_with_timeout(0, sum, [1, 2])
+
+        errors = []
+        thread = Thread(target=lambda: self._catch_error(errors, invoke_with_timeout, 5, sum, [1, 2]))
+        thread.start()
+        thread.join()
+        self.assertEqual([type(error) for error in errors], [RuntimeError])
+
+    @staticmethod
+    def _catch_error(errors, fn, *args):
+        try:
+            fn(*args)
+        except Exception as e:
+            errors.append(e)
@@ -1,9 +1,12 @@
 from pathlib import Path
+from tempfile import TemporaryDirectory
 from unittest import TestCase
 
+import pandas as pd
+
 from veniq.utils.timeout import invoke_with_timeout
 from veniq.dataset_collection.validation import fix_start_end_lines_for_opportunity, \
-    percent_matched
+    percent_matched, validate_file, validate_row, ValidationStats
 
 
 class TestValidation(TestCase):
@@ -105,3 +108,66 @@ class TestValidation(TestCase):
             file
         )
         self.assertEqual((35, 46), fixed_lines)
+
+    def test_validate_file(self):
+        rows = pd.DataFrame([
+            {
+                'output_filename': 'User.java',
+                'input_filename': 'User.java',
+                'class_name': 'User',
+                'method_where_invocation_occurred': method_name,
+                'inline_insertion_line_start': 17,
+                'inline_insertion_line_end': 19,
+            }
+            for method_name in ['createWithLoggedInstantiationTime', 'createWithDefaultCountry']
+        ])
+        results = validate_file(self.folder, rows)
+        expected_results = [result for row in rows.iterrows() for result in validate_row(self.folder, row)]
+        self.assertEqual(len(results), 2)
+        self.assertEqual(results, expected_results)
+        self.assertEqual(results[0].method_name, 'createWithLoggedInstantiationTime')
+
+    def test_validate_unparsable_file(self):
+        with TemporaryDirectory() as directory:
+            (Path(directory) / 'Broken.java').write_text('class Broken {')
+            rows = pd.DataFrame([
+                {
+                    'output_filename': 'Broken.java',
+                    'input_filename': 'Broken.java',
+                    'class_name': 'Broken',
+                    'method_where_invocation_occurred': method_name,
+                    'inline_insertion_line_start': 1,
+                    'inline_insertion_line_end': 1,
+                }
+                for method_name in ['first', 'second']
+            ])
+            results = validate_file(Path(directory), rows)
+            self.assertEqual(len(results), 2)
+            self.assertTrue(all(result.failed_cases_in_validation_examples for result in results))
+            self.assertEqual(len(validate_row(Path(directory), next(rows.iterrows()))), 1)
+
+    def test_validation_stats(self):
+        rows = pd.DataFrame([
+            {
+                'output_filename': 'User.java',
+                'input_filename': 'User.java',
+                'class_name': 'User',
+                'method_where_invocation_occurred': method_name,
+                'inline_insertion_line_start': 17,
+                'inline_insertion_line_end': 19,
+            }
+            for method_name in ['createWithLoggedInstantiationTime', 'createWithDefaultCountry', 'unknownMethod']
+        ])
+        results = validate_file(self.folder, rows)
+        stats = ValidationStats()
+        for result in results:
+            stats.add(result)
+
+        self.assertEqual(stats.handled_cases, len(results))
+        self.assertEqual(stats.matched_cases, sum(result.matched for result in results))
+        self.assertEqual(
+            stats.failed_cases_in_SEMI_algorithm, sum(result.failed_cases_in_SEMI_algorithm for result in results)
+        )
+        self.assertEqual(stats.no_opportunity_chosen, sum(result.no_opportunity_chosen for result in results))
+        percents = [result.percent_matched for result in results if result.percent_matched > -1]
+        self.assertAlmostEqual(stats.mean_percent_matched, sum(percents) / len(percents))
@@ -1,6 +1,7 @@
 from veniq.ast_framework.ast_node_type import ASTNodeType  # noqa: F401
 from veniq.ast_framework.ast_node import ASTNode  # noqa: F401
 from veniq.ast_framework.ast import AST  # noqa: F401
+from veniq.ast_framework.traverse_event import TraverseEvent  # noqa: F401
 
 # register all standard computed fields from 'computed_fields_catalog'
 from veniq.ast_framework.computed_fields_catalog.standard_fields import (
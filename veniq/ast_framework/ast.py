@@ -1,14 +1,23 @@
+from array import array
+from bisect import bisect_left, bisect_right
 from collections import namedtuple, defaultdict
-from itertools import islice, repeat, chain
+from heapq import merge
+from itertools import chain, dropwhile, islice, repeat, takewhile
+from weakref import WeakKeyDictionary
 
 from deprecated import deprecated  # type: ignore
 from javalang.tree import Node
-from networkx import DiGraph, dfs_labeled_edges, dfs_preorder_nodes  # type: ignore
-from typing import Union, Any, Callable, Set, List, Iterator, Tuple, Dict, cast, Optional
+from networkx import DiGraph  # type: ignore
+from typing import (
+    Union, Any, Callable, Set, List, Iterable, Iterator, Tuple, Dict, cast, MutableMapping, Optional, Sequence
+)
 
 from veniq.ast_framework.ast_node_type import ASTNodeType
 from veniq.ast_framework._auxiliary_data import javalang_to_ast_node_type, attributes_by_node_type, ASTNodeReference
 from veniq.ast_framework.ast_node import ASTNode
+from veniq.ast_framework.compact_tree import CompactTree, CompactTreeBuilder
+from veniq.ast_framework.subtree_view import SubtreeView
+from veniq.ast_framework.traverse_event import TraverseEvent
 
 MethodInvocationParams = namedtuple('MethodInvocationParams', ['object_name', 'method_name'])
 
@@ -18,25 +27,56 @@ BinaryOperationParams = namedtuple('BinaryOperationParams', ('operation', 'left_
 
 TraverseCallback = Callable[[ASTNode], None]
 
+# CompactTree and SubtreeView mimic the part of networkx.DiGraph interface used by AST and ASTNode
+Tree = Union[DiGraph, CompactTree, SubtreeView]
+
+# a tree under construction while javalang AST is parsed
+_TreeBuilder = Union[DiGraph, CompactTreeBuilder]
+
 
 class AST:
-    def __init__(self, networkx_tree: DiGraph, root: int):
+    def __init__(self, networkx_tree: Tree, root: int):
         self.tree = networkx_tree
         self.root = root
+        # node indexes grouped by node type in preorder, built on the first query by node type
+        self._node_types_index: Optional[Dict[ASTNodeType, Sequence[int]]] = None
+        # subtrees, which nodes form an interval of indexes, reuse index of a parent AST
+        # and take only node indexes in range [first, last] from it
+        self._node_types_index_range: Optional[Tuple[int, int]] = None
+        # index of the last descendant of each node of the whole tree, which nodes are numbered in preorder,
+        # it is known only for trees built from javalang and their subtrees
+        self._subtree_ends: Optional[Sequence[int]] = None
 
     @staticmethod
-    def build_from_javalang(javalang_ast_root: Node) -> 'AST':
-        tree = DiGraph()
+    def build_from_javalang(javalang_ast_root: Node, backend: str = 'networkx') -> 'AST':
+        '''
+        Builds AST from javalang AST.
+        :param backend: storage of the tree. Use "networkx" for networkx.DiGraph
+        or "compact" for CompactTree, which takes less memory.
+        '''
+        tree: _TreeBuilder
+        if backend == 'networkx':
+            tree = DiGraph()
+        elif backend == 'compact':
+            tree = CompactTreeBuilder()
+        else:
+            raise ValueError(
+                f"'backend' argument must be either 'networkx' or 'compact', but '{backend}' was provided."
+            )
+
         javalang_node_to_index_map: Dict[Node, int] = {}
         root = AST._add_subtree_from_javalang_node(tree, javalang_ast_root,
                                                    javalang_node_to_index_map)
         AST._replace_javalang_nodes_in_attributes(tree, javalang_node_to_index_map)
-        return AST(tree, root)
+        ast = AST(tree.build() if isinstance(tree, CompactTreeBuilder) else tree, root)
+        ast._subtree_ends = AST._calculate_subtree_ends(ast.tree)
+        ast.tree.graph['resolved_lines'] = AST._calculate_resolved_lines(ast.tree)
+        return ast
 
     def __str__(self) -> str:
         printed_graph = ''
         depth = 0
-        for _, destination, edge_type in dfs_labeled_edges(self.tree, self.root):
+        for destination, edge_type in _dfs_labeled_nodes(self.tree, self.root):
             if edge_type == 'forward':
                 printed_graph += '|   ' * depth
                 node_type = self.tree.nodes[destination]['node_type']
@@ -53,6 +93,13 @@ class AST:
                 depth -= 1
         return printed_graph
 
+    def __getstate__(self) -> Dict[str, Any]:
+        # node types index is not pickled, since it is rebuilt on demand
+        state = self.__dict__.copy()
+        state['_node_types_index'] = None
+        state['_node_types_index_range'] = None
+        return state
+
     def get_root(self) -> ASTNode:
         return ASTNode(self.tree, self.root)
 
@@ -66,10 +113,19 @@ class AST:
         If such subtrees are one including the other, only the larger one is
         going to be in resulted sequence.
         '''
+        if self._subtree_ends is not None:
+            last_node_index = 0
+            for node_index in self._get_nodes_indexes_with_types(*root_type):
+                # skip nodes inside previously yielded subtree
+                if node_index > last_node_index:
+                    last_node_index = self._subtree_ends[node_index]
+                    yield self._create_subtree_view(node_index, last_node_index)
+            return
+
         is_inside_subtree = False
         current_subtree_root = -1  # all node indexes are positive
         subtree: List[int] = []
-        for _, destination, edge_type in dfs_labeled_edges(self.tree, self.root):
+        for destination, edge_type in _dfs_labeled_nodes(self.tree, self.root):
             if edge_type == 'forward':
                 if is_inside_subtree:
                     subtree.append(destination)
@@ -79,14 +135,22 @@ class AST:
                     current_subtree_root = destination
             elif edge_type == 'reverse' and destination == current_subtree_root:
                 is_inside_subtree = False
-                yield AST(self.tree.subgraph(subtree), current_subtree_root)
+                yield self._create_subtree(subtree, current_subtree_root)
                 subtree = []
                 current_subtree_root = -1
 
     def get_subtree(self, node: ASTNode) -> 'AST':
-        subtree_nodes_indexes = dfs_preorder_nodes(self.tree, node.node_index)
-        subtree = self.tree.subgraph(subtree_nodes_indexes)
-        return AST(subtree, node.node_index)
+        if self._subtree_ends is not None:
+            if node.node_index not in self.tree:
+                raise KeyError(f"Node {node!r} does not belong to the AST.")
+            return self._create_subtree_view(node.node_index, self._subtree_ends[node.node_index])
+
+        subtree_nodes_indexes = [
+            node_index
+            for node_index, edge_type in _dfs_labeled_nodes(self.tree, node.node_index)
+            if edge_type == 'forward'
+        ]
+        return self._create_subtree(subtree_nodes_indexes, node.node_index)
 
     def traverse(
         self,
@@ -95,19 +159,47 @@ class AST:
         source_node: Optional[ASTNode] = None,
         undirected=False
     ):
-        traverse_graph = self.tree.to_undirected(as_view=True) if undirected else self.tree
-        if source_node is None:
-            source_node = self.get_root()
+        if undirected:
+            source_index = self.root if source_node is None else source_node.node_index
+            for destination, edge_type in _dfs_labeled_nodes(self.tree, source_index, undirected):
+                if edge_type == "forward":
+                    on_node_entering(ASTNode(self.tree, destination))
+                elif edge_type == "reverse":
+                    on_node_leaving(ASTNode(self.tree, destination))
+            return
+
+        for event, node_index in self.walk(source_node=source_node):
+            if event == TraverseEvent.ENTERING:
+                on_node_entering(ASTNode(self.tree, node_index))
+            else:
+                on_node_leaving(ASTNode(self.tree, node_index))
 
-        for _, destination, edge_type in dfs_labeled_edges(traverse_graph, source_node.node_index):
-            if edge_type == "forward":
-                on_node_entering(ASTNode(self.tree, destination))
-            elif edge_type == "reverse":
-                on_node_leaving(ASTNode(self.tree, destination))
+    def walk(
+        self, *types: ASTNodeType, source_node: Optional[ASTNode] = None
+    ) -> Iterator[Tuple[TraverseEvent, int]]:
+        '''
+        Yields (event, node index) pairs of depth first traversal of a subtree of source node, the root by default.
+        If types are given, only nodes of these types are reported and subtrees without them are skipped.
+        '''
+        source_index = self.root if source_node is None else source_node.node_index
+        if self._subtree_ends is None:
+            for destination, edge_type in _dfs_labeled_nodes(self.tree, source_index):
+                if not types or self.tree.nodes[destination]['node_type'] in types:
+                    yield (TraverseEvent.ENTERING if edge_type == 'forward' else TraverseEvent.LEAVING), destination
+            return
+
+        last_node_index = self._subtree_ends[source_index]
+        nodes_indexes: Iterable[int] = range(source_index, last_node_index + 1)
+        if types:
+            nodes_indexes = takewhile(
+                lambda node_index: node_index <= last_node_index,
+                dropwhile(lambda node_index: node_index < source_index, self._get_nodes_indexes_with_types(*types)),
+            )
+        yield from _walk_preorder(nodes_indexes, self._subtree_ends)
 
     def create_fake_node(self) -> ASTNode:
-        fake_nodes_qty = self._fake_nodes_qty_per_graph[self.tree]
-        self._fake_nodes_qty_per_graph[self.tree] += 1
+        fake_nodes_qty = self._fake_nodes_qty_per_graph.get(self.tree, 0)
+        self._fake_nodes_qty_per_graph[self.tree] = fake_nodes_qty + 1
         new_fake_node_id = -(fake_nodes_qty + 1)
         return ASTNode(self.tree, new_fake_node_id)
 
@@ -138,7 +230,9 @@ class AST:
             yield child
 
     @deprecated(reason='Use ASTNode functionality instead.')
-    def get_first_n_children_with_type(self, node: int, child_type: ASTNodeType, quantity: int) -> List[int]:
+    def get_first_n_children_with_type(
+        self, node: int, child_type: ASTNodeType, quantity: int
+    ) -> List[Optional[int]]:
         '''
         Returns first quantity of children of node with type child_type.
         Resulted list is padded with None to length quantity.
@@ -163,14 +257,19 @@ class AST:
 
     @deprecated(reason='Use get_proxy_nodes instead.')
     def get_nodes(self, type: Union[ASTNodeType, None] = None) -> Iterator[int]:
-        for node in self.tree.nodes:
-            if type is None or self.tree.nodes[node]['node_type'] == type:
-                yield node
+        if type is None:
+            yield from self.tree.nodes
+        else:
+            yield from self._get_nodes_indexes_with_types(type)
 
     def get_proxy_nodes(self, *types: ASTNodeType) -> Iterator[ASTNode]:
-        for node in self.tree.nodes:
-            if len(types) == 0 or self.tree.nodes[node]['node_type'] in types:
-                yield ASTNode(self.tree, node)
+        '''
+        Yields nodes of given types in preorder.
+        If no types are given, all nodes are yielded.
+        '''
+        nodes_indexes = self._get_nodes_indexes_with_types(*types) if types else self.tree.nodes
+        for node_index in nodes_indexes:
+            yield ASTNode(self.tree, node_index)
 
     @deprecated(reason='Use ASTNode functionality instead.')
     def get_attr(self, node: int, attr_name: str, default_value: Any = None) -> Any:
@@ -218,8 +317,88 @@ class AST:
         operation_node, left_side_node, right_side_node = self.tree.succ[binary_operation_node]
         return BinaryOperationParams(self.get_attr(operation_node, 'string'), left_side_node, right_side_node)
 
+    def _create_subtree(self, nodes_indexes: List[int], root: int) -> 'AST':
+        subtree = AST(self.tree.subgraph(nodes_indexes), root)
+        # node indexes are assigned in preorder, so a subtree usually is an interval of indexes
+        last_node_index = max(nodes_indexes)
+        if last_node_index - root + 1 == len(nodes_indexes):
+            subtree._node_types_index = self._get_node_types_index()
+            subtree._node_types_index_range = (root, last_node_index)
+        return subtree
+
+    def _create_subtree_view(self, root: int, last_node_index: int) -> 'AST':
+        whole_tree = self.tree.whole_tree if isinstance(self.tree, SubtreeView) else self.tree
+        subtree = AST(SubtreeView(whole_tree, root, last_node_index), root)
+        subtree._subtree_ends = self._subtree_ends
+        subtree._node_types_index = self._get_node_types_index()
+        subtree._node_types_index_range = (root, last_node_index)
+        return subtree
+
+    @staticmethod
+    def _calculate_subtree_ends(tree: Tree) -> Sequence[int]:
+        # each node is followed by its descendants in preorder,
+        # so walking backwards all descendants of a node are processed before it
+        subtree_ends = array('i', range(len(tree) + 1))
+        for node_index in reversed(range(1, len(tree) + 1)):
+            for child_index in tree.succ[node_index]:
+                subtree_ends[node_index] = max(subtree_ends[node_index], subtree_ends[child_index])
+        return subtree_ends
+
     @staticmethod
-    def _add_subtree_from_javalang_node(tree: DiGraph, javalang_node: Union[Node, Set[Any], str],
+    def _calculate_resolved_lines(tree: Tree) -> Sequence[int]:
+        '''
+        Line of each node as ASTNode.line resolves it: own line of a node,
+        otherwise the minimal line of its descendants, otherwise the line of the nearest ancestor.
+        0 stands for nodes, which line cannot be resolved.
+        '''
+        nodes_qty = len(tree)
+        lines = array('i', [0])
+        lines.extend(tree.nodes[node_index]['line'] or 0 for node_index in range(1, nodes_qty + 1))
+
+        # walking backwards all descendants of a node are processed before it
+        subtree_min_lines = array('i', lines)
+        for node_index in reversed(range(1, nodes_qty + 1)):
+            for child_index in tree.succ[node_index]:
+                child_line = subtree_min_lines[child_index]
+                if child_line and (not subtree_min_lines[node_index] or child_line < subtree_min_lines[node_index]):
+                    subtree_min_lines[node_index] = child_line
+
+        # walking forward ancestors of a node are processed before it
+        ancestors_lines = array('i', [0]) * (nodes_qty + 1)
+        resolved_lines = array('i', [0]) * (nodes_qty + 1)
+        for node_index in range(1, nodes_qty + 1):
+            resolved_lines[node_index] = (
+                lines[node_index] or subtree_min_lines[node_index] or ancestors_lines[node_index]
+            )
+            for child_index in tree.succ[node_index]:
+                ancestors_lines[child_index] = lines[node_index] or ancestors_lines[node_index]
+        return resolved_lines
+
+    def _get_node_types_index(self) -> Dict[ASTNodeType, Sequence[int]]:
+        if self._node_types_index is None:
+            node_types_index: Dict[ASTNodeType, List[int]] = defaultdict(list)
+            for node_index in sorted(self.tree.nodes):
+                node_types_index[self.tree.nodes[node_index]['node_type']].append(node_index)
+            self._node_types_index = dict(node_types_index)
+        return self._node_types_index
+
+    def _get_nodes_indexes_with_types(self, *types: ASTNodeType) -> Iterator[int]:
+        node_types_index = self._get_node_types_index()
+        nodes_indexes_by_type = [node_types_index.get(node_type, []) for node_type in set(types)]
+        if self._node_types_index_range is not None:
+            first_node_index, last_node_index = self._node_types_index_range
+            nodes_indexes_by_type = [
+                nodes_indexes[bisect_left(nodes_indexes, first_node_index):
+                              bisect_right(nodes_indexes, last_node_index)]
+                for nodes_indexes in nodes_indexes_by_type
+            ]
+
+        if len(nodes_indexes_by_type) == 1:
+            return iter(nodes_indexes_by_type[0])
+        return merge(*nodes_indexes_by_type)
+
+    @staticmethod
+    def _add_subtree_from_javalang_node(tree: _TreeBuilder, javalang_node: Union[Node, Set[Any], str],
                                         javalang_node_to_index_map: Dict[Node, int]) -> int:
         node_index, node_type = AST._add_javalang_node(tree, javalang_node)
         if node_index != AST._UNKNOWN_NODE_TYPE and \
@@ -231,7 +410,7 @@ class AST:
         return node_index
 
     @staticmethod
-    def _add_javalang_children(tree: DiGraph, children: List[Any], parent_index: int,
+    def _add_javalang_children(tree: _TreeBuilder, children: List[Any], parent_index: int,
                                javalang_node_to_index_map: Dict[Node, int]) -> None:
         for child in children:
             if isinstance(child, list):
@@ -242,7 +421,7 @@ class AST:
                     tree.add_edge(parent_index, child_index)
 
     @staticmethod
-    def _add_javalang_node(tree: DiGraph, javalang_node: Union[Node, Set[Any], str]) -> Tuple[int, ASTNodeType]:
+    def _add_javalang_node(tree: _TreeBuilder, javalang_node: Union[Node, Set[Any], str]) -> Tuple[int, ASTNodeType]:
         node_index = AST._UNKNOWN_NODE_TYPE
         node_type = ASTNodeType.UNKNOWN
         if isinstance(javalang_node, Node):
@@ -257,7 +436,7 @@ class AST:
         return node_index, node_type
 
     @staticmethod
-    def _add_javalang_standard_node(tree: DiGraph, javalang_node: Node) -> Tuple[int, ASTNodeType]:
+    def _add_javalang_standard_node(tree: _TreeBuilder, javalang_node: Node) -> Tuple[int, ASTNodeType]:
         node_index = len(tree) + 1
         node_type = javalang_to_ast_node_type[type(javalang_node)]
 
@@ -273,7 +452,9 @@ class AST:
         return node_index, node_type
 
     @staticmethod
-    def _post_process_javalang_attributes(tree: DiGraph, node_type: ASTNodeType, attributes: Dict[str, Any]) -> None:
+    def _post_process_javalang_attributes(
+        tree: _TreeBuilder, node_type: ASTNodeType, attributes: Dict[str, Any]
+    ) -> None:
         """
         Replace some attributes with more appropriate values for convenient work
         """
@@ -289,7 +470,7 @@ class AST:
             attributes["qualifier"] = None
 
     @staticmethod
-    def _add_javalang_collection_node(tree: DiGraph, collection_node: Set[Any]) -> int:
+    def _add_javalang_collection_node(tree: _TreeBuilder, collection_node: Set[Any]) -> int:
         node_index = len(tree) + 1
         tree.add_node(node_index, node_type=ASTNodeType.COLLECTION, line=None)
         # we expect only strings in collection
@@ -304,13 +485,13 @@ class AST:
         return node_index
 
     @staticmethod
-    def _add_javalang_string_node(tree: DiGraph, string_node: str) -> int:
+    def _add_javalang_string_node(tree: _TreeBuilder, string_node: str) -> int:
         node_index = len(tree) + 1
         tree.add_node(node_index, node_type=ASTNodeType.STRING, string=string_node, line=None)
         return node_index
 
     @staticmethod
-    def _replace_javalang_nodes_in_attributes(tree: DiGraph,
+    def _replace_javalang_nodes_in_attributes(tree: _TreeBuilder,
                                               javalang_node_to_index_map: Dict[Node, int]) -> None:
         '''
         All javalang nodes found in networkx nodes attributes are replaced
@@ -364,4 +545,46 @@ class AST:
 
     _UNKNOWN_NODE_TYPE = -1
 
-    _fake_nodes_qty_per_graph: Dict[DiGraph, int] = defaultdict(lambda: 0)
+    # fake nodes reference their tree, so a counter is dropped only when no fake node of the tree is left
+    _fake_nodes_qty_per_graph: MutableMapping[Tree, int] = WeakKeyDictionary()
+
+
+def _walk_preorder(nodes_indexes: Iterable[int], subtree_ends: Sequence[int]) -> Iterator[Tuple[TraverseEvent, int]]:
+    # nodes are entered in preorder and each of them is left
+    # before entering the first node after its last descendant
+    entered_nodes: List[int] = []
+    for node_index in nodes_indexes:
+        while entered_nodes and subtree_ends[entered_nodes[-1]] < node_index:
+            yield TraverseEvent.LEAVING, entered_nodes.pop()
+        yield TraverseEvent.ENTERING, node_index
+        entered_nodes.append(node_index)
+    while entered_nodes:
+        yield TraverseEvent.LEAVING, entered_nodes.pop()
+
+
+def _dfs_labeled_nodes(tree: Tree, source: int, undirected: bool = False) -> Iterator[Tuple[int, str]]:
+    """
+    Depth first search, which works with any tree backend.
+    Like networkx.dfs_labeled_edges it yields a node with 'forward' label on entering it
+    and with 'reverse' label on leaving it.
+    If undirected is True, parent of a node is considered as its neighbour too.
+    """
+    def neighbours(node_index: int) -> Iterator[int]:
+        yield from tree.succ[node_index]
+        if undirected:
+            yield from tree.predecessors(node_index)
+
+    visited = {source}
+    yield source, 'forward'
+    stack = [(source, neighbours(source))]
+    while stack:
+        node_index, node_neighbours = stack[-1]
+        for neighbour in node_neighbours:
+            if neighbour not in visited:
+                visited.add(neighbour)
+                yield neighbour, 'forward'
+                stack.append((neighbour, neighbours(neighbour)))
+                break
+        else:
+            stack.pop()
+            yield node_index, 'reverse'
@@ -1,8 +1,7 @@
 from inspect import getmembers
-from typing import Any, List, Iterator, Optional
+from typing import Any, Callable, Dict, List, Iterator, NoReturn, Optional
 
-from networkx import DiGraph, dfs_preorder_nodes  # type: ignore
-from cached_property import cached_property  # type: ignore
+from networkx import DiGraph  # type: ignore
 
 from veniq.ast_framework._auxiliary_data import (
     common_attributes,
@@ -14,6 +13,14 @@ from veniq.ast_framework.computed_fields_registry import computed_fields_registr
 
 
 class ASTNode:
+    # nodes are created on every access to children, parent and references,
+    # so they do not have __dict__ and are cheap to create
+    __slots__ = ('_graph', '_node_index', '_line', '_hash')
+    _graph: DiGraph
+    _node_index: int
+    _line: int
+    _hash: int
+
     def __init__(self, graph: DiGraph, node_index: int):
         self._graph = graph
         self._node_index = node_index
@@ -41,22 +48,47 @@ class ASTNode:
     def node_index(self) -> int:
         return self._node_index
 
+    @property
+    def node_type(self) -> ASTNodeType:
+        # the most frequently used attribute is not dispatched through __getattr__
+        if self._node_index < 0:
+            return None  # type: ignore # fake nodes have no attributes
+        return self._graph.nodes[self._node_index]["node_type"]
+
     @property
     def is_fake(self) -> bool:
         return self._node_index < 0
 
-    @cached_property
+    @property
     def line(self) -> int:
         if self.is_fake:
             return -1
 
+        # trees built by AST.build_from_javalang and load_ast have lines of all nodes resolved beforehand
+        resolved_lines = self._graph.graph.get("resolved_lines")
+        if resolved_lines is not None:
+            line = resolved_lines[self._node_index]
+            if line == 0:
+                self._raise_line_not_found()
+            return line
+
+        try:
+            return self._line
+        except AttributeError:
+            self._line = self._compute_line()
+            return self._line
+
+    def _compute_line(self) -> int:
+        if self.is_fake:
+            return -1
+
         line = self._get_line(self._node_index)
         if line is not None:
             return line
 
         children_lines: List[int] = [
             self._get_line(child_index)  # type: ignore # all Nones filtered out in list comprehension
-            for child_index in dfs_preorder_nodes(self._graph, self._node_index)
+            for child_index in self._iterate_subtree(self._node_index)
             if self._get_line(child_index) is not None
         ]
 
@@ -73,6 +105,9 @@ class ASTNode:
         if line is not None:
             return line
 
+        self._raise_line_not_found()
+
+    def _raise_line_not_found(self) -> NoReturn:
         raise RuntimeError(
             f"Failed to retrieve source code line information for {repr(self)} node. "
             "All nodes in a path from root to it and all nodes, reachable from it, "
@@ -80,36 +115,21 @@ class ASTNode:
         )
 
     def __getattr__(self, attribute_name: str):
-        if self.is_fake:
+        # private names are never AST attributes, they get here only if a slot is not set yet
+        if attribute_name.startswith("_"):
+            raise AttributeError(attribute_name)
+
+        if self._node_index < 0:
             return None
 
-        node_type = self._get_type(self._node_index)
-        javalang_fields = attributes_by_node_type[node_type]
-        computed_fields = computed_fields_registry.get_fields(node_type)
-        if (
-            attribute_name not in common_attributes
-            and attribute_name not in javalang_fields
-            and attribute_name not in computed_fields
-        ):
+        node_type = self._graph.nodes[self._node_index]["node_type"]
+        accessor = _get_attributes_accessors(node_type).get(attribute_name)
+        if accessor is None:
             raise AttributeError(
                 "Failed to retrieve property. "
                 f"'{node_type}' node does not have '{attribute_name}' attribute."
             )
-
-        if attribute_name in computed_fields:
-            attribute = computed_fields[attribute_name](self)
-        else:
-            attribute = self._graph.nodes[self._node_index][attribute_name]
-
-        # common_attributes and javalang_fields may contain ASTNodeReference
-        # which needs to be replaces with actual ASTNode for convince API
-        # computed_fields are using javalang_fields and there is no ASTNodeReference
-        if attribute_name not in computed_fields:
-            if isinstance(attribute, ASTNodeReference):
-                attribute = self._create_node_from_reference(attribute)
-            elif isinstance(attribute, list):
-                attribute = self._replace_references_with_nodes(attribute)
-        return attribute
+        return accessor(self)
 
     def __dir__(self) -> List[str]:
         attribute_names = self._get_public_fixed_interface()
@@ -149,10 +169,21 @@ class ASTNode:
             raise NotImplementedError(
                 f"ASTNode support comparission only with themselves, but {type(other)} was provided."
             )
-        return self._graph == other._graph and self._node_index == other._node_index
+        # trees are compared by identity, so comparison never depends on size of a tree
+        return self._node_index == other._node_index and self._graph is other._graph
 
     def __hash__(self):
-        return hash(self._node_index)
+        try:
+            return self._hash
+        except AttributeError:
+            # identity of a tree is a unique integer while its nodes exist,
+            # so nodes of different trees do not collide
+            self._hash = hash((id(self._graph), self._node_index))
+            return self._hash
+
+    def __reduce__(self):
+        # cached hash depends on identity of a tree, so it is not pickled
+        return ASTNode, (self._graph, self._node_index)
 
     def _replace_references_with_nodes(self, list_with_references: List[Any]) -> List[Any]:
         list_with_nodes: List[Any] = []
@@ -188,6 +219,61 @@ class ASTNode:
         # there is maximum one parent in a tree
         return next(self._graph.predecessors(node_index), None)
 
+    def _iterate_subtree(self, node_index: int) -> Iterator[int]:
+        # preorder traversal, which relies only on successors, so it works with any tree backend
+        stack = [node_index]
+        while stack:
+            node_index = stack.pop()
+            yield node_index
+            stack.extend(reversed(list(self._graph.succ[node_index])))
+
     @classmethod
     def _get_public_fixed_interface(cls) -> List[str]:
-        return [name for name, _ in getmembers(cls) if not name.startswith("_")]
+        # common attributes are listed among attributes of a node type
+        return [
+            name for name, _ in getmembers(cls)
+            if not name.startswith("_") and name not in common_attributes
+        ]
+
+
+_AttributeAccessor = Callable[[ASTNode], Any]
+
+
+def _create_javalang_field_accessor(attribute_name: str) -> _AttributeAccessor:
+    def get_javalang_field(node: ASTNode) -> Any:
+        attribute = node._graph.nodes[node._node_index][attribute_name]
+
+        # common_attributes and javalang_fields may contain ASTNodeReference
+        # which needs to be replaces with actual ASTNode for convince API
+        if isinstance(attribute, ASTNodeReference):
+            return ASTNode(node._graph, attribute.node_index)
+        # lists are scanned for references only when they are accessed
+        if isinstance(attribute, list):
+            return node._replace_references_with_nodes(attribute)
+        return attribute
+
+    return get_javalang_field
+
+
+# accessors of all attributes of each node type, they are created once per node type
+# and dropped when computed fields are changed
+_attributes_accessors: Dict[ASTNodeType, Dict[str, _AttributeAccessor]] = {}
+_attributes_accessors_version = computed_fields_registry.version
+
+
+def _get_attributes_accessors(node_type: ASTNodeType) -> Dict[str, _AttributeAccessor]:
+    global _attributes_accessors_version
+    if _attributes_accessors_version != computed_fields_registry.version:
+        _attributes_accessors.clear()
+        _attributes_accessors_version = computed_fields_registry.version
+
+    accessors = _attributes_accessors.get(node_type)
+    if accessors is None:
+        accessors = {
+            attribute_name: _create_javalang_field_accessor(attribute_name)
+            for attribute_name in common_attributes | attributes_by_node_type[node_type]
+        }
+        # computed fields are using javalang_fields and there is no ASTNodeReference
+        accessors.update(computed_fields_registry.get_fields(node_type))
+        _attributes_accessors[node_type] = accessors
+    return accessors
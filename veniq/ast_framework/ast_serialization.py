@@ -0,0 +1,288 @@
+'''
+Binary serialization of AST.
+
+File consists of a header followed by sections, each aligned to 4 bytes:
+ - node types ids, one byte per node
+ - parents, first children, next siblings, lines, last descendants and resolved lines of nodes as int32 columns
+ - node indexes grouped by node type with offsets of each group
+ - table of attributes: offsets of rows and tagged encoding of values
+ - table of strings: offsets of strings and UTF-8 encoded strings
+ - names of node types, so files written by incompatible version of veniq are detected.
+Node indexes start from 1 and follow preorder, index 0 is reserved in all per node columns.
+Columns are stored with native byte order.
+
+load_ast maps a file into memory and reads columns directly from it.
+Attributes and strings are decoded only when they are accessed.
+The mapping is owned by the loaded tree and is unmapped, when the tree and all its subtrees are released.
+'''
+
+import sys
+from array import array
+from collections.abc import Sequence
+from mmap import mmap, ACCESS_READ
+from pathlib import Path
+from struct import Struct
+from typing import Any, BinaryIO, Dict, List, Tuple, Union
+
+from veniq.ast_framework.ast import AST
+from veniq.ast_framework.ast_node_type import ASTNodeType
+from veniq.ast_framework._auxiliary_data import ASTNodeReference
+from veniq.ast_framework.compact_tree import CompactTree, CompactTreeBuilder
+
+_MAGIC = b'VENIQAST'
+_FORMAT_VERSION = 2
+
+# magic, version, byte order, nodes quantity, root, strings quantity,
+# size of attributes table and size of node types names in bytes
+_HEADER = Struct('<8sHHIIIII')
+_BYTE_ORDERS = ['little', 'big']
+
+# tags of attributes values
+_NONE, _FALSE, _TRUE, _INT, _STRING, _REFERENCE, _LIST, _SET = range(8)
+_TAG = Struct('<B')
+_INT_VALUE = Struct('<q')
+_INDEX_VALUE = Struct('<I')
+
+
+def save_ast(ast: AST, filename: Union[str, Path]) -> None:
+    '''
+    Writes AST to a file. Nodes are renumbered, so they follow preorder starting from 1.
+    '''
+    tree = _build_compact_tree(ast)
+    nodes_qty = len(tree)
+    strings: Dict[str, int] = {}
+    attributes, attributes_offsets = _encode_attributes(tree, strings)
+    strings_blob, strings_offsets = _encode_strings(strings)
+    node_types_names = '\n'.join(node_type.name for node_type in ASTNodeType).encode('utf-8')
+    node_types_offsets, nodes_by_type = _group_nodes_by_type(tree)
+
+    with open(filename, 'wb') as file:
+        file.write(_HEADER.pack(
+            _MAGIC, _FORMAT_VERSION, _BYTE_ORDERS.index(sys.byteorder),
+            nodes_qty, 1, len(strings), len(attributes), len(node_types_names),
+        ))
+        _write_section(file, array('B', tree._node_types))
+        for column in [tree._parents, tree._first_children, tree._next_siblings, tree._lines]:
+            _write_section(file, array('i', column))
+        _write_section(file, array('i', AST._calculate_subtree_ends(tree)))
+        _write_section(file, array('i', AST._calculate_resolved_lines(tree)))
+        _write_section(file, node_types_offsets)
+        _write_section(file, nodes_by_type)
+        _write_section(file, attributes_offsets)
+        _write_section(file, attributes)
+        _write_section(file, strings_offsets)
+        _write_section(file, strings_blob)
+        _write_section(file, node_types_names)
+
+
+def load_ast(filename: Union[str, Path]) -> AST:
+    '''
+    Maps a file written by save_ast into memory and returns AST reading it lazily.
+    The mapping is kept in 'mapped_file' attribute of the tree, which is shared with its subgraphs,
+    and it is unmapped, when the last of them is released.
+    '''
+    with open(filename, 'rb') as file:
+        mapped_file = mmap(file.fileno(), 0, access=ACCESS_READ)
+
+    magic, version, byte_order, nodes_qty, root, strings_qty, attributes_size, node_types_names_size = \
+        _HEADER.unpack_from(mapped_file)
+    if magic != _MAGIC:
+        mapped_file.close()
+        raise ValueError(f"File '{filename}' does not contain serialized AST.")
+    if version != _FORMAT_VERSION or _BYTE_ORDERS[byte_order] != sys.byteorder:
+        mapped_file.close()
+        raise ValueError(f"File '{filename}' was written by incompatible version of veniq or on other platform.")
+
+    reader = _SectionsReader(memoryview(mapped_file), _HEADER.size)
+    node_types = reader.read(nodes_qty + 1, 'B')
+    parents, first_children, next_siblings, lines, subtree_ends, resolved_lines = (
+        reader.read(nodes_qty + 1, 'i') for _ in range(6)
+    )
+    node_types_offsets = reader.read(len(ASTNodeType) + 1, 'i')
+    nodes_by_type = reader.read(nodes_qty, 'i')
+    attributes_offsets = reader.read(nodes_qty + 2, 'I')
+    attributes = reader.read(attributes_size, 'B')
+    strings_offsets = reader.read(strings_qty + 1, 'I')
+    strings_blob = reader.read(strings_offsets[-1], 'B')
+    node_types_names = bytes(reader.read(node_types_names_size, 'B')).decode('utf-8').split('\n')
+    if node_types_names != [node_type.name for node_type in ASTNodeType]:
+        raise ValueError(f"File '{filename}' was written by incompatible version of veniq.")
+
+    strings = _SerializedStrings(strings_offsets, strings_blob)
+    tree = CompactTree(
+        node_types, parents, first_children, next_siblings, lines,
+        _SerializedAttributes(attributes_offsets, attributes, strings),
+    )
+    tree.graph['resolved_lines'] = resolved_lines
+    # columns are views of the mapping, so it must live as long as the tree
+    tree.graph['mapped_file'] = mapped_file
+    ast = AST(tree, root)
+    ast._subtree_ends = subtree_ends
+    ast._node_types_index = {
+        node_type: nodes_by_type[node_types_offsets[node_type_id]:node_types_offsets[node_type_id + 1]]
+        for node_type_id, node_type in enumerate(ASTNodeType)
+        if node_types_offsets[node_type_id] != node_types_offsets[node_type_id + 1]
+    }
+    return ast
+
+
+def _build_compact_tree(ast: AST) -> CompactTree:
+    nodes_indexes: List[int] = []
+    ast.traverse(lambda node: nodes_indexes.append(node.node_index))
+    new_indexes = {node_index: new_index for new_index, node_index in enumerate(nodes_indexes, 1)}
+
+    builder = CompactTreeBuilder()
+    for node_index in nodes_indexes:
+        attributes = {
+            attribute_name: _replace_references(value, new_indexes)
+            for attribute_name, value in ast.tree.nodes[node_index].items()
+        }
+        builder.add_node(new_indexes[node_index], **attributes)
+        for child_index in ast.tree.succ[node_index]:
+            builder.add_edge(new_indexes[node_index], new_indexes[child_index])
+    return builder.build()
+
+
+def _replace_references(value: Any, new_indexes: Dict[int, int]) -> Any:
+    if isinstance(value, ASTNodeReference):
+        if value.node_index not in new_indexes:
+            raise ValueError(f"Attribute references node {value.node_index}, which does not belong to the AST.")
+        return ASTNodeReference(new_indexes[value.node_index])
+    elif isinstance(value, list):
+        return [_replace_references(item, new_indexes) for item in value]
+    return value
+
+
+def _group_nodes_by_type(tree: CompactTree) -> Tuple[array, array]:
+    nodes_by_type_id: List[List[int]] = [[] for _ in ASTNodeType]
+    for node_index in range(1, len(tree) + 1):
+        nodes_by_type_id[tree._node_types[node_index]].append(node_index)
+
+    offsets = array('i', [0])
+    nodes_by_type = array('i')
+    for nodes_indexes in nodes_by_type_id:
+        nodes_by_type.extend(nodes_indexes)
+        offsets.append(len(nodes_by_type))
+    return offsets, nodes_by_type
+
+
+def _encode_attributes(tree: CompactTree, strings: Dict[str, int]) -> Tuple[bytearray, array]:
+    attributes = bytearray()
+    offsets = array('I', [0, 0])
+    for node_index in range(1, len(tree) + 1):
+        for value in tree._attributes[node_index]:
+            _encode_value(value, attributes, strings)
+        offsets.append(len(attributes))
+    return attributes, offsets
+
+
+def _encode_value(value: Any, output: bytearray, strings: Dict[str, int]) -> None:
+    if value is None:
+        output += _TAG.pack(_NONE)
+    elif isinstance(value, bool):
+        output += _TAG.pack(_TRUE if value else _FALSE)
+    elif isinstance(value, int):
+        output += _TAG.pack(_INT) + _INT_VALUE.pack(value)
+    elif isinstance(value, str):
+        output += _TAG.pack(_STRING) + _INDEX_VALUE.pack(strings.setdefault(value, len(strings)))
+    elif isinstance(value, ASTNodeReference):
+        output += _TAG.pack(_REFERENCE) + _INDEX_VALUE.pack(value.node_index)
+    elif isinstance(value, (list, set)):
+        output += _TAG.pack(_LIST if isinstance(value, list) else _SET) + _INDEX_VALUE.pack(len(value))
+        for item in value:
+            _encode_value(item, output, strings)
+    else:
+        raise ValueError(f"Attribute value {value!r} of type {type(value).__name__} cannot be serialized.")
+
+
+def _encode_strings(strings: Dict[str, int]) -> Tuple[bytearray, array]:
+    blob = bytearray()
+    offsets = array('I', [0])
+    # strings are numbered in order of insertion
+    for string in strings:
+        blob += string.encode('utf-8', errors='surrogatepass')
+        offsets.append(len(blob))
+    return blob, offsets
+
+
+def _write_section(file: BinaryIO, section: Union[array, bytes, bytearray]) -> None:
+    data = section.tobytes() if isinstance(section, array) else section
+    file.write(data)
+    file.write(bytes(-len(data) % 4))
+
+
+class _SectionsReader:
+    def __init__(self, buffer: memoryview, offset: int):
+        self._buffer = buffer
+        self._offset = offset
+
+    def read(self, items_qty: int, item_format: str) -> memoryview:
+        size = items_qty * Struct(item_format).size
+        section = self._buffer[self._offset:self._offset + size].cast(item_format)  # type: ignore
+        self._offset += size + (-size % 4)
+        return section
+
+
+class _SerializedStrings:
+    def __init__(self, offsets: memoryview, blob: memoryview):
+        self._offsets = offsets
+        self._blob = blob
+        self._decoded: Dict[int, str] = {}
+
+    def __getitem__(self, string_index: int) -> str:
+        string = self._decoded.get(string_index)
+        if string is None:
+            encoded = self._blob[self._offsets[string_index]:self._offsets[string_index + 1]]
+            string = sys.intern(bytes(encoded).decode('utf-8', errors='surrogatepass'))
+            self._decoded[string_index] = string
+        return string
+
+
+class _SerializedAttributes(Sequence):
+    '''
+    Rows of attributes of CompactTree decoded on demand.
+    '''
+
+    def __init__(self, offsets: memoryview, blob: memoryview, strings: _SerializedStrings):
+        self._offsets = offsets
+        self._blob = blob
+        self._strings = strings
+        self._decoded: Dict[int, Tuple[Any, ...]] = {}
+
+    def __getitem__(self, node_index):
+        row = self._decoded.get(node_index)
+        if row is None:
+            position = self._offsets[node_index]
+            end = self._offsets[node_index + 1]
+            values: List[Any] = []
+            while position < end:
+                value, position = self._decode_value(position)
+                values.append(value)
+            row = self._decoded[node_index] = tuple(values)
+        return row
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def _decode_value(self, position: int) -> Tuple[Any, int]:
+        tag = self._blob[position]
+        position += _TAG.size
+        if tag == _NONE:
+            return None, position
+        elif tag == _FALSE or tag == _TRUE:
+            return tag == _TRUE, position
+        elif tag == _INT:
+            return _INT_VALUE.unpack_from(self._blob, position)[0], position + _INT_VALUE.size
+
+        index, = _INDEX_VALUE.unpack_from(self._blob, position)
+        position += _INDEX_VALUE.size
+        if tag == _STRING:
+            return self._strings[index], position
+        elif tag == _REFERENCE:
+            return ASTNodeReference(index), position
+
+        items: List[Any] = []
+        for _ in range(index):
+            item, position = self._decode_value(position)
+            items.append(item)
+        return (items if tag == _LIST else set(items)), position
@@ -1,21 +1,29 @@
-from typing import Callable, Union
-from networkx import DiGraph, dfs_labeled_edges
+from bisect import bisect_left, bisect_right
+from heapq import merge
+from typing import Callable, Iterable, Iterator, List, Tuple, Union
+from networkx import DiGraph
 
+from veniq.ast_framework import TraverseEvent
 from .statement import Statement
 from .block import Block
-from .constants import NodeType, NodeId, NODE, BLOCK_REASON
+from .constants import NodeType, NodeId, NODE, BLOCK_REASON, SUBTREE_ENDS, NODES_BY_TYPE
 
 TraverseCallback = Callable[[Union[Block, Statement]], None]
+WalkEvent = Tuple[TraverseEvent, Union[Block, Statement]]
 
 
 class NodesFactory:
     @staticmethod
     def create_statement_node(graph: DiGraph, id: NodeId) -> Statement:
-        return Statement(graph, id, NodesFactory.create_block_node, NodesFactory._traverse_graph)
+        return Statement(
+            graph, id, NodesFactory.create_block_node, NodesFactory._traverse_graph, NodesFactory._walk_graph
+        )
 
     @staticmethod
     def create_block_node(graph: DiGraph, id: NodeId) -> Block:
-        return Block(graph, id, NodesFactory.create_statement_node, NodesFactory._traverse_graph)
+        return Block(
+            graph, id, NodesFactory.create_statement_node, NodesFactory._traverse_graph, NodesFactory._walk_graph
+        )
 
     @staticmethod
     def _detect_and_create_node(graph: DiGraph, id: NodeId) -> Union[Block, Statement]:
@@ -29,7 +37,7 @@ class NodesFactory:
 
     @staticmethod
     def _detect_node_type(graph: DiGraph, id: NodeId) -> NodeType:
-        node_attributes = graph.nodes(data=True)[id]
+        node_attributes = graph.nodes[id]
         if NODE in node_attributes:
             return NodeType.Statement
         elif BLOCK_REASON in node_attributes:
@@ -44,11 +52,33 @@ class NodesFactory:
         on_node_entering: TraverseCallback,
         on_node_leaving: TraverseCallback = lambda _: None,
     ) -> None:
-        for _, destination_id, edge_type in dfs_labeled_edges(graph, start_node_id):
-            destination_node = NodesFactory._detect_and_create_node(graph, destination_id)
-            if edge_type == "forward":
-                on_node_entering(destination_node)
-            elif edge_type == "reverse":
-                on_node_leaving(destination_node)
+        for event, node in NodesFactory._walk_graph(graph, start_node_id):
+            if event == TraverseEvent.ENTERING:
+                on_node_entering(node)
             else:
-                raise RuntimeError(f"Unexpected edge type {edge_type}.")
+                on_node_leaving(node)
+
+    @staticmethod
+    def _walk_graph(graph: DiGraph, start_node_id: NodeId, *node_types: NodeType) -> Iterator[WalkEvent]:
+        # nodes are numbered in preorder, so a subtree is an interval of ids
+        # and each node is left before entering the first node after its last descendant
+        subtree_ends: List[NodeId] = graph.graph[SUBTREE_ENDS]
+        last_node_id = subtree_ends[start_node_id]
+        nodes_ids: Iterable[NodeId] = range(start_node_id, last_node_id + 1)
+        if node_types:
+            # only ids of requested types are visited, so filtered nodes are neither wrapped nor checked
+            nodes_ids_by_type = [
+                type_nodes_ids[bisect_left(type_nodes_ids, start_node_id):bisect_right(type_nodes_ids, last_node_id)]
+                for type_nodes_ids in (graph.graph[NODES_BY_TYPE][node_type] for node_type in set(node_types))
+            ]
+            nodes_ids = nodes_ids_by_type[0] if len(nodes_ids_by_type) == 1 else merge(*nodes_ids_by_type)
+
+        entered_nodes: List[Tuple[NodeId, Union[Block, Statement]]] = []
+        for node_id in nodes_ids:
+            while entered_nodes and subtree_ends[entered_nodes[-1][0]] < node_id:
+                yield TraverseEvent.LEAVING, entered_nodes.pop()[1]
+            node = NodesFactory._detect_and_create_node(graph, node_id)
+            yield TraverseEvent.ENTERING, node
+            entered_nodes.append((node_id, node))
+        while entered_nodes:
+            yield TraverseEvent.LEAVING, entered_nodes.pop()[1]
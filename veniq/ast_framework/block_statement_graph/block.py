@@ -2,11 +2,11 @@ from networkx import DiGraph
 from typing import Any, Callable, Iterator, Optional, TYPE_CHECKING
 
 from veniq.ast_framework import ASTNode
-from .constants import BLOCK_REASON, ORIGIN_STATEMENT, NODE, BlockReason, NodeId
+from .constants import BLOCK_REASON, ORIGIN_STATEMENT, NODE, BlockReason, NodeId, NodeType
 
 if TYPE_CHECKING:
     from .statement import Statement  # noqa: F401
-    from ._nodes_factory import TraverseCallback  # noqa: F401
+    from ._nodes_factory import TraverseCallback, WalkEvent  # noqa: F401
 
 
 class Block:
@@ -16,11 +16,13 @@ class Block:
         id: NodeId,
         statement_factory: Callable[[DiGraph, NodeId], "Statement"],
         traverse_function: Callable[[DiGraph, NodeId, "TraverseCallback", "TraverseCallback"], None],
+        walk_function: Callable[..., Iterator["WalkEvent"]],
     ):
         self._graph = graph
         self._id = id
         self._statement_factory = statement_factory
         self._traverse_function = traverse_function
+        self._walk_function = walk_function
 
     @property
     def reason(self) -> BlockReason:
@@ -47,6 +49,13 @@ class Block:
     ):
         self._traverse_function(self._graph, self._id, on_node_entering, on_node_leaving)
 
+    def walk(self, *node_types: NodeType) -> Iterator["WalkEvent"]:
+        '''
+        Yields (event, node) pairs of depth first traversal starting from this node.
+        If node types are given, only blocks or only statements are reported.
+        '''
+        return self._walk_function(self._graph, self._id, *node_types)
+
     def __eq__(self, other: Any) -> bool:
         if other is None:
             return False
@@ -2,7 +2,7 @@ from typing import Dict, TYPE_CHECKING
 from networkx import DiGraph
 
 from veniq.ast_framework import AST, ASTNode
-from .constants import NODE, BLOCK_REASON, ORIGIN_STATEMENT, NodeId
+from .constants import NODE, BLOCK_REASON, ORIGIN_STATEMENT, SUBTREE_ENDS, NODES_BY_TYPE, NodeId, NodeType
 from ._nodes_factory import NodesFactory
 from ._block_extractors import BlockInfo, extract_blocks_from_statement
 
@@ -12,6 +12,8 @@ if TYPE_CHECKING:
 
 def build_block_statement_graph(method_ast: AST) -> "Statement":
     graph = DiGraph()
+    graph.graph[SUBTREE_ENDS] = []
+    graph.graph[NODES_BY_TYPE] = {NodeType.Statement: [], NodeType.Block: []}
     root_index = _build_graph_from_statement(method_ast.get_root(), graph)
     return NodesFactory.create_statement_node(graph, root_index)
 
@@ -20,12 +22,15 @@ def _build_graph_from_statement(statement: ASTNode, graph: DiGraph) -> NodeId:
     new_statement_index = len(graph)
     new_statement_attributes = {NODE: statement}
     graph.add_node(new_statement_index, **new_statement_attributes)
+    graph.graph[SUBTREE_ENDS].append(new_statement_index)
+    graph.graph[NODES_BY_TYPE][NodeType.Statement].append(new_statement_index)
 
     blocks = extract_blocks_from_statement(statement)
     for block in blocks:
         new_block_index = _build_graph_from_block(block, graph)
         graph.add_edge(new_statement_index, new_block_index)
 
+    graph.graph[SUBTREE_ENDS][new_statement_index] = len(graph) - 1
     return new_statement_index
 
 
@@ -35,9 +40,12 @@ def _build_graph_from_block(block_info: BlockInfo, graph: DiGraph) -> NodeId:
     if block_info.origin_statement is not None:
         new_block_attributes[ORIGIN_STATEMENT] = block_info.origin_statement
     graph.add_node(new_block_index, **new_block_attributes)
+    graph.graph[SUBTREE_ENDS].append(new_block_index)
+    graph.graph[NODES_BY_TYPE][NodeType.Block].append(new_block_index)
 
     for statement in block_info.statements:
         new_statement_index = _build_graph_from_statement(statement, graph)
         graph.add_edge(new_block_index, new_statement_index)
 
+    graph.graph[SUBTREE_ENDS][new_block_index] = len(graph) - 1
     return new_block_index
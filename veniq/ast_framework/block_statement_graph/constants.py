@@ -7,6 +7,12 @@ NODE = "node"
 BLOCK_REASON = "block_reason"
 ORIGIN_STATEMENT = "origin_statement"
 
+# networkx graph attributes
+# nodes are numbered in preorder and last descendant of each node is stored in a list
+SUBTREE_ENDS = "subtree_ends"
+# ids of statements and ids of blocks in preorder, stored in a dict by node type
+NODES_BY_TYPE = "nodes_by_type"
+
 
 class NodeType(Enum):
     Statement = "Statement"
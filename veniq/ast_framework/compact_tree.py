@@ -0,0 +1,241 @@
+from array import array
+from collections.abc import Mapping
+from sys import intern
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from veniq.ast_framework.ast_node_type import ASTNodeType
+from veniq.ast_framework._auxiliary_data import attributes_by_node_type
+
+# node types are stored as indexes in this list
+_node_types: List[ASTNodeType] = list(ASTNodeType)
+_node_types_ids: Dict[ASTNodeType, int] = {node_type: index for index, node_type in enumerate(_node_types)}
+
+# a row of attributes table stores values in following order
+_attributes_names_by_node_type: Dict[ASTNodeType, Tuple[str, ...]] = {
+    node_type: tuple(sorted(attributes_names)) for node_type, attributes_names in attributes_by_node_type.items()
+}
+
+_attributes_positions_by_node_type: Dict[ASTNodeType, Dict[str, int]] = {
+    node_type: {attribute_name: position for position, attribute_name in enumerate(attributes_names)}
+    for node_type, attributes_names in _attributes_names_by_node_type.items()
+}
+
+# 0 is used as 'no node' value in parents, first children and next siblings columns,
+# because node indexes start from 1, and as 'no line' value in lines column,
+# because javalang counts lines from 1
+_NO_VALUE = 0
+
+
+class CompactTree:
+    """
+    Columnar storage of an AST.
+    Nodes are numbered from 1 in preorder and described by columns:
+     - node types as a typed array of node types ids
+     - parents, first children and next siblings as typed arrays of node indexes
+     - source code lines as a typed array
+     - table of attributes, where each row is a tuple of values ordered by attributes names.
+    Any integer sequences may serve as columns, e.g. memory views of a file written by save_ast.
+    CompactTree provides the subset of networkx.DiGraph read interface used by AST and ASTNode,
+    so both backends are interchangeable.
+    """
+
+    def __init__(
+        self,
+        node_types: Sequence[int],
+        parents: Sequence[int],
+        first_children: Sequence[int],
+        next_siblings: Sequence[int],
+        lines: Sequence[int],
+        attributes: Sequence[Tuple[Any, ...]],
+    ):
+        self._node_types = node_types
+        self._parents = parents
+        self._first_children = first_children
+        self._next_siblings = next_siblings
+        self._lines = lines
+        self._attributes = attributes
+        # attributes of the whole tree, same as networkx.DiGraph.graph
+        self.graph: Dict[str, Any] = {}
+
+        # None means that all nodes are included
+        # otherwise it is a subgraph sharing columns with the whole tree
+        self._included_nodes: Optional[Sequence[int]] = None
+        self._included_nodes_set: frozenset = frozenset()
+
+    @property
+    def nodes(self) -> "_CompactTreeNodesView":
+        return _CompactTreeNodesView(self)
+
+    @property
+    def succ(self) -> "_CompactTreeSuccessorsView":
+        return _CompactTreeSuccessorsView(self)
+
+    def successors(self, node_index: int) -> Iterator[int]:
+        child_index = self._first_children[node_index]
+        while child_index != _NO_VALUE:
+            if self._is_included(child_index):
+                yield child_index
+            child_index = self._next_siblings[child_index]
+
+    def predecessors(self, node_index: int) -> Iterator[int]:
+        parent_index = self._parents[node_index]
+        if parent_index != _NO_VALUE and self._is_included(parent_index):
+            yield parent_index
+
+    def subgraph(self, nodes: Iterable[int]) -> "CompactTree":
+        subgraph = CompactTree(
+            self._node_types,
+            self._parents,
+            self._first_children,
+            self._next_siblings,
+            self._lines,
+            self._attributes,
+        )
+        subgraph.graph = self.graph
+        subgraph._included_nodes_set = frozenset(node for node in nodes if node in self)
+        subgraph._included_nodes = sorted(subgraph._included_nodes_set)
+        return subgraph
+
+    def get_node_type(self, node_index: int) -> ASTNodeType:
+        return _node_types[self._node_types[node_index]]
+
+    def get_line(self, node_index: int) -> Optional[int]:
+        line = self._lines[node_index]
+        return line if line != _NO_VALUE else None
+
+    def get_attribute(self, node_index: int, attribute_name: str) -> Any:
+        if attribute_name == "node_type":
+            return self.get_node_type(node_index)
+        elif attribute_name == "line":
+            return self.get_line(node_index)
+
+        attributes_positions = _attributes_positions_by_node_type[self.get_node_type(node_index)]
+        return self._attributes[node_index][attributes_positions[attribute_name]]
+
+    def get_attributes_names(self, node_index: int) -> Tuple[str, ...]:
+        return ("node_type", "line") + _attributes_names_by_node_type[self.get_node_type(node_index)]
+
+    def __len__(self) -> int:
+        if self._included_nodes is None:
+            return len(self._node_types) - 1
+        return len(self._included_nodes)
+
+    def __iter__(self) -> Iterator[int]:
+        if self._included_nodes is None:
+            return iter(range(1, len(self._node_types)))
+        return iter(self._included_nodes)
+
+    def __contains__(self, node_index: object) -> bool:
+        if self._included_nodes is None:
+            return isinstance(node_index, int) and 0 < node_index < len(self._node_types)
+        return node_index in self._included_nodes_set
+
+    def _is_included(self, node_index: int) -> bool:
+        return self._included_nodes is None or node_index in self._included_nodes_set
+
+
+class _CompactTreeNodeAttributes(Mapping):
+    __slots__ = ("_tree", "_node_index")
+
+    def __init__(self, tree: CompactTree, node_index: int):
+        self._tree = tree
+        self._node_index = node_index
+
+    def __getitem__(self, attribute_name: str) -> Any:
+        return self._tree.get_attribute(self._node_index, attribute_name)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._tree.get_attributes_names(self._node_index))
+
+    def __len__(self) -> int:
+        return len(self._tree.get_attributes_names(self._node_index))
+
+
+class _CompactTreeNodesView(Mapping):
+    __slots__ = ("_tree",)
+
+    def __init__(self, tree: CompactTree):
+        self._tree = tree
+
+    def __getitem__(self, node_index: int) -> _CompactTreeNodeAttributes:
+        if node_index not in self._tree:
+            raise KeyError(node_index)
+        return _CompactTreeNodeAttributes(self._tree, node_index)
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self._tree)
+
+    def __len__(self) -> int:
+        return len(self._tree)
+
+    def __contains__(self, node_index: object) -> bool:
+        return node_index in self._tree
+
+
+class _CompactTreeSuccessorsView:
+    __slots__ = ("_tree",)
+
+    def __init__(self, tree: CompactTree):
+        self._tree = tree
+
+    def __getitem__(self, node_index: int) -> List[int]:
+        return list(self._tree.successors(node_index))
+
+
+class CompactTreeBuilder:
+    """
+    Collects nodes and edges through the same methods of networkx.DiGraph,
+    which are used for building AST from javalang, and packs them into CompactTree.
+    Nodes must be added with consecutive indexes starting from 1.
+    """
+
+    def __init__(self) -> None:
+        self.nodes: Dict[int, Dict[str, Any]] = {}
+        self._edges: List[Tuple[int, int]] = []
+
+    def add_node(self, node_index: int, **attributes: Any) -> None:
+        self.nodes.setdefault(node_index, {}).update(attributes)
+
+    def add_edge(self, parent_index: int, child_index: int) -> None:
+        self._edges.append((parent_index, child_index))
+
+    def __len__(self) -> int:
+        return len(self.nodes)
+
+    def build(self) -> CompactTree:
+        nodes_qty = len(self.nodes)
+        if set(self.nodes.keys()) != set(range(1, nodes_qty + 1)):
+            raise ValueError("Nodes indexes must be consecutive integers starting from 1.")
+
+        # index 0 is reserved for 'no node' value
+        node_types = array("B", bytes(nodes_qty + 1))
+        lines = array("i", bytes(4 * (nodes_qty + 1)))
+        attributes: List[Tuple[Any, ...]] = [()] * (nodes_qty + 1)
+        for node_index, node_attributes in self.nodes.items():
+            node_type = node_attributes["node_type"]
+            node_types[node_index] = _node_types_ids[node_type]
+            lines[node_index] = node_attributes["line"] or _NO_VALUE
+            attributes[node_index] = tuple(
+                CompactTreeBuilder._intern_strings(node_attributes[attribute_name])
+                for attribute_name in _attributes_names_by_node_type[node_type]
+            )
+
+        parents = array("i", bytes(4 * (nodes_qty + 1)))
+        first_children = array("i", bytes(4 * (nodes_qty + 1)))
+        next_siblings = array("i", bytes(4 * (nodes_qty + 1)))
+        last_children = array("i", bytes(4 * (nodes_qty + 1)))
+        for parent_index, child_index in self._edges:
+            parents[child_index] = parent_index
+            if first_children[parent_index] == _NO_VALUE:
+                first_children[parent_index] = child_index
+            else:
+                next_siblings[last_children[parent_index]] = child_index
+            last_children[parent_index] = child_index
+
+        return CompactTree(node_types, parents, first_children, next_siblings, lines, attributes)
+
+    @staticmethod
+    def _intern_strings(attribute_value: Any) -> Any:
+        if isinstance(attribute_value, str):
+            return intern(attribute_value)
+        return attribute_value
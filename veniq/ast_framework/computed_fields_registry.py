@@ -9,6 +9,8 @@ if TYPE_CHECKING:
 class _ComputedFieldsRegistry:
     def __init__(self) -> None:
         self._registry: Dict["ASTNodeType", Dict[str, Callable[["ASTNode"], Any]]] = defaultdict(dict)
+        # incremented on every change, so users may cache fields and know when to drop the cache
+        self.version = 0
 
     def register(
         self,
@@ -26,6 +28,7 @@ class _ComputedFieldsRegistry:
                 )
 
             computed_fields[name] = compute_field
+        self.version += 1
 
     def get_fields(
         self, node_type: "ASTNodeType"
@@ -34,6 +37,7 @@ class _ComputedFieldsRegistry:
 
     def clear(self) -> None:
         self._registry = defaultdict(dict)
+        self.version += 1
 
     @staticmethod
     def _is_in_interactive_shell() -> bool:
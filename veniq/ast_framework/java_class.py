@@ -15,8 +15,7 @@ if TYPE_CHECKING:
 @deprecated("This functionality must be transmitted to ASTNode")
 class JavaClass(AST):
     def __init__(self, tree: DiGraph, root: int, java_package: 'JavaPackage'):
-        self.tree = tree
-        self.root = root
+        super().__init__(tree, root)
         self._java_package = java_package
 
     @cached_property
@@ -13,8 +13,7 @@ if TYPE_CHECKING:
 @deprecated("This functionality must be transmitted to ASTNode")
 class JavaClassField(AST):
     def __init__(self, tree: DiGraph, root: int, java_class: 'JavaClass'):
-        self.tree = tree
-        self.root = root
+        super().__init__(tree, root)
         self._java_class = java_class
 
     @cached_property
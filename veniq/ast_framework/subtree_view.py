@@ -0,0 +1,91 @@
+from collections.abc import Mapping
+from typing import Any, Dict, Iterable, Iterator, Union
+
+from networkx import DiGraph  # type: ignore
+
+from veniq.ast_framework.compact_tree import CompactTree
+
+
+class SubtreeView:
+    """
+    Read-only view of a subtree of a whole tree, which nodes are numbered in preorder.
+    Nodes of such subtree form an interval of indexes from its root to its last descendant,
+    so the view neither traverses nor copies anything,
+    it checks bounds of the interval and delegates to the whole tree.
+    SubtreeView provides the same subset of networkx.DiGraph read interface as CompactTree.
+    """
+
+    def __init__(self, whole_tree: Union[DiGraph, CompactTree], first_node_index: int, last_node_index: int):
+        self.whole_tree = whole_tree
+        self.first_node_index = first_node_index
+        self.last_node_index = last_node_index
+
+    @property
+    def graph(self) -> Dict[str, Any]:
+        return self.whole_tree.graph
+
+    @property
+    def nodes(self) -> "_SubtreeViewNodes":
+        return _SubtreeViewNodes(self)
+
+    @property
+    def succ(self) -> "_SubtreeViewSuccessors":
+        return _SubtreeViewSuccessors(self)
+
+    def successors(self, node_index: int) -> Iterator[int]:
+        # all children of a node inside the interval are inside it too
+        self._check_node_index(node_index)
+        return iter(self.whole_tree.succ[node_index])
+
+    def predecessors(self, node_index: int) -> Iterator[int]:
+        self._check_node_index(node_index)
+        if node_index == self.first_node_index:
+            return iter(())
+        return self.whole_tree.predecessors(node_index)
+
+    def subgraph(self, nodes: Iterable[int]) -> Any:
+        return self.whole_tree.subgraph([node for node in nodes if node in self])
+
+    def __len__(self) -> int:
+        return self.last_node_index - self.first_node_index + 1
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(range(self.first_node_index, self.last_node_index + 1))
+
+    def __contains__(self, node_index: object) -> bool:
+        return isinstance(node_index, int) and self.first_node_index <= node_index <= self.last_node_index
+
+    def _check_node_index(self, node_index: int) -> None:
+        if node_index not in self:
+            raise KeyError(node_index)
+
+
+class _SubtreeViewNodes(Mapping):
+    __slots__ = ("_view",)
+
+    def __init__(self, view: SubtreeView):
+        self._view = view
+
+    def __getitem__(self, node_index: int) -> Any:
+        self._view._check_node_index(node_index)
+        return self._view.whole_tree.nodes[node_index]
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self._view)
+
+    def __len__(self) -> int:
+        return len(self._view)
+
+    def __contains__(self, node_index: object) -> bool:
+        return node_index in self._view
+
+
+class _SubtreeViewSuccessors:
+    __slots__ = ("_view",)
+
+    def __init__(self, view: SubtreeView):
+        self._view = view
+
+    def __getitem__(self, node_index: int) -> Any:
+        self._view._check_node_index(node_index)
+        return self._view.whole_tree.succ[node_index]
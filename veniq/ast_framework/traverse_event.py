@@ -0,0 +1,11 @@
+from enum import Enum, auto
+
+
+class TraverseEvent(Enum):
+    '''
+    Events of depth first traversal, which are yielded together with nodes by walk methods
+    of AST and of block statement graph nodes.
+    '''
+
+    ENTERING = auto()
+    LEAVING = auto()
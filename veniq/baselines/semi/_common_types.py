@@ -1,40 +1,104 @@
-from dataclasses import dataclass, field
+import sys
 from itertools import accumulate
-from typing import Tuple, Set
+from typing import AbstractSet, Any, Dict, FrozenSet, Optional, Tuple
 
 from veniq.ast_framework import ASTNode
 
 Statement = ASTNode
 
 
-@dataclass
 class StatementSemantic:
-    used_objects: Set[str] = field(default_factory=set)
-    used_methods: Set[str] = field(default_factory=set)
+    """
+    Immutable semantic of a statement: names of used objects and methods.
+    Derived sets of names are computed once on creation.
+    Semantics of statements of a single method may share ids of names,
+    then similarity of them is checked with bitsets.
+    """
 
-    def is_similar(self, other: "StatementSemantic") -> bool:
-        return (
-            len(self.used_objects_unwrapped & other.used_objects_unwrapped) != 0
-            or len(self.used_methods & other.used_methods) != 0
-        )
+    __slots__ = (
+        "used_objects",
+        "used_methods",
+        "used_objects_unwrapped",
+        "used_based_objects",
+        "_names_ids",
+        "_objects_bits",
+        "_methods_bits",
+    )
+
+    used_objects: FrozenSet[str]
+    used_methods: FrozenSet[str]
+
+    # Turns each name from "a.b.c" to "a", "a.b", "a.b.c"
+    used_objects_unwrapped: FrozenSet[str]
+
+    # Turns each name from "a.b.c" to "a"
+    used_based_objects: FrozenSet[str]
 
-    @property
-    def used_objects_unwrapped(self) -> Set[str]:
+    _names_ids: Optional[Dict[str, int]]
+    _objects_bits: int
+    _methods_bits: int
+
+    def __init__(
+        self,
+        used_objects: AbstractSet[str] = frozenset(),
+        used_methods: AbstractSet[str] = frozenset(),
+        names_ids: Optional[Dict[str, int]] = None,
+    ):
         """
-        Turns each name from "a.b.c" to "a", "a.b", "a.b.c"
+        :param names_ids: ids of names shared by semantics, which are compared with each other.
+          New names are added to it.
         """
-        return {
+        used_objects = frozenset(sys.intern(name) for name in used_objects)
+        used_methods = frozenset(sys.intern(name) for name in used_methods)
+        used_objects_unwrapped = frozenset(
             ".".join(name_parts)
-            for object_name in self.used_objects
+            for object_name in used_objects
             for name_parts in accumulate([name_part] for name_part in object_name.split("."))
-        }
+        )
+        object.__setattr__(self, "used_objects", used_objects)
+        object.__setattr__(self, "used_methods", used_methods)
+        object.__setattr__(self, "used_objects_unwrapped", used_objects_unwrapped)
+        object.__setattr__(
+            self, "used_based_objects", frozenset(object_name.split(".")[0] for object_name in used_objects)
+        )
 
-    @property
-    def used_based_objects(self) -> Set[str]:
-        """
-        Turns each name from "a.b.c" to "a"
-        """
-        return {object_name.split(".")[0] for object_name in self.used_objects}
+        object.__setattr__(self, "_names_ids", names_ids)
+        if names_ids is not None:
+            object.__setattr__(self, "_objects_bits", self._names_to_bits(used_objects_unwrapped, names_ids))
+            object.__setattr__(self, "_methods_bits", self._names_to_bits(used_methods, names_ids))
+
+    def is_similar(self, other: "StatementSemantic") -> bool:
+        if self._names_ids is not None and self._names_ids is other._names_ids:
+            return (self._objects_bits & other._objects_bits) != 0 or (self._methods_bits & other._methods_bits) != 0
+
+        return not self.used_objects_unwrapped.isdisjoint(
+            other.used_objects_unwrapped
+        ) or not self.used_methods.isdisjoint(other.used_methods)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        raise AttributeError(f"Cannot assign to field '{name}' of immutable StatementSemantic.")
+
+    def __eq__(self, other: Any) -> bool:
+        if not isinstance(other, StatementSemantic):
+            return NotImplemented
+        return self.used_objects == other.used_objects and self.used_methods == other.used_methods
+
+    def __hash__(self) -> int:
+        return hash((self.used_objects, self.used_methods))
+
+    def __repr__(self) -> str:
+        return f"StatementSemantic(used_objects={set(self.used_objects)}, used_methods={set(self.used_methods)})"
+
+    def __reduce__(self) -> Tuple[Any, ...]:
+        # ids of names are shared only within a single process
+        return StatementSemantic, (self.used_objects, self.used_methods)
+
+    @staticmethod
+    def _names_to_bits(names: FrozenSet[str], names_ids: Dict[str, int]) -> int:
+        bits = 0
+        for name in names:
+            bits |= 1 << names_ids.setdefault(name, len(names_ids))
+        return bits
 
 
 ExtractionOpportunity = Tuple[Statement, ...]
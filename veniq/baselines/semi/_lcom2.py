@@ -1,20 +1,106 @@
-from typing import Dict
-from itertools import combinations
+from typing import Dict, Iterable, Optional, Sequence, Tuple
+
+import numpy as np
 
 from ._common_types import Statement, StatementSemantic
 
 
+class StatementsSimilarity:
+    '''
+    Boolean matrix of pairwise similarity of statements of a method.
+    It is computed once, so LCOM2 of any subset of statements is a masked sum over it.
+    LCOM2 of contiguous extraction opportunities and of the rest statements
+    is computed in O(1) with prefix sums over the matrix.
+    '''
+
+    def __init__(self, statements_semantic: Dict[Statement, StatementSemantic]):
+        self.statements_indexes: Dict[Statement, int] = {
+            statement: index for index, statement in enumerate(statements_semantic)
+        }
+
+        # objects and methods with the same name must not be confused
+        names_indexes: Dict[str, int] = {}
+        statements_names = [
+            [names_indexes.setdefault("o" + name, len(names_indexes)) for name in semantic.used_objects_unwrapped]
+            + [names_indexes.setdefault("m" + name, len(names_indexes)) for name in semantic.used_methods]
+            for semantic in statements_semantic.values()
+        ]
+
+        usage = np.zeros((len(statements_names), len(names_indexes)), dtype=np.int32)
+        for statement_index, names in enumerate(statements_names):
+            usage[statement_index, names] = 1
+
+        self.matrix: np.ndarray = (usage @ usage.T) > 0
+        np.fill_diagonal(self.matrix, False)
+
+        # extraction opportunities never include fake statements,
+        # so contiguous opportunity is a range of statements without fake ones in it
+        self._not_fake = np.array([not statement.is_fake for statement in statements_semantic], dtype=bool)
+        self._not_fake_ranks = np.cumsum(self._not_fake) - 1
+        self._not_fake_ranks[~self._not_fake] = -1
+        self._prefix_sums: Optional[Tuple[np.ndarray, np.ndarray]] = None
+        self._all_similar_pairs = int(self.matrix.sum())
+
+    def opportunity_and_rest_LCOM2(self, statements: Sequence[Statement]) -> Tuple[int, int]:
+        '''
+        Calculates LCOM2 of statements of an extraction opportunity and of the rest statements of the method.
+        '''
+        indexes = np.array([self.statements_indexes[statement] for statement in statements], dtype=np.int64)
+        if not self._is_contiguous(indexes):
+            mask = np.zeros(len(self.statements_indexes), dtype=bool)
+            mask[indexes] = True
+            return self.masked_LCOM2(mask), self.masked_LCOM2(~mask)
+
+        if self._prefix_sums is None:
+            self._prefix_sums = self._calculate_prefix_sums()
+        similar_prefix_sums, rows_prefix_sums = self._prefix_sums
+
+        first, last = indexes[0], indexes[-1] + 1
+        # similar pairs are counted twice, since matrix is symmetric
+        opportunity_similar_pairs = int(
+            similar_prefix_sums[last, last] - similar_prefix_sums[first, last]
+            - similar_prefix_sums[last, first] + similar_prefix_sums[first, first]
+        )
+        opportunity_rows_sum = int(rows_prefix_sums[last] - rows_prefix_sums[first])
+        rest_similar_pairs = self._all_similar_pairs + opportunity_similar_pairs - 2 * opportunity_rows_sum
+
+        rest_statements_qty = len(self.statements_indexes) - len(indexes)
+        return (
+            self._calculate_LCOM2(len(indexes), opportunity_similar_pairs // 2),
+            self._calculate_LCOM2(rest_statements_qty, rest_similar_pairs // 2),
+        )
+
+    def LCOM2(self, statements: Iterable[Statement]) -> int:
+        mask = np.zeros(len(self.statements_indexes), dtype=bool)
+        mask[[self.statements_indexes[statement] for statement in statements]] = True
+        return self.masked_LCOM2(mask)
+
+    def masked_LCOM2(self, mask: np.ndarray) -> int:
+        similar_pairs_qty = int(self.matrix[np.ix_(mask, mask)].sum()) // 2
+        return self._calculate_LCOM2(int(mask.sum()), similar_pairs_qty)
+
+    def _is_contiguous(self, indexes: np.ndarray) -> bool:
+        if len(indexes) == 0:
+            return False
+        ranks = self._not_fake_ranks[indexes]
+        return bool(ranks[0] >= 0 and np.array_equal(ranks, np.arange(ranks[0], ranks[0] + len(ranks))))
+
+    def _calculate_prefix_sums(self) -> Tuple[np.ndarray, np.ndarray]:
+        statements_qty = len(self.statements_indexes)
+        not_fake_matrix = self.matrix & self._not_fake[:, None] & self._not_fake[None, :]
+        similar_prefix_sums = np.zeros((statements_qty + 1, statements_qty + 1), dtype=np.int64)
+        similar_prefix_sums[1:, 1:] = not_fake_matrix.cumsum(axis=0, dtype=np.int64).cumsum(axis=1)
+
+        rows_prefix_sums = np.zeros(statements_qty + 1, dtype=np.int64)
+        rows_prefix_sums[1:] = np.cumsum(self.matrix.sum(axis=1) * self._not_fake)
+        return similar_prefix_sums, rows_prefix_sums
+
+    @staticmethod
+    def _calculate_LCOM2(statements_qty: int, similar_pairs_qty: int) -> int:
+        not_similar_pairs_qty = statements_qty * (statements_qty - 1) // 2 - similar_pairs_qty
+        return max(not_similar_pairs_qty - similar_pairs_qty, 0)
+
+
 def LCOM2(statements_semantic: Dict[Statement, StatementSemantic]) -> int:
-    similar_pairs_qty = 0
-    not_similar_pairs_qty = 0
-    for semantic1, semantic2 in combinations(statements_semantic.values(), 2):
-        if semantic1.is_similar(semantic2):
-            similar_pairs_qty += 1
-        else:
-            not_similar_pairs_qty += 1
-
-    lcom2 = not_similar_pairs_qty - similar_pairs_qty
-    if lcom2 < 0:
-        lcom2 = 0
-
-    return lcom2
+    similarity = StatementsSimilarity(statements_semantic)
+    return similarity.masked_LCOM2(np.ones(len(statements_semantic), dtype=bool))
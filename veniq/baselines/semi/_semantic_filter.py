@@ -1,3 +1,7 @@
+'''
+Reference implementation of the check done by StatementsIndex, which is used by tests to verify it.
+'''
+
 from typing import Dict, Union, Set, List
 
 from ._common_types import StatementSemantic, ExtractionOpportunity, Statement as ExtractionStatement
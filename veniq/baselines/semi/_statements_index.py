@@ -0,0 +1,165 @@
+from typing import Any, Callable, Dict, List, Set, Tuple
+
+from ._common_types import StatementSemantic, ExtractionOpportunity
+from veniq.ast_framework import ASTNode, ASTNodeType, TraverseEvent
+from veniq.ast_framework.block_statement_graph import Block, Statement
+
+
+class StatementsIndex:
+    '''
+    Facts about statements of a method, which are collected by a single traversal of its block statement graph.
+    Statements are numbered in preorder, so opportunities passing syntactic filter are ranges of positions.
+    It allows to apply syntactic and semantic filters to each opportunity in O(size of opportunity)
+    instead of traversing the whole graph.
+    '''
+
+    def __init__(
+        self, method_block_statement_graph: Statement, statements_semantic: Dict[ASTNode, StatementSemantic]
+    ):
+        self._statements_semantic = statements_semantic
+        self._statements: List[ASTNode] = []
+        self._positions: Dict[ASTNode, int] = {}
+        self._parent_statements: List[int] = []
+        self._subtree_ends: List[int] = []
+        self._parent_blocks: List[int] = []
+        self._blocks_ends: List[int] = []
+        self._nearest_cycles: List[int] = []
+
+        self._statements_stack: List[int] = []
+        self._blocks_stack: List[int] = []
+        self._cycles_stack: List[int] = [-1]
+        handlers: Dict[Tuple[TraverseEvent, type], Callable[[Any], None]] = {
+            (TraverseEvent.ENTERING, Statement): self._on_statement_entering,
+            (TraverseEvent.LEAVING, Statement): self._on_statement_leaving,
+            (TraverseEvent.ENTERING, Block): self._on_block_entering,
+            (TraverseEvent.LEAVING, Block): self._on_block_leaving,
+        }
+        for event, node in method_block_statement_graph.walk():
+            handlers[event, type(node)](node)
+
+        # last position, where each object is used
+        self._last_usages: Dict[str, int] = {}
+        for position, statement in enumerate(self._statements):
+            if statement in statements_semantic:
+                for object_name in statements_semantic[statement].used_based_objects:
+                    self._last_usages[object_name] = position
+
+    def is_syntactically_extractable(self, statements: ExtractionOpportunity) -> bool:
+        '''
+        Same as syntactic_filter: statements must be consequent whole statements of a single block.
+        '''
+        if len(statements) == 0:
+            return True
+
+        first = self._positions.get(statements[0])
+        # statements which are not found are not considered by syntactic_filter
+        if first is None:
+            return True
+        parent_block = self._parent_blocks[first]
+        last = first + len(statements) - 1
+        if last > self._blocks_ends[parent_block]:
+            return False
+        if any(self._statements[first + index] != statement for index, statement in enumerate(statements)):
+            return False
+
+        # the last high level statement must be selected till its end
+        high_level_statement = last
+        while self._parent_blocks[high_level_statement] != parent_block:
+            high_level_statement = self._parent_statements[high_level_statement]
+        return self._subtree_ends[high_level_statement] == last
+
+    def is_semantically_extractable(self, statements: ExtractionOpportunity) -> bool:
+        '''
+        Same as semantic_filter for opportunities passed syntactic filter.
+        At most one declared variable may be used after statements and
+        statements breaking cycles must be extracted together with their cycles.
+        '''
+        if len(statements) == 0:
+            return True
+
+        first = self._positions.get(statements[0])
+        if first is None:
+            return self._is_semantically_extractable_scattered(statements)
+
+        last = first + len(statements) - 1
+        declared_variables = set()
+        for position in range(first, last + 1):
+            statement = self._statements[position]
+            if statement.node_type == ASTNodeType.LOCAL_VARIABLE_DECLARATION:
+                declared_variables.update(statement.names)
+            elif (
+                statement.node_type in _control_flow_breaking_statements
+                and self._nearest_cycles[position] < first
+            ):
+                return False
+
+        variables_needed_to_return = [
+            variable for variable in declared_variables if self._last_usages.get(variable, -1) > last
+        ]
+        return len(variables_needed_to_return) <= 1
+
+    def _is_semantically_extractable_scattered(self, statements: ExtractionOpportunity) -> bool:
+        # syntactic filter passes opportunities, which first statement is not in block statement graph,
+        # so all statements of a method are scanned like semantic_filter does
+        statements_set = set(statements)
+        declared_variables: Set[str] = set()
+        variables_needed_to_return: Set[str] = set()
+        is_all_statements_visited = False
+        cycles_stack: List[int] = []
+        for position, statement in enumerate(self._statements):
+            while cycles_stack and self._subtree_ends[cycles_stack[-1]] < position:
+                cycles_stack.pop()
+
+            if statement in statements_set:
+                if statement == statements[-1]:
+                    is_all_statements_visited = True
+
+                if statement.node_type == ASTNodeType.LOCAL_VARIABLE_DECLARATION:
+                    declared_variables.update(statement.names)
+                elif statement.node_type in _cycles_statements:
+                    cycles_stack.append(position)
+                elif not cycles_stack and statement.node_type in _control_flow_breaking_statements:
+                    return False
+            elif is_all_statements_visited and statement in self._statements_semantic:
+                used_based_objects = self._statements_semantic[statement].used_based_objects
+                variables_needed_to_return.update(used_based_objects & declared_variables)
+
+        return len(variables_needed_to_return) <= 1
+
+    def _on_statement_entering(self, statement: Statement) -> None:
+        position = len(self._statements)
+        self._statements.append(statement.node)
+        self._positions[statement.node] = position
+        self._parent_statements.append(self._statements_stack[-1] if self._statements_stack else -1)
+        self._subtree_ends.append(position)
+        # as in syntactic_filter, method declaration is considered to be in its own body
+        self._parent_blocks.append(self._blocks_stack[-1] if self._blocks_stack else len(self._blocks_ends))
+        self._nearest_cycles.append(self._cycles_stack[-1])
+
+        self._statements_stack.append(position)
+        if statement.node.node_type in _cycles_statements:
+            self._cycles_stack.append(position)
+
+    def _on_statement_leaving(self, statement: Statement) -> None:
+        position = self._statements_stack.pop()
+        self._subtree_ends[position] = len(self._statements) - 1
+        if self._cycles_stack[-1] == position:
+            self._cycles_stack.pop()
+
+    def _on_block_entering(self, block: Block) -> None:
+        self._blocks_stack.append(len(self._blocks_ends))
+        self._blocks_ends.append(-1)
+
+    def _on_block_leaving(self, block: Block) -> None:
+        self._blocks_ends[self._blocks_stack.pop()] = len(self._statements) - 1
+
+
+# following statements are closely tight with control flow and cannot be extracted easily
+_control_flow_breaking_statements = {ASTNodeType.BREAK_STATEMENT, ASTNodeType.CONTINUE_STATEMENT}
+
+# only cycles may have _control_flow_breaking_statements in subtrees
+_cycles_statements = {
+    ASTNodeType.DO_STATEMENT,
+    ASTNodeType.FOR_STATEMENT,
+    ASTNodeType.WHILE_STATEMENT,
+}
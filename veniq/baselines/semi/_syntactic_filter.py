@@ -1,3 +1,7 @@
+'''
+Reference implementation of the check done by StatementsIndex, which is used by tests to verify it.
+'''
+
 from typing import List, Optional, Union
 
 from ._common_types import ExtractionOpportunity
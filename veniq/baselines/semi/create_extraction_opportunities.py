@@ -1,21 +1,56 @@
-from typing import Dict, List, Optional
+from typing import Dict, Iterator, List, Optional, Set, Tuple
 
 from veniq.ast_framework import AST
+from veniq.utils.timeout import Deadline, check_deadline
 from .extract_semantic import extract_method_statements_semantic
 from ._common_cli import common_cli
 from ._common_types import Statement, StatementSemantic, ExtractionOpportunity
 
 
 def create_extraction_opportunities(
-    statements_semantic: Dict[Statement, StatementSemantic]
-) -> List[ExtractionOpportunity]:
-    extraction_opportunities: List[ExtractionOpportunity] = []
-    for step in range(1, len(statements_semantic) + 1):
-        for extraction_opportunity in _ExtractionOpportunityIterator(statements_semantic, step):
-            if extraction_opportunity and extraction_opportunity not in extraction_opportunities:
-                extraction_opportunities.append(extraction_opportunity)
-
-    return extraction_opportunities
+    statements_semantic: Dict[Statement, StatementSemantic], deadline: Optional[Deadline] = None
+) -> Iterator[ExtractionOpportunity]:
+    """
+    Lazily yields extraction opportunities, each of them only once.
+    Opportunity consists of not fake statements of a range,
+    so it is identified by indexes of its first and last statements.
+    """
+    statements = list(statements_semantic.keys())
+    next_not_fake_indexes, previous_not_fake_indexes = _get_nearest_not_fake_statements(statements)
+
+    created_opportunities: Set[Tuple[int, int]] = set()
+    for step in range(1, len(statements) + 1):
+        for first_statement_index, last_statement_index in _ExtractionOpportunityIterator(statements_semantic, step):
+            check_deadline(deadline)
+            first_statement_index = next_not_fake_indexes[first_statement_index]
+            last_statement_index = previous_not_fake_indexes[last_statement_index + 1]
+            if first_statement_index > last_statement_index:
+                continue
+
+            opportunity_key = (first_statement_index, last_statement_index)
+            if opportunity_key not in created_opportunities:
+                created_opportunities.add(opportunity_key)
+                yield tuple(
+                    statements[i]
+                    for i in range(first_statement_index, last_statement_index + 1)
+                    if not statements[i].is_fake
+                )
+
+
+def _get_nearest_not_fake_statements(statements: List[Statement]) -> Tuple[List[int], List[int]]:
+    """
+    For each index i of statement returns index of the first not fake statement starting from i
+    and for each index i + 1 returns index of the last not fake statement not after i.
+    """
+    next_not_fake_indexes = [len(statements)] * (len(statements) + 1)
+    for index in range(len(statements) - 1, -1, -1):
+        next_not_fake_indexes[index] = index if not statements[index].is_fake else next_not_fake_indexes[index + 1]
+
+    previous_not_fake_indexes = [-1] * (len(statements) + 1)
+    for index, statement in enumerate(statements):
+        previous_not_fake_indexes[index + 1] = index if not statement.is_fake else previous_not_fake_indexes[index]
+
+    return next_not_fake_indexes, previous_not_fake_indexes
 
 
 class _ExtractionOpportunityIterator:
@@ -29,7 +64,7 @@ class _ExtractionOpportunityIterator:
     def __iter__(self):
         return self
 
-    def __next__(self) -> ExtractionOpportunity:
+    def __next__(self) -> Tuple[int, int]:
         if self._statement_index >= len(self._statements_semantic):
             raise StopIteration
 
@@ -59,11 +94,7 @@ class _ExtractionOpportunityIterator:
         if last_statement_index is None:
             last_statement_index = len(self._statements) - fails_qty - 1
 
-        return tuple(
-            self._statements[i]
-            for i in range(first_statement_index, last_statement_index + 1)
-            if not self._statements[i].is_fake
-        )
+        return first_statement_index, last_statement_index
 
     def _get_statement_semantic(self, statement_index: int) -> StatementSemantic:
         current_statement = self._statements[statement_index]
@@ -72,7 +103,7 @@ class _ExtractionOpportunityIterator:
 
 def _print_extraction_opportunities(method_ast: AST, filepath: str, class_name: str, method_name: str):
     statements_semantic = extract_method_statements_semantic(method_ast)
-    extraction_opportunities = create_extraction_opportunities(statements_semantic)
+    extraction_opportunities = list(create_extraction_opportunities(statements_semantic))
     print(
         f"{len(extraction_opportunities)} opportunities found in method {method_name} "
         f"in class {class_name} in file {filepath}:"
@@ -1,24 +1,30 @@
 from collections import OrderedDict
-from typing import Callable, Dict, Union
+from typing import Any, Callable, Dict, Optional, Set, Tuple
 
-from veniq.ast_framework import AST, ASTNode, ASTNodeType
+from veniq.ast_framework import AST, ASTNode, ASTNodeType, TraverseEvent
 from veniq.ast_framework.block_statement_graph import build_block_statement_graph, Block, Statement
 from veniq.ast_framework.block_statement_graph.constants import BlockReason
+from veniq.utils.timeout import Deadline, check_deadline
 from ._common_cli import common_cli
 from ._common_types import Statement as ExtractionStatement, StatementSemantic
 
 
-def extract_method_statements_semantic(method_ast: AST) -> Dict[ExtractionStatement, StatementSemantic]:
+def extract_method_statements_semantic(
+    method_ast: AST, deadline: Optional[Deadline] = None
+) -> Dict[ExtractionStatement, StatementSemantic]:
     block_statement_graph = build_block_statement_graph(method_ast)
-    semantic_extractor = _SemanticExtractor(method_ast)
-    block_statement_graph.traverse(semantic_extractor.on_node_entering, semantic_extractor.on_node_leaving)
+    semantic_extractor = _SemanticExtractor(method_ast, deadline)
+    semantic_extractor.extract(block_statement_graph)
     return semantic_extractor.statements_semantic
 
 
 class _SemanticExtractor:
-    def __init__(self, method_ast: AST):
+    def __init__(self, method_ast: AST, deadline: Optional[Deadline] = None):
         self.statements_semantic: Dict[ExtractionStatement, StatementSemantic] = OrderedDict()
         self._ast = method_ast
+        self._deadline = deadline
+        # all semantics of a method share ids of names, so they are compared with bitsets
+        self._names_ids: Dict[str, int] = {}
 
         self._semantic_extractors: Dict[ASTNodeType, Callable[[ExtractionStatement], StatementSemantic]] = {
             ASTNodeType.FOR_STATEMENT: self._extract_semantic_from_field_factory("control"),
@@ -44,23 +50,20 @@ class _SemanticExtractor:
             ASTNodeType.STATEMENT: lambda _: StatementSemantic(),
         }
 
-    def on_node_entering(self, node: Union[Block, Statement]) -> None:
-        if isinstance(node, Block):
-            self._on_block_entering(node)
-        elif isinstance(node, Statement):
-            self._on_statement_entering(node)
-        else:
-            raise ValueError(f"Unexpected node type {type(node)}.")
-
-    def on_node_leaving(self, node: Union[Block, Statement]) -> None:
-        if isinstance(node, Block):
-            self._on_block_leaving(node)
-        elif isinstance(node, Statement):
-            pass
-        else:
-            raise ValueError(f"Unexpected node type {type(node)}.")
+    def extract(self, method_block_statement_graph: Statement) -> None:
+        # handlers are looked up by event and kind of a node, leaving statements is not handled
+        handlers: Dict[Tuple[TraverseEvent, type], Callable[[Any], None]] = {
+            (TraverseEvent.ENTERING, Statement): self._on_statement_entering,
+            (TraverseEvent.ENTERING, Block): self._on_block_entering,
+            (TraverseEvent.LEAVING, Block): self._on_block_leaving,
+        }
+        for event, node in method_block_statement_graph.walk():
+            handler = handlers.get((event, type(node)))
+            if handler is not None:
+                handler(node)
 
     def _on_statement_entering(self, statement: Statement) -> None:
+        check_deadline(self._deadline)
         extraction_statement: ExtractionStatement = statement.node
 
         # Statements that does not bring any semantic are skiped
@@ -125,7 +128,8 @@ class _SemanticExtractor:
             self.statements_semantic[self._ast.create_fake_node()] = StatementSemantic()
 
     def _extract_semantic_from_ast(self, ast_root: ASTNode) -> StatementSemantic:
-        statement_semantic = StatementSemantic()
+        used_objects: Set[str] = set()
+        used_methods: Set[str] = set()
         for node in self._ast.get_subtree(ast_root).get_proxy_nodes(
             ASTNodeType.MEMBER_REFERENCE, ASTNodeType.METHOD_INVOCATION, ASTNodeType.VARIABLE_DECLARATOR
         ):
@@ -133,20 +137,21 @@ class _SemanticExtractor:
                 used_object_name = node.member
                 if node.qualifier is not None:
                     used_object_name = node.qualifier + "." + used_object_name
-                statement_semantic.used_objects.add(used_object_name)
+                used_objects.add(used_object_name)
             elif node.node_type == ASTNodeType.METHOD_INVOCATION:
-                statement_semantic.used_methods.add(node.member)
+                used_methods.add(node.member)
                 if node.qualifier is not None:
-                    statement_semantic.used_objects.add(node.qualifier)
+                    used_objects.add(node.qualifier)
             elif node.node_type == ASTNodeType.VARIABLE_DECLARATOR:
-                statement_semantic.used_objects.add(node.name)
+                used_objects.add(node.name)
 
-        return statement_semantic
+        return StatementSemantic(used_objects, used_methods, self._names_ids)
 
     def _extract_semantic_from_try_resource(self, try_resource: ASTNode) -> StatementSemantic:
         statement_semantic = self._extract_semantic_from_ast(try_resource)
-        statement_semantic.used_objects.add(try_resource.name)
-        return statement_semantic
+        return StatementSemantic(
+            statement_semantic.used_objects | {try_resource.name}, statement_semantic.used_methods, self._names_ids
+        )
 
     def _extract_semantic_from_field_factory(self, field_name) -> Callable[[ASTNode], StatementSemantic]:
         return lambda node: self._extract_semantic_from_ast(getattr(node, field_name))
@@ -1,27 +1,30 @@
-from typing import Dict, List
+from typing import Dict, Iterable, List, Optional
 
 from .extract_semantic import extract_method_statements_semantic
 from .create_extraction_opportunities import create_extraction_opportunities
-from ._syntactic_filter import syntactic_filter
-from ._semantic_filter import semantic_filter
+from ._statements_index import StatementsIndex
 from ._common_types import Statement, StatementSemantic, ExtractionOpportunity
 from ._common_cli import common_cli
 from veniq.ast_framework import AST
 from veniq.ast_framework.block_statement_graph import build_block_statement_graph
+from veniq.utils.timeout import Deadline, check_deadline
 
 
 def filter_extraction_opportunities(
-    extraction_opportunities: List[ExtractionOpportunity],
+    extraction_opportunities: Iterable[ExtractionOpportunity],
     statements_semantic: Dict[Statement, StatementSemantic],
     method_ast: AST,
+    deadline: Optional[Deadline] = None,
 ) -> List[ExtractionOpportunity]:
-    block_statement_graph = build_block_statement_graph(method_ast)
-    extraction_opportunities_filtered = filter(
-        lambda extraction_opportunity: syntactic_filter(extraction_opportunity, block_statement_graph)
-        and semantic_filter(extraction_opportunity, statements_semantic, block_statement_graph),
-        extraction_opportunities,
-    )
-    return list(extraction_opportunities_filtered)
+    # block statement graph is traversed once, then each opportunity is checked by its statements only
+    statements_index = StatementsIndex(build_block_statement_graph(method_ast), statements_semantic)
+    extraction_opportunities_filtered = []
+    for extraction_opportunity in extraction_opportunities:
+        check_deadline(deadline)
+        if statements_index.is_syntactically_extractable(extraction_opportunity) \
+                and statements_index.is_semantically_extractable(extraction_opportunity):
+            extraction_opportunities_filtered.append(extraction_opportunity)
+    return extraction_opportunities_filtered
 
 
 def _print_extraction_opportunities(method_ast: AST, filepath: str, class_name: str, method_name: str):
@@ -1,12 +1,16 @@
-from typing import List, Dict, Tuple, Iterator, NamedTuple
+from heapq import heappush, heappushpop
+from typing import List, Dict, Set, Tuple, Iterator, NamedTuple, Optional
+
+import numpy as np
 
 from veniq.ast_framework import AST
+from veniq.utils.timeout import Deadline, check_deadline
 from .extract_semantic import extract_method_statements_semantic
 from .create_extraction_opportunities import create_extraction_opportunities
 from .filter_extraction_opportunities import filter_extraction_opportunities
 from ._common_types import Statement, StatementSemantic, ExtractionOpportunity, OpportunityBenefit
 from ._common_cli import common_cli
-from ._lcom2 import LCOM2
+from ._lcom2 import StatementsSimilarity
 
 
 class ExtractionOpportunityGroupSettings(NamedTuple):
@@ -21,10 +25,14 @@ class ExtractionOpportunityGroup:
         extraction_opportunity: ExtractionOpportunity,
         statements_semantic: Dict[Statement, StatementSemantic],
         settings: ExtractionOpportunityGroupSettings = ExtractionOpportunityGroupSettings(),
+        statements_similarity: Optional[StatementsSimilarity] = None,
     ):
         self._optimal_opportunity = extraction_opportunity
         self._statements_semantic = statements_semantic
-        self._all_statements_benefit = LCOM2(statements_semantic)
+        if statements_similarity is None:
+            statements_similarity = StatementsSimilarity(statements_semantic)
+        self._statements_similarity = statements_similarity
+        self._all_statements_benefit = _calculate_all_statements_benefit(statements_similarity)
 
         self._opportunities_to_benefit: Dict[ExtractionOpportunity, OpportunityBenefit] = {
             extraction_opportunity: self._calculate_benefit(extraction_opportunity)
@@ -81,60 +89,118 @@ class ExtractionOpportunityGroup:
         return shared_statements_qty / max_size > self._settings.min_overlap
 
     def _calculate_benefit(self, extraction_opportunity: ExtractionOpportunity) -> OpportunityBenefit:
-        opportunity_semantic = {
-            statement: self._statements_semantic[statement] for statement in extraction_opportunity
-        }
-        opportunity_benefit = LCOM2(opportunity_semantic)
-
-        rest_statements_semantic = {
-            statement: self._statements_semantic[statement]
-            for statement in self._statements_semantic
-            if statement not in extraction_opportunity
-        }
-        rest_statements_benefit = LCOM2(rest_statements_semantic)
-
-        return self._all_statements_benefit - max(opportunity_benefit, rest_statements_benefit)
+        return _calculate_benefit(self._statements_similarity, self._all_statements_benefit, extraction_opportunity)
 
 
 def rank_extraction_opportunities(
     statements_semantic: Dict[Statement, StatementSemantic],
     extraction_opportunities: List[ExtractionOpportunity],
+    top_k: Optional[int] = None,
+    deadline: Optional[Deadline] = None,
 ) -> List[ExtractionOpportunityGroup]:
+    '''
+    Groups extraction opportunities and sorts groups by their benefit.
+    :param top_k: if set, only top_k best groups are returned, they are the same as
+        first top_k groups of the full ranking. Benefits of all opportunities are still calculated
+        to order them, only grouping is stopped, when left opportunities cannot get into top
+    :param deadline: ranking is stopped with TerminateExecution, when it expires
+    '''
+    if top_k is not None and top_k < 0:
+        raise ValueError(f"'top_k' must be non-negative, but {top_k} was provided.")
+
+    # similarity of statements is computed once and shared by all groups
+    statements_similarity = StatementsSimilarity(statements_semantic)
+
+    # equal opportunities share a key, so used ones are removed without hashing statements again
+    keys: Dict[ExtractionOpportunity, int] = {}
+    opportunities_keys = [
+        keys.setdefault(opportunity, index) for index, opportunity in enumerate(extraction_opportunities)
+    ]
+    used_keys: Set[int] = set()
+
+    # benefit of a group is a benefit of one of its opportunities, so it cannot exceed
+    # the best benefit of opportunities left for the next groups
+    if top_k is not None:
+        all_statements_benefit = _calculate_all_statements_benefit(statements_similarity)
+        opportunities_benefits = [
+            _calculate_benefit(statements_similarity, all_statements_benefit, opportunity)
+            for opportunity in extraction_opportunities
+        ]
+        opportunities_by_benefit = sorted(
+            range(len(extraction_opportunities)), key=lambda index: opportunities_benefits[index], reverse=True
+        )
+        best_left_opportunity = 0
+        top_benefits: List[OpportunityBenefit] = []
+
     extraction_opportunities_groups: List[ExtractionOpportunityGroup] = []
-    while len(extraction_opportunities) > 0:
-        new_extraction_opportunity_group = _create_extraction_opportunities_group(
-            statements_semantic, extraction_opportunities
+    left_opportunities = list(range(len(extraction_opportunities)))
+    while len(left_opportunities) > 0:
+        check_deadline(deadline)
+        if top_k is not None:
+            while opportunities_keys[opportunities_by_benefit[best_left_opportunity]] in used_keys:
+                best_left_opportunity += 1
+            best_left_benefit = opportunities_benefits[opportunities_by_benefit[best_left_opportunity]]
+            # groups created later are placed after groups with the same benefit
+            if len(top_benefits) == top_k and (top_k == 0 or top_benefits[0] >= best_left_benefit):
+                break
+
+        new_extraction_opportunity_group, used_opportunities = _create_extraction_opportunities_group(
+            statements_semantic,
+            [extraction_opportunities[index] for index in left_opportunities],
+            statements_similarity,
         )
         extraction_opportunities_groups.append(new_extraction_opportunity_group)
+        if top_k is not None:
+            if len(top_benefits) < top_k:
+                heappush(top_benefits, new_extraction_opportunity_group.benefit)
+            else:
+                heappushpop(top_benefits, new_extraction_opportunity_group.benefit)
 
-        used_opportunities = {
-            opportunity for opportunity, _ in new_extraction_opportunity_group.opportunities
-        }
-        extraction_opportunities = [
-            opportunity for opportunity in extraction_opportunities if opportunity not in used_opportunities
-        ]
+        used_keys.update(opportunities_keys[left_opportunities[index]] for index in used_opportunities)
+        left_opportunities = [index for index in left_opportunities if opportunities_keys[index] not in used_keys]
 
-    return sorted(
-        extraction_opportunities_groups,
+    extraction_opportunities_groups.sort(
         key=lambda extraction_opportunity_group: extraction_opportunity_group.benefit,
         reverse=True,
     )
+    return extraction_opportunities_groups[:top_k]
 
 
 def _create_extraction_opportunities_group(
     statements_semantic: Dict[Statement, StatementSemantic],
     extraction_opportunities: List[ExtractionOpportunity],
-) -> ExtractionOpportunityGroup:
+    statements_similarity: StatementsSimilarity,
+) -> Tuple[ExtractionOpportunityGroup, List[int]]:
+    '''
+    Returns a group and indexes of extraction opportunities added to it.
+    '''
     assert len(extraction_opportunities) > 0, "Cannot create a group from empty list of opportunities."
 
     extraction_opportunity_group = ExtractionOpportunityGroup(
-        extraction_opportunities[0], statements_semantic
+        extraction_opportunities[0], statements_semantic, statements_similarity=statements_similarity
     )
-    for extraction_opportunity in extraction_opportunities[1:]:
+    used_opportunities = [0]
+    for index, extraction_opportunity in enumerate(extraction_opportunities[1:], 1):
         if extraction_opportunity_group.is_allowed_to_add_opportunity(extraction_opportunity):
             extraction_opportunity_group.add_extraction_opportunity(extraction_opportunity)
+            used_opportunities.append(index)
+
+    return extraction_opportunity_group, used_opportunities
+
+
+def _calculate_all_statements_benefit(statements_similarity: StatementsSimilarity) -> OpportunityBenefit:
+    return statements_similarity.masked_LCOM2(np.ones(len(statements_similarity.statements_indexes), dtype=bool))
+
+
+def _calculate_benefit(
+    statements_similarity: StatementsSimilarity,
+    all_statements_benefit: OpportunityBenefit,
+    extraction_opportunity: ExtractionOpportunity,
+) -> OpportunityBenefit:
+    opportunity_benefit, rest_statements_benefit = \
+        statements_similarity.opportunity_and_rest_LCOM2(extraction_opportunity)
 
-    return extraction_opportunity_group
+    return all_statements_benefit - max(opportunity_benefit, rest_statements_benefit)
 
 
 def _print_extraction_opportunities(
@@ -1,13 +1,14 @@
-from typing import List, Tuple
-from tempfile import NamedTemporaryFile
+from collections import deque
+from typing import Deque, Iterable, Iterator, List, Optional, Tuple
 from functools import reduce
+from itertools import islice
 from operator import itemgetter
 import os
 
-from javalang.parser import JavaSyntaxError
+from javalang.parse import parse
+from pebble import ProcessPool, ProcessFuture
 
-from veniq.utils.ast_builder import build_ast
-from veniq.ast_framework import AST, ASTNodeType
+from veniq.ast_framework import AST, ASTNode, ASTNodeType
 from veniq.baselines.semi.rank_extraction_opportunities import \
     rank_extraction_opportunities, ExtractionOpportunityGroup
 from veniq.baselines.semi.create_extraction_opportunities import \
@@ -18,6 +19,7 @@ from veniq.baselines.semi.filter_extraction_opportunities import \
     filter_extraction_opportunities
 from veniq.baselines.semi._common_types import ExtractionOpportunity,\
     OpportunityBenefit
+from veniq.utils.timeout import Deadline
 
 
 EMORange = Tuple[int, int]
@@ -29,18 +31,33 @@ def _add_class_decl_wrap(method_decl: List[str]) -> List[str]:
 
 
 def _get_method_subtree(class_decl: List[str]) -> AST:
-    with NamedTemporaryFile(delete=False) as f:
-        _name = f.name
-        f.write('\n'.join(class_decl).encode())
-    try:
-        javalang_ast = build_ast(_name)
-        ast = AST.build_from_javalang(javalang_ast)
-        os.unlink(_name)
-    except JavaSyntaxError as e:
-        os.unlink(_name)
-        raise e
-
+    ast = AST.build_from_javalang(parse('\n'.join(class_decl)))
     class_node = list(ast.get_proxy_nodes(ASTNodeType.CLASS_DECLARATION))[0]
+    return _get_class_method_subtree(ast, class_node)
+
+
+def _get_methods_subtrees(classes_decls: List[List[str]]) -> List[Tuple[AST, ASTNode, int]]:
+    '''
+    Parses several fake classes as a single compilation unit.
+    Returns AST, class declaration node and number of lines before it for each class.
+    '''
+    ast = AST.build_from_javalang(parse('\n'.join(line for class_decl in classes_decls for line in class_decl)))
+    classes_nodes = list(ast.get_root().types)
+    lines_offsets = [0]
+    for class_decl in classes_decls[:-1]:
+        lines_offsets.append(lines_offsets[-1] + len(class_decl))
+
+    # brackets of one method may be unbalanced, so classes are checked to be as expected
+    if len(classes_nodes) != len(classes_decls) or any(
+        class_node.line != line_offset + 1 for class_node, line_offset in zip(classes_nodes, lines_offsets)
+    ):
+        raise ValueError("Methods declarations are not parsed into separate classes.")
+    return [
+        (ast, class_node, line_offset) for class_node, line_offset in zip(classes_nodes, lines_offsets)
+    ]
+
+
+def _get_class_method_subtree(ast: AST, class_node: ASTNode) -> AST:
     objects_to_consider = list(class_node.methods) + \
         list(class_node.constructors)
 
@@ -49,14 +66,16 @@ def _get_method_subtree(class_decl: List[str]) -> AST:
     return ast_subtree
 
 
-def _find_EMO_groups(method_subtree: AST) -> List[ExtractionOpportunityGroup]:
-    statements_semantic = extract_method_statements_semantic(method_subtree)
+def _find_EMO_groups(
+        method_subtree: AST, deadline: Optional[Deadline] = None) -> List[ExtractionOpportunityGroup]:
+    statements_semantic = extract_method_statements_semantic(method_subtree, deadline)
     extraction_opportunities = create_extraction_opportunities(
-        statements_semantic)
+        statements_semantic, deadline)
     filtered_extraction_opportunities = filter_extraction_opportunities(
-        extraction_opportunities, statements_semantic, method_subtree)
+        extraction_opportunities, statements_semantic, method_subtree, deadline)
+    # top_k is not used, since opportunities of all groups are recommended
     extraction_opportunities_groups = rank_extraction_opportunities(
-        statements_semantic, filtered_extraction_opportunities
+        statements_semantic, filtered_extraction_opportunities, deadline=deadline
     )
 
     return extraction_opportunities_groups
@@ -79,11 +98,12 @@ def _find_closing_brackets(extraction_till_end: List[str], num_extr_lines_orig:
 
 
 def _convert_ExtractionOpportunity_to_EMO(
-        extr_opport: ExtractionOpportunity, class_decl: List[str]) -> EMORange:
+        extr_opport: ExtractionOpportunity, class_decl: List[str], line_offset: int = 0) -> EMORange:
     ''' Converts extraction opportunity of type ExtractionOpportunity from
     veniq.baselines.semi._common_types to type EMO defined here.
+    line_offset is a number of lines before class_decl in the parsed source code.
     '''
-    lines = [node.line for node in extr_opport]
+    lines = [node.line - line_offset for node in extr_opport]
     # subtract 1 because we count from 0
     start_line_opportunity = min(lines) - 1
     end_line_opportunity = max(lines) - 1
@@ -96,19 +116,95 @@ def _convert_ExtractionOpportunity_to_EMO(
     return (start_line_opportunity, start_line_opportunity + addit_lines_brackets)
 
 
-def recommend_for_method(method_decl_lines: List[str]) -> List[EMORange]:
+def recommend_for_method(method_decl_lines: List[str], deadline: Optional[Deadline] = None) -> List[EMORange]:
     '''
     Takes method declaration in form of a list of strings,
     outputs list of EMORanges in the order of decreasing recommendation.
     EMORange is a (start_line_extraction, end_line_extraction)
     (the range is inclusive).
+    :param deadline: search of EMOs is stopped with TerminateExecution, when it expires
     '''
     class_decl_fake = _add_class_decl_wrap(method_decl_lines)
+    method_subtree = _get_method_subtree(class_decl_fake)
+    return _recommend_for_method_subtree(method_subtree, class_decl_fake, deadline=deadline)
+
+
+def recommend_for_methods(
+    methods_decls_lines: Iterable[List[str]], processes: Optional[int] = None, batch_size: int = 64
+) -> Iterator[Optional[List[EMORange]]]:
+    '''
+    Does the same as recommend_for_method for each of methods declarations.
+    Methods are parsed in batches as a single compilation unit
+    and batches are processed by a pool of processes.
+    Results are yielded in the order of methods,
+    None is yielded for methods, which cannot be processed.
+    :param processes: number of processes, if 1 methods are processed in the current one.
+      Number of CPUs is used by default.
+    :param batch_size: number of methods parsed together
+    '''
+    methods_decls_lines = iter(methods_decls_lines)
+    batches = iter(lambda: list(islice(methods_decls_lines, batch_size)), [])
+    processes = processes or os.cpu_count() or 1
+    if processes == 1:
+        for batch in batches:
+            yield from _recommend_for_batch(batch)
+        return
+
+    with ProcessPool(max_workers=processes) as pool:
+        scheduled_batches: Deque[ProcessFuture] = deque()
+        for batch in batches:
+            scheduled_batches.append(pool.schedule(_recommend_for_batch, args=[batch]))
+            # input is consumed lazily, so only a few batches are kept in memory
+            if len(scheduled_batches) > 2 * processes:
+                yield from scheduled_batches.popleft().result()
+        while scheduled_batches:
+            yield from scheduled_batches.popleft().result()
+
+
+def _recommend_for_batch(methods_decls_lines: List[List[str]]) -> List[Optional[List[EMORange]]]:
+    classes_decls = [_add_class_decl_wrap(method_decl_lines) for method_decl_lines in methods_decls_lines]
+    results: List[Optional[List[EMORange]]] = []
+    for method_decl_lines, class_decl, parsed_class in zip(
+        methods_decls_lines, classes_decls, _parse_classes(classes_decls)
+    ):
+        if parsed_class is None:
+            results.append(_try_recommend_for_method(method_decl_lines))
+            continue
+
+        ast, class_node, line_offset = parsed_class
+        try:
+            method_subtree = _get_class_method_subtree(ast, class_node)
+            results.append(_recommend_for_method_subtree(method_subtree, class_decl, line_offset))
+        except Exception:
+            results.append(None)
+    return results
+
+
+def _parse_classes(classes_decls: List[List[str]]) -> List[Optional[Tuple[AST, ASTNode, int]]]:
+    '''
+    Parses classes together, if it fails, halves of them are parsed separately.
+    None is returned for a class, which cannot be parsed together with others.
+    '''
+    try:
+        return list(_get_methods_subtrees(classes_decls))
+    except Exception:
+        if len(classes_decls) == 1:
+            return [None]
+        middle = len(classes_decls) // 2
+        return _parse_classes(classes_decls[:middle]) + _parse_classes(classes_decls[middle:])
+
+
+def _try_recommend_for_method(method_decl_lines: List[str]) -> Optional[List[EMORange]]:
     try:
-        method_subtree = _get_method_subtree(class_decl_fake)
-    except JavaSyntaxError as e:
-        raise e
-    emo_groups_semi = _find_EMO_groups(method_subtree)
+        return recommend_for_method(method_decl_lines)
+    except Exception:
+        return None
+
+
+def _recommend_for_method_subtree(
+        method_subtree: AST, class_decl_fake: List[str], line_offset: int = 0,
+        deadline: Optional[Deadline] = None) -> List[EMORange]:
+    emo_groups_semi = _find_EMO_groups(method_subtree, deadline)
     if emo_groups_semi is None or emo_groups_semi == []:
         return []
 
@@ -118,7 +214,7 @@ def recommend_for_method(method_decl_lines: List[str]) -> List[EMORange]:
     all_opportunities_semi_ranked = sorted(all_opportunities_semi, key=itemgetter(1),
                                            reverse=True)
     emo_ranges_ranked = [_convert_ExtractionOpportunity_to_EMO(
-        x[0], class_decl_fake) for x in all_opportunities_semi_ranked]
+        x[0], class_decl_fake, line_offset) for x in all_opportunities_semi_ranked]
 
     # subtract 1 because we added fake class declaration line
     emo_ranges_ranked = [(x[0] - 1, x[1] - 1) for x in emo_ranges_ranked]
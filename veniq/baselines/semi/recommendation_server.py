@@ -0,0 +1,152 @@
+'''
+Long-running server, which recommends EMOs for methods with recommend_for_method.
+It keeps a pool of warmed up worker processes, so requests do not pay for interpreter startup and imports.
+
+Requests and responses are JSON lines read from stdin and written to stdout.
+Request is an object with fields:
+ - "id": any value, which is copied to the response
+ - "method": method declaration as a string or as a list of lines
+ - "timeout": optional deadline of the request in seconds
+Response contains "id" and either "emos" with a list of [start, end] ranges or "error" with a message.
+Deadline is checked by the search of EMOs itself, so warm workers are not killed on expiration.
+Workers are killed only if they exceed a generous backstop timeout, e.g. while parsing.
+Responses are written as soon as requests are processed, so their order may differ from the order of requests.
+'''
+
+import json
+import os
+import sys
+import threading
+from argparse import ArgumentParser
+from concurrent.futures import TimeoutError
+from functools import partial
+from typing import Any, Dict, List, Optional, TextIO, Tuple
+
+from pebble import ProcessPool, ProcessFuture, ProcessExpired
+
+from veniq.baselines.semi.recommend import recommend_for_method
+from veniq.utils.timeout import Deadline, TerminateExecution
+
+
+class RecommendationServer:
+    def __init__(self, workers: int, max_pending_requests: int, default_timeout: Optional[float] = None):
+        '''
+        :param workers: number of worker processes
+        :param max_pending_requests: requests are not read, while this number of them is being processed
+        :param default_timeout: deadline in seconds for requests without it, if None there is no deadline
+        '''
+        self._workers = workers
+        self._max_pending_requests = max_pending_requests
+        self._default_timeout = default_timeout
+        self._pending_requests = threading.BoundedSemaphore(max_pending_requests)
+        self._output_lock = threading.Lock()
+
+    def serve(self, input_stream: TextIO, output_stream: TextIO) -> None:
+        '''
+        Processes requests until input stream is closed and all responses are written.
+        '''
+        with ProcessPool(max_workers=self._workers, initializer=_warm_up) as pool:
+            for line in input_stream:
+                if not line.strip():
+                    continue
+
+                self._pending_requests.acquire()
+                request_id = None
+                try:
+                    request = json.loads(line)
+                    request_id = request.get('id')
+                    method_lines = _get_method_lines(request)
+                    timeout = _get_timeout(request, self._default_timeout)
+                except (ValueError, AttributeError, TypeError) as e:
+                    self._respond(output_stream, {'id': request_id, 'error': f'Invalid request: {e}'})
+                    continue
+
+                future = pool.schedule(
+                    _recommend_with_timeout, args=[method_lines, timeout], timeout=_get_backstop_timeout(timeout)
+                )
+                future.add_done_callback(partial(self._on_request_processed, output_stream, request_id))
+
+            # wait for all responses to be written
+            for _ in range(self._max_pending_requests):
+                self._pending_requests.acquire()
+            for _ in range(self._max_pending_requests):
+                self._pending_requests.release()
+
+    def _on_request_processed(self, output_stream: TextIO, request_id: Any, future: ProcessFuture) -> None:
+        try:
+            response = {'id': request_id, 'emos': [list(emo) for emo in future.result()]}
+        except (TerminateExecution, TimeoutError):
+            response = {'id': request_id, 'error': 'Deadline exceeded'}
+        except ProcessExpired as e:
+            response = {'id': request_id, 'error': f'Worker has died: {e}'}
+        except Exception as e:
+            response = {'id': request_id, 'error': f'{type(e).__name__}: {e}'}
+        self._respond(output_stream, response)
+
+    def _respond(self, output_stream: TextIO, response: Dict[str, Any]) -> None:
+        with self._output_lock:
+            output_stream.write(json.dumps(response) + '\n')
+            output_stream.flush()
+        self._pending_requests.release()
+
+
+def _get_method_lines(request: Dict[str, Any]) -> List[str]:
+    method = request.get('method')
+    if isinstance(method, str):
+        return method.split('\n')
+    if isinstance(method, list) and all(isinstance(line, str) for line in method):
+        return method
+    raise ValueError("'method' must be a string or a list of strings")
+
+
+def _get_timeout(request: Dict[str, Any], default_timeout: Optional[float]) -> Optional[float]:
+    timeout = request.get('timeout', default_timeout)
+    if timeout is None:
+        return None
+    # bool is a subclass of int, but it is not a number of seconds
+    if isinstance(timeout, bool) or not isinstance(timeout, (int, float)) or not timeout > 0:
+        raise ValueError("'timeout' must be a positive number or null")
+    return timeout
+
+
+def _recommend_with_timeout(method_lines: List[str], timeout: Optional[float]) -> List[Tuple[int, int]]:
+    # deadline is started in a worker, so time spent in the queue is not counted like for pebble timeout
+    return recommend_for_method(method_lines, Deadline(timeout))
+
+
+def _get_backstop_timeout(timeout: Optional[float]) -> Optional[float]:
+    if timeout is None:
+        return None
+    return _BACKSTOP_TIMEOUT_FACTOR * timeout + _BACKSTOP_TIMEOUT_MARGIN
+
+
+# backstop timeout in seconds is computed from a deadline of a request as factor * deadline + margin
+_BACKSTOP_TIMEOUT_FACTOR = 2
+_BACKSTOP_TIMEOUT_MARGIN = 5
+
+
+def _warm_up() -> None:
+    # the first recommendation initializes lazily created parts of parser and AST framework
+    recommend_for_method(['void warmUp() {', 'int x = 0;', 'x++;', '}'])
+
+
+if __name__ == '__main__':
+    parser = ArgumentParser(description='Recommends EMOs for methods read as JSON lines from stdin.')
+    parser.add_argument(
+        '--workers', type=int, default=os.cpu_count() or 1,
+        help='Number of worker processes'
+    )
+    parser.add_argument(
+        '--max_pending_requests', type=int, default=None,
+        help='Maximum number of requests processed at the same time, twice the number of workers by default'
+    )
+    parser.add_argument(
+        '--timeout', type=float, default=10,
+        help='Deadline in seconds for requests, which do not specify it'
+    )
+    args = parser.parse_args()
+
+    server = RecommendationServer(
+        args.workers, args.max_pending_requests or 2 * args.workers, args.timeout
+    )
+    server.serve(sys.stdin, sys.stdout)
@@ -1,4 +1,5 @@
 import hashlib
+import io
 import os
 import os.path
 import re
@@ -12,13 +13,18 @@ from pathlib import Path
 from typing import Tuple, Dict, List, Any, Set, Optional
 
 import pandas as pd
+from javalang.parse import parse
 from pebble import ProcessPool
 from tqdm import tqdm
 
 from veniq.ast_framework import AST, ASTNodeType, ASTNode
+from veniq.dataset_collection.line_index import LineIndex
+from veniq.dataset_collection.results_writer import ResultsWriter
 from veniq.dataset_collection.types_identifier import AlgorithmFactory, InlineTypesAlgorithms
 from veniq.metrics.ncss.ncss import NCSSMetric
+
 from veniq.utils.ast_builder import build_ast
+from veniq.utils.ast_cache import ASTCache
 from veniq.utils.encoding_detector import read_text_with_autodetected_encoding
 
 
@@ -31,54 +37,43 @@ def _get_last_line(file_path: Path, start_line: int) -> int:
     to the line where the difference is equal to 0. Which means
     that we found closind bracket of method declaration.
     """
-    with open(file_path, encoding='utf-8') as f:
-        file_lines = list(f)
-        # to start counting opening brackets
-        difference_cases = 0
-
-        processed_declaration_line = file_lines[start_line - 1].split('//')[0]
-        difference_cases += processed_declaration_line.count('{')
-        difference_cases -= processed_declaration_line.count('}')
-        for i, line in enumerate(file_lines[start_line:], start_line):
-            if difference_cases:
-                line_without_comments = line.split('//')[0]
-                difference_cases += line_without_comments.count('{')
-                difference_cases -= line_without_comments.count('}')
-            else:
-                # process comments to the last line of method
-                if line.strip() == '*/':
-                    return i + 2
-                else:
-                    return i
-
-        return -1
+    return LineIndex.from_file(file_path).last_line(start_line)
 
 
 def get_line_with_first_open_bracket(
         file_path: Path,
         method_decl_start_line: int
 ) -> int:
-    with open(file_path, encoding='utf-8') as f:
-        file_lines = f.read().split('\n')
-        for i, line in enumerate(file_lines[method_decl_start_line - 2:], method_decl_start_line - 2):
-            if '{' in line:
-                return i + 1
-        return method_decl_start_line + 1
+    return LineIndex.from_file(file_path).first_line_with_open_bracket(method_decl_start_line)
 
 
 def method_body_lines(method_node: ASTNode, file_path: Path) -> Tuple[int, int]:
     """
     Get start and end of method's body
     """
+    if len(method_node.body):
+        return method_body_lines_in_index(method_node, LineIndex.from_file(file_path))
+    return -1, -1
+
+
+def method_body_lines_in_index(method_node: ASTNode, line_index: LineIndex) -> Tuple[int, int]:
+    """
+    Get start and end of method's body using index of lines of a file, which is built once per file
+    """
     if len(method_node.body):
         m_decl_start_line = start_line = method_node.line + 1
-        start_line = get_line_with_first_open_bracket(file_path, m_decl_start_line)
-        end_line = _get_last_line(file_path, start_line)
+        start_line = line_index.first_line_with_open_bracket(m_decl_start_line)
+        end_line = line_index.last_line(start_line)
     else:
         start_line = end_line = -1
     return start_line, end_line
 
 
+def _split_lines(text: str) -> List[str]:
+    # lines are split in the same way, as they are read from a file
+    return io.StringIO(text, newline=None).readlines()
+
+
 def check_nesting_statements(
         method_invoked: ASTNode
 ) -> bool:
@@ -278,14 +273,21 @@ def insert_code_with_new_file_creation(
         invocation_node: ASTNode,
         file_path: Path,
         output_path: Path,
-        dict_original_invocations: Dict[str, List[ASTNode]]
+        dict_original_invocations: Dict[str, List[ASTNode]],
+        ast_cache: Optional[ASTCache] = None,
+        line_index: Optional[LineIndex] = None
 ) -> Dict[str, Any]:
     """
     If invocations of class methods were found,
     we process through all of them and for each
     substitution opportunity by method's body,
     we create new file.
+    If index of lines of the file is provided, it is not read from disk.
     """
+    if line_index is None:
+        line_index = LineIndex.from_file(file_path)
+    file_lines = line_index.lines
+
     file_name = file_path.stem
     if not os.path.exists(output_path):
         output_path.mkdir(parents=True)
@@ -296,8 +298,7 @@ def insert_code_with_new_file_creation(
     line_to_csv = {}
     # @acheshkov asked to consider only methods with ncss > 3, that's all.
     if ncss > 3:
-        body_start_line, body_end_line = method_body_lines(original_func, file_path)
-        text_lines = read_text_with_autodetected_encoding(str(file_path)).split('\n')
+        body_start_line, body_end_line = method_body_lines_in_index(original_func, line_index)
         # we do not inline one-line methods like
         # public String getRemainingString() {return str.substring(index);}
         if body_start_line != body_end_line:
@@ -312,29 +313,37 @@ def insert_code_with_new_file_creation(
                 line_to_csv = {
                     'input_filename': file_path,
                     'class_name': class_name,
-                    'invocation_text_string': text_lines[invocation_node.line - 1].lstrip(),
+                    'invocation_text_string': file_lines[invocation_node.line - 1].rstrip('\n').lstrip(),
                     'method_where_invocation_occurred': method_node.name,
                     'invocation_method_name': original_func.name,
                     'output_filename': new_full_filename
                 }
 
-                inline_method_bounds = algorithm_for_inlining().inline_function(
-                    file_path,
+                inlined = algorithm_for_inlining().inline_lines(
+                    file_lines,
                     invocation_node.line,
                     body_start_line,
                     body_end_line,
-                    new_full_filename,
                 )
-                if inline_method_bounds is not None:
+                if inlined is not None:
+                    changed_lines, inline_method_bounds = inlined
+                    changed_text = ''.join(changed_lines)
+                    with open(new_full_filename, 'w', encoding='utf-8') as f:
+                        f.write(changed_text)
+
                     line_to_csv['inline_insertion_line_start'] = inline_method_bounds[0]
                     line_to_csv['inline_insertion_line_end'] = inline_method_bounds[1]
 
-                    if get_ast_if_possible(new_full_filename):
+                    changed_ast = get_ast_from_text_if_possible(changed_text, new_full_filename, ast_cache)
+                    if changed_ast:
                         rest_of_csv_row_for_changed_file = find_lines_in_changed_file(
                             class_name=class_name,
                             method_node=method_node,
                             new_full_filename=new_full_filename,
-                            original_func=original_func)
+                            original_func=original_func,
+                            ast_cache=ast_cache,
+                            changed_ast=changed_ast,
+                            changed_line_index=LineIndex(_split_lines(changed_text)))
 
                         can_be_parsed = True
                         line_to_csv.update(rest_of_csv_row_for_changed_file)
@@ -351,16 +360,23 @@ def find_lines_in_changed_file(
         new_full_filename: Path,
         method_node: ASTNode,
         original_func: ASTNode,
-        class_name: str) -> Dict[str, Any]:
+        class_name: str,
+        ast_cache: Optional[ASTCache] = None,
+        changed_ast: Optional[AST] = None,
+        changed_line_index: Optional[LineIndex] = None) -> Dict[str, Any]:
     """
     Find start and end line of invocation for changed file
     :param class_name: class name of old file
     :param new_full_filename: name of new file
     :param method_node: method declaration of old file
     :param original_func: method declaration of invoked function in old file
+    :param ast_cache: cache of parsed files, if None files are always parsed
+    :param changed_ast: AST of new file, if None it is parsed from the file
+    :param changed_line_index: index of lines of new file, if None it is built from the file
     :return:
     """
-    changed_ast = get_ast_if_possible(new_full_filename)
+    if changed_ast is None:
+        changed_ast = get_ast_if_possible(new_full_filename, ast_cache)
     if changed_ast:
         class_node_of_changed_file = [
             x for x in changed_ast.get_proxy_nodes(ASTNodeType.CLASS_DECLARATION)
@@ -373,7 +389,9 @@ def find_lines_in_changed_file(
         original_func_changed = [x for x in class_subtree.get_proxy_nodes(
             ASTNodeType.METHOD_DECLARATION) if x.name == original_func.name][0]
 
-        body_start_line, body_end_line = method_body_lines(original_func_changed, new_full_filename)
+        if changed_line_index is None:
+            changed_line_index = LineIndex.from_file(new_full_filename)
+        body_start_line, body_end_line = method_body_lines_in_index(original_func_changed, changed_line_index)
         return {
             'invocation_method_start_line': body_start_line,
             'invocation_method_end_line': body_end_line,
@@ -383,14 +401,33 @@ def find_lines_in_changed_file(
         return {}
 
 
-def get_ast_if_possible(file_path: Path) -> Optional[AST]:
+def get_ast_if_possible(file_path: Path, ast_cache: Optional[ASTCache] = None) -> Optional[AST]:
     """
     Processing file in order to check
     that its original version can be parsed
     """
     ast = None
     try:
-        ast = AST.build_from_javalang(build_ast(str(file_path)))
+        if ast_cache is not None:
+            ast = ast_cache.build_ast(file_path)
+        else:
+            ast = AST.build_from_javalang(build_ast(str(file_path)))
+    except Exception:
+        print(f"Processing {file_path} is aborted due to parsing")
+    return ast
+
+
+def get_ast_from_text_if_possible(text: str, file_path: Path, ast_cache: Optional[ASTCache] = None) -> Optional[AST]:
+    """
+    The same as get_ast_if_possible, but the text of file
+    is kept in memory and is not read from disk
+    """
+    ast = None
+    try:
+        if ast_cache is not None:
+            ast = ast_cache.build_ast_from_text(text)
+        else:
+            ast = AST.build_from_javalang(parse(text))
     except Exception:
         print(f"Processing {file_path} is aborted due to parsing")
     return ast
@@ -416,12 +453,15 @@ def remove_comments(string):
 def analyze_file(
         file_path: Path,
         output_path: Path,
-        input_dir: Path
+        input_dir: Path,
+        ast_cache: Optional[ASTCache] = None
 ) -> List[Any]:
     """
     In this function we process each file.
     For each file we find each invocation inside,
     which can be inlined.
+    File is processed in memory, input file with removed comments
+    is saved only if some invocation was inlined.
     """
     # print(file_path)
     results: List[Any] = []
@@ -430,12 +470,12 @@ def analyze_file(
     text_without_comments = remove_comments(original_text)
     # remove whitespaces
     text = "\n".join([ll.rstrip() for ll in text_without_comments.splitlines() if ll.strip()])
-    dst_filename = save_text_to_new_file(input_dir, text, file_path)
+    dst_filename = _get_new_filename(input_dir, file_path)
 
-    ast = get_ast_if_possible(dst_filename)
+    ast = get_ast_from_text_if_possible(text, dst_filename, ast_cache)
     if ast is None:
-        dst_filename.unlink()
         return results
+    line_index = LineIndex(_split_lines(text))
 
     method_declarations: Dict[str, List[ASTNode]] = defaultdict(list)
     classes_declaration = [
@@ -465,19 +505,21 @@ def analyze_file(
                             method_invoked,
                             method_node,
                             output_path,
-                            results
+                            results,
+                            ast_cache,
+                            line_index
                         )
                     except Exception as e:
                         print('Error has happened during file analyze: ' + str(e))
 
-    if not results:
-        dst_filename.unlink()
+    if results:
+        save_text_to_new_file(input_dir, text, file_path)
 
     return results
 
 
 def make_insertion(ast, class_declaration, dst_filename, found_method_decl, method_declarations, method_invoked,
-                   method_node, output_path, results):
+                   method_node, output_path, results, ast_cache=None, line_index=None):
     is_matched = is_match_to_the_conditions(
         ast,
         method_invoked,
@@ -491,7 +533,9 @@ def make_insertion(ast, class_declaration, dst_filename, found_method_decl, meth
             method_invoked,
             dst_filename,
             output_path,
-            method_declarations)
+            method_declarations,
+            ast_cache,
+            line_index)
         if log_of_inline:
             # change source filename, since it will be changed
             log_of_inline['input_filename'] = str(dst_filename.as_posix())
@@ -516,10 +560,14 @@ def collect_info_about_functions_without_params(
 #     return dst_filename
 
 
-def save_text_to_new_file(input_dir: Path, text: str, filename: Path) -> Path:
+def _get_new_filename(input_dir: Path, filename: Path) -> Path:
     # need to avoid situation when filenames are the same
     hash_path = hashlib.sha256(str(filename.parent).encode('utf-8')).hexdigest()
-    dst_filename = input_dir / f'{filename.stem}_{hash_path}.java'
+    return input_dir / f'{filename.stem}_{hash_path}.java'
+
+
+def save_text_to_new_file(input_dir: Path, text: str, filename: Path) -> Path:
+    dst_filename = _get_new_filename(input_dir, filename)
     if not dst_filename.parent.exists():
         dst_filename.parent.mkdir(parents=True)
     if not dst_filename.exists():
@@ -529,11 +577,78 @@ def save_text_to_new_file(input_dir: Path, text: str, filename: Path) -> Path:
     return dst_filename
 
 
+def find_java_files_without_tests(directory: Path) -> List[Path]:
+    # files are listed once, test files are the ones, which names match '*Test*.java'
+    return sorted(
+        file_path for file_path in directory.glob('**/*.java')
+        if 'Test' not in file_path.name
+    )
+
+
+def parse_shard(shard: str) -> Tuple[int, int]:
+    '''
+    Parses shard in format 'i/N', where i is an index of shard starting from 0 and N is a number of shards.
+    '''
+    try:
+        shard_index, shards_qty = (int(number) for number in shard.split('/'))
+    except ValueError:
+        raise ValueError(f"Shard must be in format 'i/N', got '{shard}'.")
+    if not 0 <= shard_index < shards_qty:
+        raise ValueError(f"Shard index must be in range [0, {shards_qty}), got {shard_index}.")
+    return shard_index, shards_qty
+
+
+def is_in_shard(relative_path: Path, shard_index: int, shards_qty: int) -> bool:
+    '''
+    Assigns files to shards by a stable hash of their path relative to the dataset directory,
+    so every machine gets the same partitioning regardless of where the dataset is mounted.
+    '''
+    path_hash = hashlib.sha256(relative_path.as_posix().encode('utf-8')).hexdigest()
+    return int(path_hash, 16) % shards_qty == shard_index
+
+
+def get_relative_input_path(filename: Path, dataset_dir: Path) -> str:
+    '''
+    Identifies an input file by its POSIX path relative to the dataset directory,
+    so results are resumed and sharded the same way regardless of where the dataset is mounted.
+    '''
+    return filename.relative_to(dataset_dir).as_posix()
+
+
+def get_shard_folder(dataset_folder: Path, shard_index: int, shards_qty: int) -> Path:
+    return dataset_folder / f'shard_{shard_index}_of_{shards_qty}'
+
+
+def merge_shards(dataset_folder: Path, csv_output: Path, columns: List[str]) -> None:
+    '''
+    Merges results of all shards of dataset_folder to a single csv.
+    Rows are sorted by input files, so the csv does not depend on the order, in which files were processed.
+    '''
+    shards_folders = list(dataset_folder.glob('shard_*_of_*'))
+    if not shards_folders:
+        raise ValueError(f"No shards are found in {dataset_folder}.")
+    shards = {
+        tuple(int(number) for number in shard_folder.name.split('_')[1::2]) for shard_folder in shards_folders
+    }
+    shards_qty = max(shards_qty for _, shards_qty in shards)
+    expected_shards = {(shard_index, shards_qty) for shard_index in range(shards_qty)}
+    if shards != expected_shards:
+        raise ValueError(f"Shards {sorted(shards ^ expected_shards)} are missing or unexpected in {dataset_folder}.")
+
+    rows = [
+        row
+        for shard_index in range(shards_qty)
+        for row in ResultsWriter.read_saved_rows(get_shard_folder(dataset_folder, shard_index, shards_qty))
+    ]
+    rows.sort(key=lambda row: row['input_filename'])
+    pd.DataFrame(rows, columns=columns).to_csv(csv_output)
+
+
 if __name__ == '__main__':  # noqa: C901
     system_cores_qty = os.cpu_count() or 1
     parser = ArgumentParser()
     parser.add_argument(
-        "-d", "--dir", required=True, help="File path to JAVA source code for methods augmentations"
+        "-d", "--dir", help="File path to JAVA source code for methods augmentations, required unless --merge"
     )
     parser.add_argument(
         "-o", "--output",
@@ -560,12 +675,39 @@ if __name__ == '__main__':  # noqa: C901
         default=100,
         type=int,
     )
+    parser.add_argument(
+        "--ast_cache_dir",
+        help="Directory to cache parsed files in. Files are not cached by default.",
+        default=None,
+    )
+    parser.add_argument(
+        "--ast_cache_size",
+        help="Upper bound of cache size in megabytes",
+        default=1024,
+        type=int,
+    )
+    parser.add_argument(
+        "--resume",
+        action='store_true',
+        help="Skip files processed by previous runs and keep their results."
+    )
+    parser.add_argument(
+        "--shard",
+        type=parse_shard,
+        default=None,
+        help="Process only i-th of N parts of files given as 'i/N', e.g. to run on several machines "
+             "sharing output folder. Results of shards are combined with --merge.",
+    )
+    parser.add_argument(
+        "--merge",
+        action='store_true',
+        help="Combine results of all shards in output folder instead of processing files."
+    )
 
     args = parser.parse_args()
-
-    test_files = set(Path(args.dir).glob('**/*Test*.java'))
-    not_test_files = set(Path(args.dir).glob('**/*.java'))
-    files_without_tests = list(not_test_files.difference(test_files))
+    if args.dir is None and not args.merge:
+        parser.error("the following arguments are required: -d/--dir")
+    ast_cache = ASTCache(args.ast_cache_dir, args.ast_cache_size * 2 ** 20) if args.ast_cache_dir else None
 
     full_dataset_folder = Path(args.output) / 'full_dataset'
     output_dir = full_dataset_folder / 'output_files'
@@ -577,52 +719,73 @@ if __name__ == '__main__':  # noqa: C901
         input_dir.mkdir(parents=True)
     csv_output = Path(full_dataset_folder, 'out.csv')
 
-    df = pd.DataFrame(
-        columns=[
-            'input_filename',
-            'class_name',
-            'invocation_text_string',
-            'method_where_invocation_occurred',
-            'start_line_of_function_where_invocation_occurred',
-            'invocation_method_name',
-            'invocation_method_start_line',
-            'invocation_method_end_line',
-            'output_filename',
-            'can_be_parsed',
-            'inline_insertion_line_start',
-            'inline_insertion_line_end'
-        ])
-
-    with ProcessPool(system_cores_qty) as executor:
-        p_analyze = partial(
-            analyze_file,
-            output_path=output_dir.absolute(),
-            input_dir=input_dir
-        )
-        future = executor.map(p_analyze, files_without_tests, timeout=1000, )
-        result = future.result()
-
-        # each 100 cycles we dump the results
-        iteration_cycle = 1000
-        iteration_number = 0
-        for filename in tqdm(files_without_tests):
-            try:
-                single_file_features = next(result)
-                if single_file_features:
+    columns = [
+        'input_filename',
+        'class_name',
+        'invocation_text_string',
+        'method_where_invocation_occurred',
+        'start_line_of_function_where_invocation_occurred',
+        'invocation_method_name',
+        'invocation_method_start_line',
+        'invocation_method_end_line',
+        'output_filename',
+        'can_be_parsed',
+        'inline_insertion_line_start',
+        'inline_insertion_line_end'
+    ]
+
+    if args.merge:
+        merge_shards(full_dataset_folder, csv_output, columns)
+    else:
+        files_without_tests = find_java_files_without_tests(Path(args.dir))
+        relative_paths = {
+            filename: get_relative_input_path(filename, Path(args.dir)) for filename in files_without_tests
+        }
+        results_folder = full_dataset_folder
+        if args.shard is not None:
+            shard_index, shards_qty = args.shard
+            files_without_tests = [
+                filename for filename in files_without_tests
+                if is_in_shard(Path(relative_paths[filename]), shard_index, shards_qty)
+            ]
+            # each shard has its own manifest and results, they are combined by --merge
+            results_folder = get_shard_folder(full_dataset_folder, shard_index, shards_qty)
+            csv_output = results_folder / 'out.csv'
+
+        results_writer = ResultsWriter(results_folder, resume=args.resume)
+        files_without_tests = [
+            filename for filename in files_without_tests
+            if relative_paths[filename] not in results_writer.completed_inputs
+        ]
+
+        with ProcessPool(system_cores_qty) as executor, results_writer:
+            p_analyze = partial(
+                analyze_file,
+                output_path=output_dir.absolute(),
+                input_dir=input_dir,
+                ast_cache=ast_cache
+            )
+            future = executor.map(p_analyze, files_without_tests, timeout=1000, )
+            result = future.result()
+
+            for filename in tqdm(files_without_tests):
+                try:
+                    single_file_features = next(result)
                     for i in single_file_features:
                         #  get local path for inlined filename
                         i['output_filename'] = i['output_filename'].relative_to(os.getcwd()).as_posix()
-                        i['invocation_text_string'] = str(i['invocation_text_string']).encode('utf8')
-                        df = df.append(i, ignore_index=True)
-
-                if (iteration_number % iteration_cycle) == 0:
-                    df.to_csv(csv_output)
-                iteration_number += 1
-            except Exception as e:
-                print(str(e))
-
-    df.to_csv(csv_output)
-    if args.zip:
+                        # keep the representation of bytes, which is written to csv
+                        i['invocation_text_string'] = str(str(i['invocation_text_string']).encode('utf8'))
+                except Exception as e:
+                    # file is not recorded as completed, so it is processed again with --resume
+                    print(str(e))
+                    continue
+                results_writer.write(relative_paths[filename], single_file_features)
+
+            results_writer.merge_to_csv(csv_output, columns)
+
+    # small dataset is sampled from all files, so it is made by --merge, when files are sharded
+    if args.zip and args.shard is None:
         samples = pd.read_csv(csv_output).sample(args.small_dataset_size, random_state=41)
         small_dataset_folder = Path(args.output) / 'small_dataset'
         if not small_dataset_folder.exists():
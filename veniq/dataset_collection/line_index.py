@@ -0,0 +1,70 @@
+from bisect import bisect_left
+from pathlib import Path
+from typing import Dict, List
+
+
+class LineIndex:
+    '''
+    Index of lines of a source file, which is built once per file
+    and allows to find bounds of method bodies without rescanning the file.
+    Line numbers are 1-based, as in AST.
+    Only line comments ('//') are masked out, when brackets are counted.
+    '''
+
+    def __init__(self, lines: List[str]):
+        self.lines = lines
+        lines_qty = len(lines)
+
+        # line, starting from which (0-based) the nearest line with '{' is searched, including comments
+        self._next_open_bracket_line: List[int] = [-1] * (lines_qty + 1)
+        for line_index in range(lines_qty - 1, -1, -1):
+            self._next_open_bracket_line[line_index] = \
+                line_index if '{' in lines[line_index] else self._next_open_bracket_line[line_index + 1]
+
+        # _brackets_depth[i] is a difference between opening and closing brackets in first i lines
+        self._brackets_depth: List[int] = [0] * (lines_qty + 1)
+        self._lines_by_depth: Dict[int, List[int]] = {0: [0]}
+        for line_index, line in enumerate(lines):
+            line_without_comments = line.split('//')[0]
+            depth = self._brackets_depth[line_index] + \
+                line_without_comments.count('{') - line_without_comments.count('}')
+            self._brackets_depth[line_index + 1] = depth
+            self._lines_by_depth.setdefault(depth, []).append(line_index + 1)
+
+    @classmethod
+    def from_file(cls, file_path: Path) -> 'LineIndex':
+        with open(file_path, encoding='utf-8') as f:
+            return cls(list(f))
+
+    def first_line_with_open_bracket(self, method_decl_start_line: int) -> int:
+        '''
+        Finds first line containing '{' starting from the line before method_decl_start_line.
+        :param method_decl_start_line: line following the line of method declaration
+        '''
+        first_line_index = method_decl_start_line - 2
+        if first_line_index >= len(self.lines):
+            return method_decl_start_line + 1
+        line_index = self._next_open_bracket_line[first_line_index]
+        if line_index == -1:
+            return method_decl_start_line + 1
+        return line_index + 1
+
+    def last_line(self, start_line: int) -> int:
+        '''
+        Finds the line following the line, where brackets opened since the start line are balanced.
+        If the found line closes a block comment, the line after it is returned.
+        Returns -1 if brackets are not balanced until the end of file.
+        '''
+        if not 0 < start_line <= len(self.lines):
+            raise IndexError(f"Line {start_line} is out of file with {len(self.lines)} lines.")
+        initial_depth = self._brackets_depth[start_line - 1]
+        lines_with_same_depth = self._lines_by_depth[initial_depth]
+        position = bisect_left(lines_with_same_depth, start_line)
+        if position == len(lines_with_same_depth):
+            return -1
+        line_index = lines_with_same_depth[position]
+        if line_index >= len(self.lines):
+            return -1
+        if self.lines[line_index].strip() == '*/':
+            return line_index + 2
+        return line_index
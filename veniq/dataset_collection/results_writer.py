@@ -0,0 +1,124 @@
+import json
+import os
+import shutil
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Set
+
+import pandas as pd
+
+
+class ResultsWriter:
+    '''
+    Streams results of processing input files to disk, so nothing is lost when processing is interrupted.
+    Results of each input file are appended as a single line to a JSON lines shard,
+    which is new for each run, and then the input file is recorded to the manifest.
+    Runs with resume=True skip input files from the manifest and keep previous shards,
+    otherwise previous results are removed.
+    Written results are flushed at once, but synced to disk only every fsync_period input files,
+    if it is set, so that results survive a crash of the machine and syncing does not slow down writing.
+    '''
+
+    _MANIFEST_FILENAME = 'manifest.txt'
+    _SHARDS_DIRNAME = 'shards'
+
+    def __init__(self, output_dir: Path, resume: bool = False, fsync_period: Optional[int] = None):
+        self._fsync_period = fsync_period
+        self._not_synced_inputs_qty = 0
+        self._manifest_path = output_dir / self._MANIFEST_FILENAME
+        self._shards_dir = output_dir / self._SHARDS_DIRNAME
+        if not resume:
+            if self._shards_dir.exists():
+                shutil.rmtree(self._shards_dir)
+            if self._manifest_path.exists():
+                self._manifest_path.unlink()
+        self._shards_dir.mkdir(parents=True, exist_ok=True)
+
+        self.completed_inputs: Set[str] = set()
+        if self._manifest_path.exists():
+            # the last line may be incomplete, if processing was interrupted while writing it,
+            # it is removed, so new entries are not appended to it
+            self._truncate_incomplete_line(self._manifest_path)
+            with open(self._manifest_path, encoding='utf-8') as manifest:
+                self.completed_inputs = {line.rstrip('\n') for line in manifest}
+
+        shard_path = self._shards_dir / f'results_{len(list(self._shards_dir.glob("*.jsonl")))}.jsonl'
+        self._shard = open(shard_path, 'w', encoding='utf-8')
+        self._manifest = open(self._manifest_path, 'a', encoding='utf-8')
+
+    @staticmethod
+    def _truncate_incomplete_line(path: Path) -> None:
+        with open(path, 'rb+') as file:
+            content = file.read()
+            if content and not content.endswith(b'\n'):
+                file.truncate(content.rfind(b'\n') + 1)
+
+    def write(self, input_filename: str, rows: List[Dict[str, Any]]) -> None:
+        '''
+        Saves results of an input file and marks it as completed.
+        '''
+        self._shard.write(json.dumps({'input_filename': input_filename, 'rows': rows}) + '\n')
+        self._shard.flush()
+        # file is recorded to manifest only after its results are saved,
+        # if processing is interrupted in between, file is processed again and merge keeps the latest results
+        self._manifest.write(input_filename + '\n')
+        self._manifest.flush()
+        self.completed_inputs.add(input_filename)
+
+        self._not_synced_inputs_qty += 1
+        if self._fsync_period is not None and self._not_synced_inputs_qty >= self._fsync_period:
+            self.sync()
+
+    def sync(self) -> None:
+        '''
+        Makes sure all written results are stored on disk.
+        '''
+        os.fsync(self._shard.fileno())
+        os.fsync(self._manifest.fileno())
+        self._not_synced_inputs_qty = 0
+
+    def close(self) -> None:
+        if self._fsync_period is not None and not self._shard.closed:
+            self.sync()
+        self._shard.close()
+        self._manifest.close()
+
+    def __enter__(self) -> 'ResultsWriter':
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+    def read_rows(self, only_completed: bool = False) -> Iterator[Dict[str, Any]]:
+        '''
+        Yields rows from all shards, taking only the latest results of each input file.
+        :param only_completed: skip results of input files, which are not recorded to the manifest,
+          since they are processed again on resume
+        '''
+        return self._read_rows(self._shards_dir, self.completed_inputs if only_completed else None)
+
+    @classmethod
+    def read_saved_rows(cls, output_dir: Path) -> Iterator[Dict[str, Any]]:
+        '''
+        Same as read_rows, but results saved to output_dir are read without opening a writer.
+        '''
+        return cls._read_rows(output_dir / cls._SHARDS_DIRNAME)
+
+    @staticmethod
+    def _read_rows(shards_dir: Path, inputs: Optional[Set[str]] = None) -> Iterator[Dict[str, Any]]:
+        rows_by_input: Dict[str, List[Dict[str, Any]]] = {}
+        for shard_path in sorted(shards_dir.glob('*.jsonl'), key=lambda path: int(path.stem.split('_')[-1])):
+            with open(shard_path, encoding='utf-8') as shard:
+                for line in shard:
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        # the last line may be incomplete, if processing was interrupted while writing it
+                        continue
+                    rows_by_input[record['input_filename']] = record['rows']
+
+        for input_filename, rows in rows_by_input.items():
+            if inputs is None or input_filename in inputs:
+                yield from rows
+
+    def merge_to_csv(self, csv_path: Path, columns: List[str]) -> None:
+        pd.DataFrame(list(self.read_rows()), columns=columns).to_csv(csv_path)
@@ -1,6 +1,6 @@
 import abc
 from enum import Enum
-from typing import List, Union
+from typing import List, Optional, Tuple, Union
 import pathlib
 import re
 
@@ -126,24 +126,18 @@ class IBaseInlineAlgorithm(metaclass=abc.ABCMeta):
 
     def get_lines_before_invocation(
             self,
-            filename_out: pathlib.Path,
-            filename_in: pathlib.Path,
+            lines: List[str],
             invocation_line: int
     ) -> List[str]:
         """
         This function is aimed to obtain lines from the original
         file before invocation line, which was detected.
         """
-        original_file = open(filename_in, encoding='utf-8')
-        lines = list(original_file)
-        lines_before_invoсation = lines[:invocation_line - 1]
-        original_file.close()
-        return lines_before_invoсation
+        return lines[:invocation_line - 1]
 
     def get_lines_after_invocation(
             self,
-            filename_out: pathlib.Path,
-            filename_in: pathlib.Path,
+            lines: List[str],
             invocation_line: int
     ) -> List[str]:
         """
@@ -151,46 +145,38 @@ class IBaseInlineAlgorithm(metaclass=abc.ABCMeta):
         file after invocation line, which was detected.
         Especially, it will be inserted after body of inlined method.
         """
-        original_file = open(filename_in, encoding='utf-8')
-        lines = list(original_file)
-        lines_after_invoсation = lines[invocation_line:]
-        original_file.close()
-        return lines_after_invoсation
+        return lines[invocation_line:]
 
     @abc.abstractmethod
     def get_lines_of_method_body(self,
-                                 filename_out: pathlib.Path,
-                                 filename_in: pathlib.Path,
+                                 lines: List[str],
                                  invocation_line: int,
                                  body_start_line: int,
                                  body_end_line: int
                                  ) -> List[str]:
         raise NotImplementedError("Cannot run abstract function")
 
-    def inline_function(
+    def inline_lines(
             self,
-            filename_in: pathlib.Path,
+            lines: List[str],
             invocation_line: int,
             body_start_line: int,
-            body_end_line: int,
-            filename_out: pathlib.Path
-    ) -> Union[None, str, List]:
+            body_end_line: int
+    ) -> Optional[Tuple[List[str], List[int]]]:
+        """
+        Inlines method body into lines of the original file, which are kept in memory.
+        Returns lines of the resulted file and bounds of inlined method.
+        """
         lines_of_final_file = []
         inline_method_bounds = []
         inline_method_bounds.append(invocation_line)
 
         # original code before method invocation, which will be substituted
-        lines_before_invoсation = self.get_lines_before_invocation(
-            filename_out,
-            filename_in,
-            invocation_line
-        )
-        lines_of_final_file += lines_before_invoсation
+        lines_of_final_file += self.get_lines_before_invocation(lines, invocation_line)
 
         # body of the original method, which will be inserted
         body_lines = self.get_lines_of_method_body(
-            filename_out,
-            filename_in,
+            lines,
             invocation_line,
             body_start_line + 1,
             body_end_line - 1
@@ -200,19 +186,30 @@ class IBaseInlineAlgorithm(metaclass=abc.ABCMeta):
         inline_method_bounds.append(end_inline_method)
 
         # original code after method invocation
-        original_code_lines = self.get_lines_after_invocation(
-            filename_out,
-            filename_in,
-            invocation_line
-        )
-        lines_of_final_file += original_code_lines
+        lines_of_final_file += self.get_lines_after_invocation(lines, invocation_line)
 
-        f_out = open(filename_out, 'w', encoding='utf-8')
-        for line in lines_of_final_file:
-            f_out.write(line)
-        f_out.close()
         # return bounds of inline method
         # counted relative to parent method body
+        return lines_of_final_file, inline_method_bounds
+
+    def inline_function(
+            self,
+            filename_in: pathlib.Path,
+            invocation_line: int,
+            body_start_line: int,
+            body_end_line: int,
+            filename_out: pathlib.Path
+    ) -> Union[None, str, List]:
+        with open(filename_in, encoding='utf-8') as original_file:
+            lines = list(original_file)
+
+        inlined = self.inline_lines(lines, invocation_line, body_start_line, body_end_line)
+        if inlined is None:
+            return None
+
+        lines_of_final_file, inline_method_bounds = inlined
+        with open(filename_out, 'w', encoding='utf-8') as f_out:
+            f_out.writelines(lines_of_final_file)
         return inline_method_bounds
 
 
@@ -232,6 +229,15 @@ class DoNothing(IBaseInlineAlgorithm):
     ) -> str:
         return ""
 
+    def inline_lines(
+            self,
+            lines: List[str],
+            invocation_line: int,
+            body_start_line: int,
+            body_end_line: int
+    ) -> Optional[Tuple[List[str], List[int]]]:
+        return None
+
 
 class InlineWithoutReturnWithoutArguments(IBaseInlineAlgorithm):
 
@@ -240,8 +246,7 @@ class InlineWithoutReturnWithoutArguments(IBaseInlineAlgorithm):
 
     def get_lines_of_method_body(
             self,
-            filename_out: pathlib.Path,
-            filename_in: pathlib.Path,
+            lines: List[str],
             invocation_line: int,
             body_start_line: int,
             body_end_line: int
@@ -250,8 +255,6 @@ class InlineWithoutReturnWithoutArguments(IBaseInlineAlgorithm):
         In order to get an appropriate text view, we also need to insert
         lines according to the current number of spaced before the line
         """
-        original_file = open(filename_in, encoding='utf-8')
-        lines = list(original_file)
         body_lines_original = self.form_body_for_inline(lines, body_start_line, body_end_line)
         num_spaces_in_body = self.complement_spaces(body_start_line, invocation_line, lines)
         body_lines = []
@@ -263,7 +266,6 @@ class InlineWithoutReturnWithoutArguments(IBaseInlineAlgorithm):
                 lines[invocation_line - 2]
             )
             body_lines.append(new_line)
-        original_file.close()
         return body_lines
 
 
@@ -309,8 +311,7 @@ class InlineWithReturnWithoutArguments(IBaseInlineAlgorithm):
 
     def get_lines_of_method_body(
             self,
-            filename_out: pathlib.Path,
-            filename_in: pathlib.Path,
+            lines: List[str],
             invocation_line: int,
             body_start_line: int,
             body_end_line: int
@@ -321,8 +322,6 @@ class InlineWithReturnWithoutArguments(IBaseInlineAlgorithm):
         """
 
         body_lines = []
-        original_file = open(filename_in, encoding='utf-8')
-        lines = list(original_file)
         # body of the original method, which will be inserted
         body_lines_original = self.form_body_for_inline(lines, body_start_line, body_end_line)
         line_with_declaration = lines[invocation_line - 1].split('=')
@@ -349,5 +348,4 @@ class InlineWithReturnWithoutArguments(IBaseInlineAlgorithm):
                 new_body_line = spaces_in_body + line
             body_lines.append(self.get_line_for_body(new_body_line, lines[invocation_line - 2]))
 
-        original_file.close()
         return body_lines
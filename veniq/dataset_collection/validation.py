@@ -4,14 +4,13 @@ from argparse import ArgumentParser
 from dataclasses import dataclass, asdict
 from functools import partial
 from pathlib import Path
-from typing import List, Tuple
+from typing import List, Optional, Tuple
 
 import pandas as pd
-from numpy import mean
 from pebble import ProcessPool
 from tqdm import tqdm
 
-from veniq.utils.timeout import invoke_with_timeout
+from veniq.utils.timeout import Deadline, check_deadline
 from veniq.ast_framework import AST, ASTNodeType
 from veniq.ast_framework import ASTNode
 from veniq.baselines.semi.create_extraction_opportunities import create_extraction_opportunities
@@ -20,18 +19,21 @@ from veniq.baselines.semi.filter_extraction_opportunities import filter_extracti
 from veniq.baselines.semi.rank_extraction_opportunities import rank_extraction_opportunities, ExtractionOpportunityGroup
 from veniq.metrics.ncss.ncss import NCSSMetric
 from veniq.utils.ast_builder import build_ast
+from veniq.utils.ast_cache import ASTCache
 from veniq.utils.encoding_detector import read_text_with_autodetected_encoding
+from veniq.dataset_collection.results_writer import ResultsWriter
 
 
 def find_extraction_opportunities(
-        method_ast: AST) -> List[ExtractionOpportunityGroup]:
-    statements_semantic = extract_method_statements_semantic(method_ast)
-    extraction_opportunities = create_extraction_opportunities(statements_semantic)
+        method_ast: AST, deadline: Optional[Deadline] = None) -> List[ExtractionOpportunityGroup]:
+    statements_semantic = extract_method_statements_semantic(method_ast, deadline)
+    extraction_opportunities = create_extraction_opportunities(statements_semantic, deadline)
     filtered_extraction_opportunities = filter_extraction_opportunities(
-        extraction_opportunities, statements_semantic, method_ast
+        extraction_opportunities, statements_semantic, method_ast, deadline
     )
+    # only the best group is validated
     extraction_opportunities_groups = rank_extraction_opportunities(
-        statements_semantic, filtered_extraction_opportunities
+        statements_semantic, filtered_extraction_opportunities, top_k=1, deadline=deadline
     )
 
     return extraction_opportunities_groups
@@ -56,14 +58,61 @@ class RowResult:
     failed_cases_in_validation_examples: bool
 
 
+class ValidationStats:
+    """
+    Summary of validation results, which is updated as results arrive,
+    so it is not recomputed over all results.
+    """
+
+    def __init__(self) -> None:
+        self.handled_cases = 0
+        self.matched_cases = 0
+        self.failed_cases_in_SEMI_algorithm = 0
+        self.failed_cases_in_validation_examples = 0
+        self.no_opportunity_chosen = 0
+        self._percent_matched_sum = 0.0
+        self._percent_matched_qty = 0
+
+    def add(self, result: RowResult) -> None:
+        self.handled_cases += 1
+        self.matched_cases += bool(result.matched)
+        self.failed_cases_in_SEMI_algorithm += bool(result.failed_cases_in_SEMI_algorithm)
+        self.failed_cases_in_validation_examples += bool(result.failed_cases_in_validation_examples)
+        self.no_opportunity_chosen += bool(result.no_opportunity_chosen)
+        if result.percent_matched > -1:
+            self._percent_matched_sum += result.percent_matched
+            self._percent_matched_qty += 1
+
+    @property
+    def mean_percent_matched(self) -> float:
+        if self._percent_matched_qty == 0:
+            return float('nan')
+        return self._percent_matched_sum / self._percent_matched_qty
+
+    def print(self) -> None:
+        print(f'Failed SEMI algorithm errors: {self.failed_cases_in_SEMI_algorithm}')
+        print(f'Failed examples of synth dataset: {self.failed_cases_in_validation_examples}')
+        print(f'matched_cases: {float(self.matched_cases)}')
+        print(f'No opportunity chosen: {self.no_opportunity_chosen} times')
+        print(f'Total number of handled cases: {self.handled_cases}')
+        print(f'Average of matched lines: {self.mean_percent_matched}')
+        total_case_handled = \
+            self.handled_cases - self.failed_cases_in_SEMI_algorithm - self.failed_cases_in_validation_examples
+        if total_case_handled > 0:
+            result = float(self.matched_cases) / total_case_handled
+            print(f'Matched {result}% of cases, {float(self.matched_cases)} out of {total_case_handled}')
+
+
 def fix_start_end_lines_for_opportunity(
         extracted_lines_of_opportunity: List[int],
-        filepath: str) -> Tuple[int, int]:
+        filepath: str,
+        deadline: Optional[Deadline] = None) -> Tuple[int, int]:
     """
     Finds start and end lines for opportunity
 
     :param filepath: filename where opportunity was found
     :param extracted_lines_of_opportunity: list of lines for opportunity
+    :param deadline: search is stopped with TerminateExecution, when it expires
     :return: list of extracted lines for opportunity
     """
     start_line_opportunity = min(extracted_lines_of_opportunity)
@@ -77,6 +126,7 @@ def fix_start_end_lines_for_opportunity(
     first_line_found = False
 
     for i, x in enumerate(extraction):
+        check_deadline(deadline)
         open_brackets = x.count('{')
         if open_brackets > 0:
             first_line_found = True
@@ -95,17 +145,25 @@ def fix_start_end_lines_for_opportunity(
 
 
 # flake8: noqa: C901
-def validate_row(dataset_dir: Path, row: pd.Series) \
-        -> List[RowResult]:
+def validate_row(
+        dataset_dir: Path,
+        row: pd.Series,
+        ast_cache: Optional[ASTCache] = None,
+        method_timeout: Optional[float] = None,
+        ast: Optional[AST] = None) -> List[RowResult]:
     """
     Validate row of dataset
 
     :param dataset_dir: directory to dataset, path before the relative path in
     output_filename
     :param row: row of dataframe of synth validation dataset
+    :param ast_cache: cache of parsed files, if None files are always parsed
+    :param method_timeout: time budget in seconds for SEMI on a method, if None time is not limited
+    :param ast: AST of output file of the row, if None the file is parsed
     :return: Stats - return collected stats
     """
     results = []
+    result = _create_row_result(dataset_dir, row)
     try:
         start_line_of_inserted_block = int(row[1]['inline_insertion_line_start'])
         end_line_of_inserted_block = int(row[1]['inline_insertion_line_end'])
@@ -113,35 +171,24 @@ def validate_row(dataset_dir: Path, row: pd.Series) \
         src_filename = row[1]['output_filename']
         class_name = row[1]['class_name']
         full_path = dataset_dir / src_filename
-        ast = AST.build_from_javalang(build_ast(full_path))
+        if ast is None and ast_cache is not None:
+            ast = ast_cache.build_ast(full_path)
+        elif ast is None:
+            ast = AST.build_from_javalang(build_ast(full_path))
         function_to_analyze = row[1]['method_where_invocation_occurred']
 
         for class_decl in ast.get_proxy_nodes(ASTNodeType.CLASS_DECLARATION):
             if class_decl.name == class_name:
                 objects_to_consider = list(class_decl.methods) + list(class_decl.constructors) or []
                 for ast_node in objects_to_consider:
-                    result = RowResult(
-                        output_filename=full_path,
-                        input_filename=row[1]['input_filename'],
-                        class_name='Not available',
-                        method_name='',
-                        start_line_SEMI=-1,
-                        end_line_SEMI=-1,
-                        start_line_dataset=start_line_of_inserted_block,
-                        end_line_dataset=end_line_of_inserted_block,
-                        percent_matched=-1.0,
-                        error_string='',
-                        ncss=0,
-                        matched=False,
-                        failed_cases_in_SEMI_algorithm=False,
-                        no_opportunity_chosen=False,
-                        failed_cases_in_validation_examples=False,
-                    )
+                    result = _create_row_result(dataset_dir, row)
+                    result.start_line_dataset = start_line_of_inserted_block
+                    result.end_line_dataset = end_line_of_inserted_block
                     if ast_node.name != function_to_analyze:
                         continue
                     try:
                         ast_subtree = ast.get_subtree(ast_node)
-                        opport = find_extraction_opportunities(ast_subtree)
+                        opport = find_extraction_opportunities(ast_subtree, Deadline(method_timeout))
                         if opport:
                             find_matched_lines(
                                 ast_node,
@@ -174,6 +221,64 @@ def validate_row(dataset_dir: Path, row: pd.Series) \
     return results
 
 
+def _create_row_result(dataset_dir: Path, row: pd.Series) -> RowResult:
+    return RowResult(
+        output_filename=dataset_dir / row[1]['output_filename'],
+        input_filename=row[1]['input_filename'],
+        class_name='Not available',
+        method_name='',
+        start_line_SEMI=-1,
+        end_line_SEMI=-1,
+        start_line_dataset=-1,
+        end_line_dataset=-1,
+        percent_matched=-1.0,
+        error_string='',
+        ncss=0,
+        matched=False,
+        failed_cases_in_SEMI_algorithm=False,
+        no_opportunity_chosen=False,
+        failed_cases_in_validation_examples=False,
+    )
+
+
+def validate_file(
+        dataset_dir: Path,
+        rows: pd.DataFrame,
+        ast_cache: Optional[ASTCache] = None,
+        method_timeout: Optional[float] = None) -> List[RowResult]:
+    """
+    Validate rows of dataset with the same output file, which is parsed once
+
+    :param dataset_dir: directory to dataset, path before the relative path in
+    output_filename
+    :param rows: rows of dataframe of synth validation dataset with the same output_filename
+    :param ast_cache: cache of parsed files, if None files are always parsed
+    :param method_timeout: time budget in seconds for SEMI on a method, if None time is not limited
+    :return: Stats - return collected stats for all rows
+    """
+    full_path = dataset_dir / rows.iloc[0]['output_filename']
+    try:
+        if ast_cache is not None:
+            ast = ast_cache.build_ast(full_path)
+        else:
+            ast = AST.build_from_javalang(build_ast(full_path))
+    except Exception as e:
+        # the file is not parsed again for each row, all of them fail with the same error
+        traceback.print_exc()
+        failed_results = []
+        for row in rows.iterrows():
+            result = _create_row_result(dataset_dir, row)
+            result.error_string = str(e)
+            result.failed_cases_in_validation_examples = True
+            failed_results.append(result)
+        return failed_results
+
+    results = []
+    for row in rows.iterrows():
+        results.extend(validate_row(dataset_dir, row, ast_cache, method_timeout, ast))
+    return results
+
+
 def find_matched_lines(
         ast_node: ASTNode,
         ast_subtree: AST,
@@ -185,11 +290,10 @@ def find_matched_lines(
         result: RowResult) -> None:
     best_group = opportunities_list[0]
     lines = [node.line for node in best_group._optimal_opportunity]
-    fixed_lines = invoke_with_timeout(
-        5,
-        fix_start_end_lines_for_opportunity,
+    fixed_lines = fix_start_end_lines_for_opportunity(
         lines,
-        full_path
+        full_path,
+        Deadline(5)
     )
 
     start_line_opportunity = min(fixed_lines)
@@ -241,40 +345,72 @@ if __name__ == '__main__':
              "By default one less than number of cores. "
              "Be careful to raise it above, machine may stop responding while creating dataset.",
     )
+    parser.add_argument(
+        "--ast_cache_dir",
+        help="Directory to cache parsed files in. Files are not cached by default.",
+        default=None,
+    )
+    parser.add_argument(
+        "--ast_cache_size",
+        help="Upper bound of cache size in megabytes",
+        default=1024,
+        type=int,
+    )
+    parser.add_argument(
+        "--results_dir",
+        help="Directory to stream results to, they are merged to matched.csv at the end.",
+        default="validation_results",
+    )
+    parser.add_argument(
+        "--resume",
+        action='store_true',
+        help="Skip files validated by previous runs and keep their results."
+    )
+    parser.add_argument(
+        "--method_timeout",
+        help="Time budget in seconds for SEMI on a single method. Time is not limited by default.",
+        default=None,
+        type=float,
+    )
     args = parser.parse_args()
+    ast_cache = ASTCache(args.ast_cache_dir, args.ast_cache_size * 2 ** 20) if args.ast_cache_dir else None
     dataset_dir = Path(args.dataset_dir)
     csv_dataset_filename = Path(args.csv_input)
     df = pd.read_csv(csv_dataset_filename)
     df = df[df['can_be_parsed']]
 
-    output_df = pd.DataFrame(columns=list(RowResult.__annotations__.keys()))
-
-    with ProcessPool(system_cores_qty) as executor:
-        validate_row_f = partial(validate_row, dataset_dir)
-        future = executor.map(validate_row_f, df.iterrows(), timeout=10000, )
+    columns = list(RowResult.__annotations__.keys())
+    results_writer = ResultsWriter(Path(args.results_dir), resume=args.resume, fsync_period=100)
+    stats = ValidationStats()
+    # files, which results are saved, but not recorded to manifest, are validated again and counted then
+    for previous_row in results_writer.read_rows(only_completed=True):
+        stats.add(RowResult(**previous_row))
+
+    # rows are validated by files, so each file is parsed and sent to a worker once
+    files_rows = [
+        rows for output_filename, rows in df.groupby('output_filename', sort=False)
+        if output_filename not in results_writer.completed_inputs
+    ]
+    with ProcessPool(system_cores_qty) as executor, results_writer:
+        validate_file_f = partial(
+            validate_file, dataset_dir, ast_cache=ast_cache, method_timeout=args.method_timeout
+        )
+        future = executor.map(validate_file_f, files_rows, timeout=10000, )
         result = future.result()
-        for index, row in tqdm(df.iterrows(), total=df.shape[0]):
+        for rows in tqdm(files_rows):
             try:
                 results: List[RowResult] = next(result)
-                for res in results:
-                    output_df = output_df.append(asdict(res), ignore_index=True)
-                output_df.to_csv('matched.csv')
             except Exception:
                 print(traceback.format_exc())
                 continue
 
-    matched_cases = float(output_df[output_df["matched"]].shape[0])
-    failed_cases_in_SEMI_algorithm = output_df[output_df["failed_cases_in_SEMI_algorithm"]].shape[0]
-    failed_cases_in_validation_examples = output_df[output_df["failed_cases_in_validation_examples"]].shape[0]
-    no_opportunity_chosen = output_df[output_df["no_opportunity_chosen"]].shape[0]
-    matched_percent = mean(output_df[output_df["percent_matched"] > -1].percent_matched.values)
-    print(f'Failed SEMI algorithm errors: {failed_cases_in_SEMI_algorithm}')
-    print(f'Failed examples of synth dataset: {failed_cases_in_validation_examples}')
-    print(f'matched_cases: {matched_cases}')
-    print(f'No opportunity chosen: {no_opportunity_chosen} times')
-    print(f'Total number of handled cases: {output_df.shape[0]}')
-    print(f'Average of matched lines: {matched_percent}')
-    total_case_handled = output_df.shape[0] - failed_cases_in_SEMI_algorithm - failed_cases_in_validation_examples
-    if total_case_handled > 0:
-        result = matched_cases / total_case_handled
-        print(f'Matched {result}% of cases, {matched_cases} out of {total_case_handled}')
\ No newline at end of file
+            results_writer.write(
+                rows.iloc[0]['output_filename'],
+                [dict(asdict(res), output_filename=str(res.output_filename)) for res in results]
+            )
+            for res in results:
+                stats.add(res)
+
+        results_writer.merge_to_csv(Path('matched.csv'), columns)
+
+    stats.print()
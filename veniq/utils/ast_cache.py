@@ -0,0 +1,139 @@
+import os
+import pickle
+from hashlib import sha256
+from pathlib import Path
+from tempfile import NamedTemporaryFile
+from typing import Dict, List, Optional, Tuple, Union
+
+from javalang.parse import parse
+
+from veniq.ast_framework import AST
+from veniq.utils.encoding_detector import read_text_with_autodetected_encoding
+
+
+class ASTCache:
+    '''
+    On-disk cache of ASTs built from Java source code.
+    Entries are keyed by sha256 hash of decoded source code, so copied files are not parsed again,
+    while changed ones are. Total size of entries is bounded by max_size bytes and
+    the least recently used entries are evicted first.
+    Cache can be shared by several processes, since entries are replaced atomically.
+    '''
+
+    # must be increased on any change of AST, which makes previously cached entries incompatible
+    _FORMAT_VERSION = 2
+    _ENTRY_SUFFIX = '.ast'
+    # eviction frees some extra space to not scan the directory on each next insertion
+    _EVICTION_RATIO = 0.9
+    # total size of entries by cache directory known to the current process.
+    # Cache is pickled into each task of worker processes, so the size is kept per process
+    # and a directory is scanned only on the first insertion into it
+    _known_sizes: Dict[Path, int] = {}
+
+    def __init__(self, directory: Union[str, Path], max_size: int = 2 ** 30, backend: str = 'networkx'):
+        '''
+        :param directory: directory for cache entries, created if it does not exist
+        :param max_size: upper bound of total size of cache entries in bytes
+        :param backend: backend of cached ASTs, see AST.build_from_javalang
+        '''
+        if max_size <= 0:
+            raise ValueError(f"'max_size' must be positive, but {max_size} was provided.")
+
+        self._directory = Path(directory).resolve()
+        self._max_size = max_size
+        self._backend = backend
+        self._directory.mkdir(parents=True, exist_ok=True)
+
+    def build_ast(self, filename: Union[str, Path]) -> AST:
+        '''
+        Returns AST of a Java file, it is parsed only if its source code is not found in the cache.
+        '''
+        return self.build_ast_from_text(read_text_with_autodetected_encoding(str(filename)))
+
+    def build_ast_from_text(self, text: str) -> AST:
+        key = self._calculate_key(text)
+        ast = self._load(key)
+        if ast is None:
+            ast = AST.build_from_javalang(parse(text), self._backend)
+            self._store(key, ast)
+        return ast
+
+    def _calculate_key(self, text: str) -> str:
+        text_hash = sha256(f'{self._FORMAT_VERSION}:{self._backend}:'.encode('utf-8'))
+        text_hash.update(text.encode('utf-8', errors='surrogatepass'))
+        return text_hash.hexdigest()
+
+    def _get_entry_path(self, key: str) -> Path:
+        return self._directory / (key + self._ENTRY_SUFFIX)
+
+    def _load(self, key: str) -> Optional[AST]:
+        entry_path = self._get_entry_path(key)
+        try:
+            with open(entry_path, 'rb') as entry:
+                ast = pickle.load(entry)
+            # modification time is used as time of last access for eviction
+            os.utime(entry_path)
+        except OSError:
+            # entry is missing or evicted by another process
+            return None
+        except Exception:
+            # entry is corrupted or written by incompatible version of veniq
+            try:
+                entry_size = entry_path.stat().st_size
+                entry_path.unlink()
+            except FileNotFoundError:
+                return None
+            if self._directory in self._known_sizes:
+                self._known_sizes[self._directory] -= entry_size
+            return None
+        return ast
+
+    def _store(self, key: str, ast: AST) -> None:
+        with NamedTemporaryFile(dir=self._directory, suffix='.tmp', delete=False) as entry:
+            pickle.dump(ast, entry, protocol=pickle.HIGHEST_PROTOCOL)
+            temporary_path = entry.name
+        entry_path = self._get_entry_path(key)
+        # an entry stored by another process or a replaced corrupted entry is overwritten
+        try:
+            replaced_size = entry_path.stat().st_size
+        except FileNotFoundError:
+            replaced_size = 0
+        size = self._get_size() - replaced_size + os.path.getsize(temporary_path)
+        os.replace(temporary_path, entry_path)
+        self._known_sizes[self._directory] = size
+
+        if size > self._max_size:
+            self._evict()
+
+    def _get_size(self) -> int:
+        if self._directory not in self._known_sizes:
+            self._known_sizes[self._directory] = sum(size for _, _, size in self._list_entries())
+        return self._known_sizes[self._directory]
+
+    def _evict(self) -> None:
+        # other processes might have changed the directory, so its size is recalculated
+        entries = sorted(self._list_entries())
+        total_size = sum(size for _, _, size in entries)
+        for _, entry_path, size in entries:
+            if total_size <= self._max_size * self._EVICTION_RATIO:
+                break
+            try:
+                entry_path.unlink()
+            except FileNotFoundError:
+                # already evicted by another process
+                pass
+            total_size -= size
+        self._known_sizes[self._directory] = total_size
+
+    def _list_entries(self) -> List[Tuple[float, Path, int]]:
+        '''
+        Returns time of last access, path and size of each entry.
+        '''
+        entries: List[Tuple[float, Path, int]] = []
+        for entry_path in self._directory.glob('*' + self._ENTRY_SUFFIX):
+            try:
+                entry_stat = entry_path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((entry_stat.st_mtime, entry_path, entry_stat.st_size))
+        return entries
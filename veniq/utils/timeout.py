@@ -1,6 +1,7 @@
 import threading
 import signal
-import os
+import time
+from typing import Optional
 
 
 class TerminateExecution(Exception):
@@ -9,13 +10,38 @@ class TerminateExecution(Exception):
     """
 
 
-def quit_function(pid):
-    # Killing all subprocesses
-    os.setpgrp()
-    os.killpg(0, signal.SIGTERM)
+class Deadline:
+    """
+    Time budget of a computation, which checks it periodically with check().
+    Only the computation, which the deadline is passed to, is stopped,
+    so it is safe to use in worker processes of a pool.
+    """
+
+    def __init__(self, timeout: Optional[float]):
+        """
+        :param timeout: budget in seconds starting from now, if None deadline never expires
+        """
+        self.timeout = timeout
+        self._expiration_time = None if timeout is None else time.monotonic() + timeout
+
+    @property
+    def remaining(self) -> Optional[float]:
+        if self._expiration_time is None:
+            return None
+        return max(self._expiration_time - time.monotonic(), 0.0)
+
+    @property
+    def is_expired(self) -> bool:
+        return self._expiration_time is not None and time.monotonic() >= self._expiration_time
+
+    def check(self) -> None:
+        if self.is_expired:
+            raise TerminateExecution(f"Deadline of {self.timeout} seconds is exceeded.")
 
-    # Killing the main thread
-    os.kill(pid, signal.SIGTERM)
+
+def check_deadline(deadline: Optional[Deadline]) -> None:
+    if deadline is not None:
+        deadline.check()
 
 
 def handle_term(signum, frame):
@@ -23,23 +49,22 @@ def handle_term(signum, frame):
 
 
 def invoke_with_timeout(timeout, fn, *args, **kwargs):
-    # Setting a sigterm handler and initiating a timer
-    old_handler = signal.signal(signal.SIGTERM, handle_term)
-    timer = threading.Timer(timeout, quit_function, args=[os.getpid()])
-    terminate = False
+    """
+    Calls fn and raises TerminateExecution, if it runs longer than timeout seconds.
+    Timer of the current process is used, so no other processes are affected.
+    Signals are handled only in the main thread, so it must be called from it.
+    Prefer passing Deadline to functions supporting it.
+    """
+    if timeout <= 0:
+        raise ValueError(f"'timeout' must be positive, but {timeout} was provided.")
+    if threading.current_thread() is not threading.main_thread():
+        raise RuntimeError("invoke_with_timeout can be called only from the main thread, use Deadline instead.")
 
-    # Executing the function
-    timer.start()
+    old_handler = signal.signal(signal.SIGALRM, handle_term)
+    signal.setitimer(signal.ITIMER_REAL, timeout)
     try:
-        result = fn(*args, **kwargs)
-    except TerminateExecution:
-        terminate = True
+        return fn(*args, **kwargs)
     finally:
-        # Restoring original handler and cancel timer
-        signal.signal(signal.SIGTERM, old_handler)
-        timer.cancel()
-
-    if terminate:
-        raise BaseException("xxx")
-
-    return result
+        # Cancelling timer and restoring original handler
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, old_handler)